@@ -0,0 +1,87 @@
+"""Measure inter-camera capture skew for burst triggers on synthetic free-running cameras.
+
+Each camera runs its own grabber loop with a random phase, like real unsynchronized
+USB/RTSP cameras. For every trigger the spread between the chosen frames' capture
+timestamps is recorded for two strategies: taking each camera's latest frame in turn
+(the pre-burst behaviour) and selecting each ring's frame closest to the trigger time.
+
+    python benchmarks/bench_burst_skew.py --cameras 4 --fps 30 --triggers 200
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frame_buffer import FrameRing  # noqa: E402
+from bench_frame_ring import SyntheticCapture  # noqa: E402
+
+
+def grab_loop(cap, ring, stop):
+    while not stop.is_set():
+        index, slot = ring.writable_slot()
+        ret, frame = cap.read(image=slot)
+        ring.commit(index, frame, time.monotonic())
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def report(name, spreads):
+    print(f"{name:<22}{statistics.median(spreads):>8.1f}{percentile(spreads, 95):>8.1f}{max(spreads):>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cameras", type=int, default=4)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--slots", type=int, default=4)
+    parser.add_argument("--triggers", type=int, default=200)
+    args = parser.parse_args()
+
+    stop = threading.Event()
+    rings = []
+    for i in range(args.cameras):
+        cap = SyntheticCapture(args.width, args.height, args.fps)
+        cap.next_frame += random.random() / args.fps  # free-running cameras are not phase aligned
+        ring = FrameRing(args.slots)
+        rings.append(ring)
+        threading.Thread(target=grab_loop, args=(cap, ring, stop), daemon=True).start()
+    time.sleep(0.5)
+
+    latest_spreads, closest_spreads = [], []
+    for _ in range(args.triggers):
+        time.sleep(random.uniform(0.01, 0.05))
+        trigger = time.monotonic()
+
+        stamps = []
+        for ring in rings:
+            # The newest frame is the one closest to a time far in the future
+            with ring.closest(time.monotonic() + 3600) as (view, stamp):
+                view.copy()
+                stamps.append(stamp)
+        latest_spreads.append((max(stamps) - min(stamps)) * 1000)
+
+        stamps = []
+        for ring in rings:
+            with ring.closest(trigger) as (view, stamp):
+                view.copy()
+                stamps.append(stamp)
+        closest_spreads.append((max(stamps) - min(stamps)) * 1000)
+    stop.set()
+
+    print(f"{args.cameras} cameras, {args.width}x{args.height} @ {args.fps} fps, {args.triggers} triggers")
+    print(f"{'strategy':<22}{'p50 ms':>8}{'p95 ms':>8}{'max ms':>8}")
+    report("latest frame each", latest_spreads)
+    report("closest to trigger", closest_spreads)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Compare grabber CPU and trigger latency for each capture-idle-mode.
+
+A synthetic MJPEG camera delivers frames at --fps; read() decodes the JPEG like a USB
+camera does, grab() only waits for the frame. Like a V4L2 camera opened with
+CAP_PROP_BUFFERSIZE=1 it keeps the first frame captured after the last read queued and
+drops the rest, so a frame read after an idle sleep is as old as the sleep. Triggers
+arrive every --interval seconds and the grabber stays armed for --armed seconds after
+each one, so with sparse triggers it spends most of the run idle. Latency is the time
+from trigger to the first frame captured after it being available, i.e. the ramp-up cost
+of idling; 'stale' counts triggers that were instead given a frame the camera captured
+before the trigger.
+
+    python benchmarks/bench_capture_schedule.py --width 1920 --height 1080 --interval 5 --triggers 6
+"""
+import argparse
+import collections
+import os
+import statistics
+import sys
+import threading
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from capture_schedule import CaptureScheduler, IDLE_MODES  # noqa: E402
+from frame_buffer import FrameRing  # noqa: E402
+from bench_encoders import synthetic_frame  # noqa: E402
+
+
+class MjpegCapture:
+    """Stands in for a USB camera in MJPEG mode."""
+
+    def __init__(self, width, height, fps, buffers=1):
+        self.jpeg = cv2.imencode('.jpg', synthetic_frame(width, height), [cv2.IMWRITE_JPEG_QUALITY, 90])[1]
+        self.period = 1.0 / fps
+        self.buffers = buffers
+        self.queued = collections.deque()  # capture times of frames waiting in the driver
+        self.next_capture = time.monotonic()
+        self.captured = None  # capture time of the frame last grabbed
+
+    def _expose(self, now):
+        while self.next_capture <= now:
+            if len(self.queued) < self.buffers:
+                self.queued.append(self.next_capture)
+            self.next_capture += self.period  # no free buffer - the camera drops the frame
+
+    def grab(self):
+        self._expose(time.monotonic())
+        if not self.queued:
+            time.sleep(max(0.0, self.next_capture - time.monotonic()))
+            self._expose(time.monotonic())
+        self.captured = self.queued.popleft()
+        return True
+
+    def read(self, image=None):
+        self.grab()
+        frame = cv2.imdecode(self.jpeg, cv2.IMREAD_COLOR)
+        if image is not None and image.shape == frame.shape:
+            image[...] = frame
+            frame = image
+        return True, frame
+
+
+def grab_loop(cap, ring, scheduler, stop, captured):
+    """Same decisions as FrameGrabber._update; `captured` maps ring stamps to true capture times."""
+    while not stop.is_set():
+        if not scheduler.poll():
+            if scheduler.idle_mode == 'grab':
+                cap.grab()
+                continue
+            scheduler.idle_wait()
+            cap.grab()
+        index, slot = ring.writable_slot()
+        ret, frame = cap.read(image=slot)
+        stamp = time.monotonic()
+        captured[stamp] = cap.captured
+        ring.commit(index, frame, stamp)
+
+
+def run(mode, args):
+    cap = MjpegCapture(args.width, args.height, args.fps)
+    scheduler = CaptureScheduler(mode, armed_seconds=args.armed, idle_fps=args.idle_fps, name=mode)
+    ring = FrameRing(3)
+    stop = threading.Event()
+    captured = {}
+    thread = threading.Thread(target=grab_loop, args=(cap, ring, scheduler, stop, captured), daemon=True)
+    thread.start()
+    time.sleep(args.armed + 0.5)  # let the start-up armed window lapse
+
+    latencies, stale = [], 0
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    for _ in range(args.triggers):
+        time.sleep(args.interval)
+        trigger = time.monotonic()
+        was_armed = scheduler.arm()
+        if not was_armed:
+            ring.wait_for_frame_after(trigger, timeout=2.0)
+        with ring.closest(trigger if was_armed else time.monotonic()) as (view, stamp):
+            view.copy()
+            if not was_armed and captured[stamp] < trigger:
+                stale += 1
+        latencies.append((time.monotonic() - trigger) * 1000 if not was_armed else 0.0)
+    cpu = (time.process_time() - cpu_start) / (time.perf_counter() - wall_start) * 100
+    stop.set()
+    thread.join(timeout=2)
+    print(f"{mode:<10}{cpu:>8.1f}{statistics.median(latencies):>12.1f}{max(latencies):>10.1f}{scheduler.wakeups:>9}{stale:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--armed", type=float, default=2.0, help="capture-armed-seconds")
+    parser.add_argument("--idle-fps", type=float, default=1.0, help="capture-idle-fps (throttle)")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between triggers")
+    parser.add_argument("--triggers", type=int, default=6)
+    args = parser.parse_args()
+
+    print(f"{args.width}x{args.height} MJPEG @ {args.fps:g} fps, trigger every {args.interval:g}s, "
+          f"armed {args.armed:g}s after each")
+    print(f"{'mode':<10}{'CPU %':>8}{'p50 ramp ms':>12}{'max ms':>10}{'wakeups':>9}{'stale':>7}")
+    for mode in IDLE_MODES:
+        run(mode, args)
+
+
+if __name__ == "__main__":
+    main()
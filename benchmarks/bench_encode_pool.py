@@ -0,0 +1,74 @@
+"""Measure encode throughput and latency against the number of encode workers and tiles.
+
+`--callers` threads (the upload workers) encode frames back to back through one
+EncodeExecutor. Throughput shows how well the pool uses the cores; latency is what a
+single trigger waits for its encode, which tiling reduces even with one caller.
+
+    python benchmarks/bench_encode_pool.py --workers 1 2 4 --tiles 1 4 --callers 2
+    python benchmarks/bench_encode_pool.py --format jpeg --workers 1 2 4
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from encoders import create_encoder  # noqa: E402
+from encode_pool import EncodeExecutor  # noqa: E402
+from bench_encoders import synthetic_frame  # noqa: E402
+
+
+def run(frame, args, workers, tiles):
+    executor = EncodeExecutor(create_encoder(args.format, png_compression=args.png_compression),
+                              workers=workers, tiles=tiles)
+    executor.encode(frame)  # warm up the pool threads
+    latencies = []
+    sizes = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def caller():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            image = executor.encode(frame)
+            with lock:
+                latencies.append((time.perf_counter() - start) * 1000)
+                sizes.append(image.size)
+
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    threads = [threading.Thread(target=caller) for _ in range(args.callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - wall_start
+    cpu = (time.process_time() - cpu_start) / wall * 100
+    executor.shutdown()
+    print(f"{workers:>8}{getattr(executor.encoder, 'tiles', 1):>7}{len(latencies) / wall:>10.1f}"
+          f"{statistics.median(latencies):>10.1f}{max(latencies):>10.1f}{cpu:>8.0f}{statistics.mean(sizes) / 1e6:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--format", default="png")
+    parser.add_argument("--png-compression", type=int, default=None)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--tiles", type=int, nargs="+", default=[1, 4], help="1 disables tiling")
+    parser.add_argument("--callers", type=int, default=2, help="Concurrent encoders (upload-workers)")
+    parser.add_argument("--seconds", type=float, default=3)
+    args = parser.parse_args()
+
+    frame = synthetic_frame(args.width, args.height)
+    print(f"{args.width}x{args.height} {args.format}, {args.callers} callers, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8}{'tiles':>7}{'frames/s':>10}{'p50 ms':>10}{'max ms':>10}{'CPU %':>8}{'MB/frame':>10}")
+    for workers in args.workers:
+        for tiles in args.tiles:
+            run(frame, args, workers, tiles)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Compare encode time and payload size for every upload image format.
+
+Uses a synthetic inspection-like scene by default; pass --image to benchmark real
+frames from your line instead (any format cv2.imread understands).
+
+    python benchmarks/bench_encoders.py --width 1920 --height 1080 --repeat 10
+    python benchmarks/bench_encoders.py --image sample1.png --image sample2.jpg
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from encoders import JpegEncoder, PassthroughEncoder, PngEncoder, WebpEncoder, decode_jpeg  # noqa: E402
+
+
+def synthetic_frame(width, height, seed=0):
+    """Smooth background, hard-edged parts and sensor noise - roughly what a line camera sees."""
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 1, width, dtype=np.float32)
+    y = np.linspace(0, 1, height, dtype=np.float32)[:, None]
+    frame = np.empty((height, width, 3), dtype=np.float32)
+    frame[..., 0] = 80 + 60 * x
+    frame[..., 1] = 90 + 50 * y
+    frame[..., 2] = 100 + 30 * (x * y)
+    for _ in range(12):
+        cx, cy = rng.integers(0, width), rng.integers(0, height)
+        cv2.circle(frame, (int(cx), int(cy)), int(rng.integers(20, height // 6)),
+                   rng.integers(0, 255, 3).tolist(), -1)
+        cv2.rectangle(frame, (int(cx), int(cy)), (int(cx) + 120, int(cy) + 60), rng.integers(0, 255, 3).tolist(), 3)
+    frame += rng.normal(0, 4, frame.shape).astype(np.float32)
+    return np.clip(frame, 0, 255).astype(np.uint8)
+
+
+def time_call(fn, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), result
+
+
+def bench_frame(label, frame, repeat):
+    print(f"\n{label}: {frame.shape[1]}x{frame.shape[0]} ({frame.nbytes / 1e6:.1f} MB raw)")
+    print(f"{'format':<24}{'median ms':>10}{'KB':>10}")
+    encoders = [("png opencv default", PngEncoder())]
+    encoders += [(f"png compression={c}", PngEncoder(c)) for c in (0, 1, 3, 6)]
+    encoders += [(f"jpeg quality={q}", JpegEncoder(q)) for q in (80, 90, 95)]
+    encoders += [(f"webp quality={q}", WebpEncoder(q)) for q in (80, 90)]
+    for name, encoder in encoders:
+        ms, image = time_call(lambda: encoder.encode(frame), repeat)
+        print(f"{name:<24}{ms:>10.1f}{image.size / 1024:>10.0f}")
+
+    # JPEG camera path: old code decoded the snapshot and re-encoded PNG, pass-through forwards the bytes
+    snapshot = bytes(JpegEncoder(90).encode(frame).data)
+    old_ms, _ = time_call(lambda: PngEncoder().encode(decode_jpeg(snapshot)), repeat)
+    new_ms, image = time_call(lambda: PassthroughEncoder().encode(snapshot), repeat)
+    print(f"{'jpeg cam: decode+png':<24}{old_ms:>10.1f}{'':>10}")
+    print(f"{'jpeg cam: passthrough':<24}{new_ms:>10.3f}{image.size / 1024:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--image", action="append", default=[], help="Benchmark this image file (repeatable)")
+    args = parser.parse_args()
+
+    if args.image:
+        for path in args.image:
+            frame = cv2.imread(path, cv2.IMREAD_COLOR)
+            if frame is None:
+                print(f"Could not read {path}")
+                continue
+            bench_frame(os.path.basename(path), frame, args.repeat)
+    else:
+        bench_frame("synthetic", synthetic_frame(args.width, args.height), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compare the cost of frame quality checks against the old full-frame np.mean black test.
+
+    python benchmarks/bench_frame_quality.py --width 1920 --height 1080 --repeat 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frame_quality import FrameQualityChecker, is_black  # noqa: E402
+from bench_encoders import synthetic_frame  # noqa: E402
+
+
+def time_call(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, nargs="+", default=[1280, 1920, 3840])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'frame':<12}{'check':<28}{'median us':>10}{'vs mean':>10}")
+    for width in args.width:
+        height = width * 9 // 16
+        frame = synthetic_frame(width, height)
+        other = synthetic_frame(width, height, seed=1)
+        plain = FrameQualityChecker()
+        full = FrameQualityChecker(blur_threshold=50)
+        label = f"{width}x{height}"
+
+        baseline = time_call(lambda: np.mean(frame) < 5, args.repeat)
+        rows = [
+            ("np.mean(frame) < 5", baseline),
+            ("is_black (strided)", time_call(lambda: is_black(frame), args.repeat)),
+            ("thumbnail", time_call(lambda: plain.thumbnail(frame), args.repeat)),
+            # alternate frames so the frozen comparison always runs
+            ("check: black/frozen/exposure", time_call(lambda: plain.check(frame) and plain.check(other),
+                                                       args.repeat) / 2),
+            ("check: all incl. blur", time_call(lambda: full.check(frame) and full.check(other),
+                                                args.repeat) / 2),
+        ]
+        for name, us in rows:
+            print(f"{label:<12}{name:<28}{us:>10.0f}{us / baseline:>9.1%}")
+
+    frame = synthetic_frame(1920, 1080)
+    checker = FrameQualityChecker(blur_threshold=50)
+    checker.check(frame)
+    report = checker.check(frame)
+    print(f"\nsame frame twice -> {report.issues} ({report.describe()})")
+    report = checker.check(np.zeros_like(frame))
+    print(f"black frame      -> {report.issues} ({report.describe()})")
+
+
+if __name__ == "__main__":
+    main()
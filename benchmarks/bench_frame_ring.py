@@ -0,0 +1,100 @@
+"""Compare the old copy-per-frame grabber loop against the FrameRing loop.
+
+Runs a synthetic 30 fps camera for a few seconds per mode and reports CPU% of the
+capture thread plus the memory traffic spent on frame copies. Triggers arrive once
+per second in both modes so the per-trigger copy is included.
+
+    python benchmarks/bench_frame_ring.py --width 1920 --height 1080 --fps 30 --seconds 5
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frame_buffer import FrameRing  # noqa: E402
+
+
+class SyntheticCapture:
+    """Stands in for cv2.VideoCapture: 'decodes' by writing a frame into the output array."""
+
+    def __init__(self, width, height, fps):
+        self.source = np.random.randint(0, 255, (height, width, 3), dtype=np.uint8)
+        self.period = 1.0 / fps
+        self.next_frame = time.perf_counter()
+        self.bytes_written = 0
+
+    def read(self, image=None):
+        delay = self.next_frame - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self.next_frame += self.period
+        if image is None or image.shape != self.source.shape:
+            image = np.empty_like(self.source)
+        np.copyto(image, self.source)
+        self.bytes_written += image.nbytes
+        return True, image
+
+
+def run_copy_loop(cap, seconds, copied):
+    lock = threading.Lock()
+    latest = [None]
+    stop = time.perf_counter() + seconds
+    next_trigger = time.perf_counter() + 1.0
+    while time.perf_counter() < stop:
+        ret, frame = cap.read()
+        with lock:
+            latest[0] = frame.copy()
+        copied[0] += frame.nbytes
+        if time.perf_counter() >= next_trigger:
+            with lock:
+                triggered = latest[0].copy()
+            copied[0] += triggered.nbytes
+            next_trigger += 1.0
+
+
+def run_ring_loop(cap, seconds, copied, slots=3):
+    ring = FrameRing(slots)
+    stop = time.perf_counter() + seconds
+    next_trigger = time.perf_counter() + 1.0
+    while time.perf_counter() < stop:
+        index, slot = ring.writable_slot()
+        ret, frame = cap.read(image=slot)
+        ring.commit(index, frame)
+        if time.perf_counter() >= next_trigger:
+            with ring.latest() as view:
+                triggered = view.copy()  # the only copy made per trigger
+            copied[0] += triggered.nbytes
+            next_trigger += 1.0
+
+
+def measure(name, loop, args):
+    cap = SyntheticCapture(args.width, args.height, args.fps)
+    copied = [0]
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    loop(cap, args.seconds, copied)
+    cpu = time.thread_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    print(f"{name:<12} CPU {cpu / wall * 100:5.1f}% | extra copies {copied[0] / wall / 1e6:7.1f} MB/s "
+          f"| decoder writes {cap.bytes_written / wall / 1e6:7.1f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.width}x{args.height} @ {args.fps} fps for {args.seconds}s per mode")
+    measure("frame.copy()", run_copy_loop, args)
+    measure("FrameRing", run_ring_loop, args)
+
+
+if __name__ == "__main__":
+    main()
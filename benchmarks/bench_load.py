@@ -0,0 +1,333 @@
+"""Load-test the real trigger -> capture -> encode -> upload path without any hardware.
+
+Starts local stand-ins for the MQTT broker and the MVI edge (HTTPS), writes a config
+into a temporary directory and runs the unmodified uploader.py in a child process whose
+USB cameras are synthetic (or a looping video file). Triggers are then published at each
+--rates step and every upload the stand-in receives is matched back to its trigger.
+Reports sustained triggers/sec, end-to-end latency percentiles and the uploader
+process' CPU and memory, so a regression shows up before it reaches the line.
+
+    python benchmarks/bench_load.py --rates 2 5 10 20 --seconds 15
+    python benchmarks/bench_load.py --cameras 2 --format jpeg --mvi-latency 40
+    python benchmarks/bench_load.py --video line_recording.mp4 --set upload-workers=4
+    python benchmarks/bench_load.py --replay archive/ --format jpeg
+
+--replay skips the triggers: every camera becomes a FILE camera that replays the video
+file or image directory once, as fast as possible, uploading every frame (the replay
+waits for room in the upload queue, so nothing is dropped). It reports frames uploaded per second,
+i.e. the throughput of the whole capture -> encode -> upload path on this machine.
+
+Trigger admission (debounce and rate limit) is switched off unless --keep-admission
+is given, so the raw pipeline is measured. Needs the openssl CLI for the stand-in
+certificate.
+"""
+import argparse
+import bisect
+import json
+import os
+import platform
+import runpy
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+import yaml
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UPLOADER = os.path.join(REPO, 'uploader.py')
+TOPIC = 'bench/trigger'
+
+# Optional imports with graceful fallbacks
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+    psutil = None
+
+
+# --------------------- Child Process (the uploader under test) ---------------------
+def run_uploader(source):
+    """Run uploader.py with every integer (USB) cv2.VideoCapture replaced by a stand-in."""
+    import cv2
+    from standins import SyntheticCamera, VideoFileCamera
+
+    real_capture = cv2.VideoCapture
+
+    def video_capture(src=None, *args, **kwargs):
+        if isinstance(src, int):
+            if source['video']:
+                return VideoFileCamera(source['video'], fps=source['fps'])
+            return SyntheticCamera(source['width'], source['height'], source['fps'], mjpeg=source['mjpeg'])
+        return real_capture(src, *args, **kwargs)
+
+    cv2.VideoCapture = video_capture
+    sys.path.insert(0, REPO)
+    runpy.run_path(UPLOADER, run_name='__main__')
+
+
+# --------------------- Process Stats ---------------------
+class ProcessStats:
+    """CPU seconds and resident memory of the uploader process (psutil, else /proc)."""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.process = psutil.Process(pid) if PSUTIL_AVAILABLE else None
+
+    def cpu_seconds(self):
+        if self.process:
+            times = self.process.cpu_times()
+            return times.user + times.system
+        try:
+            with open(f"/proc/{self.pid}/stat") as f:
+                fields = f.read().rpartition(')')[2].split()
+            return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+        except OSError:
+            return None
+
+    def rss_mb(self):
+        if self.process:
+            return self.process.memory_info().rss / 1e6
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1]) / 1e3
+        except OSError:
+            pass
+        return None
+
+
+# --------------------- Harness ---------------------
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def write_config(directory, args, mvi_port, mqtt_port, metrics_port):
+    config = {
+        'host-platform': 'WINDOWS' if platform.system() == 'Windows' else 'LINUX',
+        'mvi-edge-endpoint': f"127.0.0.1:{mvi_port}/api/v1",
+        'mvi-username': 'bench',
+        'mvi-password': 'bench',
+        'mqtt-broker': '127.0.0.1',
+        'mqtt-port': mqtt_port,
+        'mqtt-tls-required': False,
+        'image-format': args.format,
+        'metrics-host': '127.0.0.1',
+        'metrics-port': metrics_port,
+        'camera-width': args.width,
+        'camera-height': args.height,
+        'cameras': [{'name': f"cam{i}", 'camera-type': 'USB', 'camera-device': i,
+                     'mqtt-trigger-topic': TOPIC, 'mvi-device-uuid': f"uuid-cam{i}"}
+                    for i in range(args.cameras)],
+    }
+    if args.replay:
+        for camera in config['cameras']:
+            camera.update({'camera-type': 'FILE', 'camera-file': os.path.abspath(args.replay)})
+        config.update({'file-pacing': 'fast', 'file-loop': False, 'file-upload-every-frame': True})
+    if not args.keep_admission:
+        config.update({'trigger-debounce-ms': 0, 'trigger-rate-limit': 0})
+    for item in args.set:
+        key, _, value = item.partition('=')
+        config[key] = yaml.safe_load(value)
+    with open(os.path.join(directory, 'camera_edge_config.yaml'), 'w') as f:
+        yaml.safe_dump(config, f)
+
+
+def wait_ready(metrics_port, child, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if child.poll() is not None:
+            return False
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{metrics_port}/ready", timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def trigger_wall_time(filename):
+    """Trigger arrival (epoch seconds) from frame_<capture time>_age<N>ms..., or None."""
+    parts = os.path.splitext(filename)[0].split('_')
+    if len(parts) < 4 or parts[0] != 'frame' or not parts[3].startswith('age'):
+        return None
+    try:
+        captured = datetime.strptime(f"{parts[1]}_{parts[2]}", '%Y%m%dT%H%M%S_%f').timestamp()
+        return captured + float(parts[3][3:-2]) / 1000
+    except ValueError:
+        return None
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_step(rate, args, broker, mvi, stats):
+    first_upload = mvi.upload_count()
+    cpu_start, wall_start = stats.cpu_seconds(), time.perf_counter()
+    sent = []
+    next_time = time.monotonic()
+    deadline = next_time + args.seconds
+    while next_time < deadline:
+        time.sleep(max(0.0, next_time - time.monotonic()))
+        sent.append(time.time())
+        broker.publish(TOPIC, json.dumps({'id': len(sent)}))
+        next_time += 1.0 / rate
+    publish_end = time.perf_counter()
+
+    # Let the pipeline drain: stop once no upload arrived for a while
+    last_count, last_change = mvi.upload_count(), time.monotonic()
+    while time.monotonic() - last_change < args.drain:
+        time.sleep(0.1)
+        if mvi.upload_count() != last_count:
+            last_count, last_change = mvi.upload_count(), time.monotonic()
+    cpu_end, wall_end = stats.cpu_seconds(), time.perf_counter()
+
+    uploads = mvi.uploads[first_upload:]
+    latencies = []
+    for arrival, _, filename, _ in uploads:
+        trigger = trigger_wall_time(filename)
+        if trigger is None:
+            continue
+        i = bisect.bisect_left(sent, trigger)
+        nearest = min((sent[j] for j in (i - 1, i) if 0 <= j < len(sent)), key=lambda t: abs(t - trigger))
+        if abs(nearest - trigger) < 0.25:
+            latencies.append((arrival - nearest) * 1000)
+    latencies.sort()
+
+    expected = len(sent) * args.cameras
+    delivered = len(uploads) / args.cameras
+    # Sustained rate: triggers fully uploaded per second of publishing + the drain tail
+    sustained = delivered / max(1e-9, (uploads[-1][0] - sent[0]) if uploads else publish_end - wall_start)
+    cpu = None
+    if cpu_start is not None and cpu_end is not None:
+        cpu = (cpu_end - cpu_start) / (wall_end - wall_start) * 100
+    row = f"{rate:>8g}{len(sent):>7}{len(uploads):>6}/{expected:<6}{sustained:>10.1f}"
+    if latencies:
+        row += (f"{percentile(latencies, 0.5):>9.0f}{percentile(latencies, 0.95):>9.0f}"
+                f"{percentile(latencies, 0.99):>9.0f}")
+    else:
+        row += f"{'-':>9}{'-':>9}{'-':>9}"
+    row += f"{cpu:>8.0f}" if cpu is not None else f"{'-':>8}"
+    rss = stats.rss_mb()
+    row += f"{rss:>9.0f}" if rss is not None else f"{'-':>9}"
+    print(row, flush=True)
+
+
+def run_replay(args, mvi, stats):
+    """Wait until every replayed frame is uploaded (no upload for --drain seconds)."""
+    cpu_start, wall_start = stats.cpu_seconds(), time.perf_counter()
+    first_upload = mvi.upload_count()
+    last_count, last_change = first_upload, time.monotonic()
+    while time.monotonic() - last_change < args.drain:
+        time.sleep(0.1)
+        if mvi.upload_count() != last_count:
+            last_count, last_change = mvi.upload_count(), time.monotonic()
+    uploads = mvi.uploads[:last_count]
+    if not uploads:
+        print("No frames uploaded")
+        return
+    # Frames uploaded before the first measurement still count; time from the first upload
+    elapsed = max(1e-9, uploads[-1][0] - uploads[0][0])
+    cpu_end, wall_end = stats.cpu_seconds(), time.perf_counter() - args.drain
+    cpu = None
+    if cpu_start is not None and cpu_end is not None:
+        cpu = (cpu_end - cpu_start) / max(1e-9, wall_end - wall_start) * 100
+    rss = stats.rss_mb()
+    print(f"{len(uploads):>8}{elapsed:>10.1f}{len(uploads) / elapsed:>10.1f}"
+          + (f"{cpu:>8.0f}" if cpu is not None else f"{'-':>8}")
+          + (f"{rss:>9.0f}" if rss is not None else f"{'-':>9}"), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rates", type=float, nargs="+", default=[2, 5, 10, 20], help="Triggers per second")
+    parser.add_argument("--seconds", type=float, default=15, help="Publishing time per rate")
+    parser.add_argument("--drain", type=float, default=3, help="Quiet seconds that end a step")
+    parser.add_argument("--cameras", type=int, default=1, help="Synthetic cameras sharing the trigger topic")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--no-mjpeg", action="store_true", help="Synthetic frames skip the MJPEG decode")
+    parser.add_argument("--video", help="Loop this video file instead of the synthetic scene")
+    parser.add_argument("--replay", help="Upload every frame of this video file or image directory, no triggers")
+    parser.add_argument("--format", default="png", help="image-format to upload")
+    parser.add_argument("--mvi-latency", type=float, default=0, help="Stand-in MVI processing time per upload (ms)")
+    parser.add_argument("--keep-admission", action="store_true", help="Keep the trigger debounce/rate limit")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra camera_edge_config.yaml setting, e.g. --set upload-workers=4")
+    parser.add_argument("--log", help="Keep the uploader log here (default: discarded with the temp dir)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_uploader(json.loads(args.child))
+        return
+
+    from standins import MiniBroker, MviStandIn, self_signed_cert
+
+    with tempfile.TemporaryDirectory(prefix="dragonfly-bench-") as directory:
+        try:
+            certfile, keyfile = self_signed_cert(directory)
+        except (OSError, subprocess.CalledProcessError) as e:
+            sys.exit(f"Could not create the stand-in certificate with openssl: {e}")
+        mvi = MviStandIn(certfile, keyfile, latency=args.mvi_latency / 1000)
+        broker = MiniBroker()
+        metrics_port = free_port()
+        write_config(directory, args, mvi.port, broker.port, metrics_port)
+
+        source = {'video': args.video and os.path.abspath(args.video), 'width': args.width,
+                  'height': args.height, 'fps': args.fps, 'mjpeg': not args.no_mjpeg}
+        log_path = args.log or os.path.join(directory, 'uploader.log')
+        with open(log_path, 'w') as log:
+            child = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--child', json.dumps(source)],
+                                     env=dict(os.environ, DRAGONFLY_CONFIG_DIR=directory),
+                                     cwd=directory,  # the uploader's own uploader.log lands in the temp dir
+                                     stdout=log, stderr=subprocess.STDOUT)
+        try:
+            if not wait_ready(metrics_port, child, timeout=60):
+                with open(log_path) as log:
+                    tail = log.read()[-2000:]
+                sys.exit(f"Uploader did not become ready:\n{tail}")
+            stats = ProcessStats(child.pid)
+            if args.replay:
+                print(f"{args.cameras} x replay of {args.replay}, {args.format}, MVI latency {args.mvi_latency:g}ms")
+                print(f"{'frames':>8}{'seconds':>10}{'frames/s':>10}{'CPU %':>8}{'RSS MB':>9}")
+                run_replay(args, mvi, stats)
+                return
+            idle_cpu = stats.cpu_seconds()
+            time.sleep(2)
+            idle = stats.cpu_seconds()
+            idle_text = f", idle CPU {(idle - idle_cpu) / 2 * 100:.0f}%" if idle is not None else ""
+
+            print(f"{args.cameras} x {'video ' + args.video if args.video else 'synthetic'} "
+                  f"{args.width}x{args.height} @ {args.fps:g} fps, {args.format}, "
+                  f"MVI latency {args.mvi_latency:g}ms{idle_text}")
+            print(f"{'trig/s':>8}{'sent':>7}{'uploaded':>13}{'sust/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+                  f"{'CPU %':>8}{'RSS MB':>9}")
+            for rate in args.rates:
+                run_step(rate, args, broker, mvi, stats)
+            print(f"MVI stand-in: {mvi.sessions} sessions, {mvi.keep_alives} keep-alives")
+        finally:
+            child.send_signal(signal.SIGTERM if hasattr(signal, 'SIGTERM') else signal.SIGINT)
+            try:
+                child.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                child.kill()
+            broker.close()
+            mvi.close()
+
+
+if __name__ == "__main__":
+    main()
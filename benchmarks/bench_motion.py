@@ -0,0 +1,90 @@
+"""Measure what the motion trigger costs per frame and whether it fires when it should.
+
+Every frame of a synthetic scene goes through MotionDetector.check(), the same call the
+watcher thread makes for each frame the grabber captures. The scene is still (with
+sensor noise) for the first half, then a part slides through it. Reports the check
+time, the share of one core that costs at --fps, how many frames after the part
+entered the first trigger fired, and triggers on the still scene (false positives).
+
+    python benchmarks/bench_motion.py
+    python benchmarks/bench_motion.py --width 1280 --height 720 --max-width 80 160 320
+    python benchmarks/bench_motion.py --roi 600 300 700 500 --fps 60
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from motion import MotionDetector, MOTION_METHODS  # noqa: E402
+from bench_encoders import synthetic_frame  # noqa: E402
+
+
+def scene(width, height, frames, noise=4, variants=8):
+    """Yield (frame, part visible) - still with sensor noise, then a part sliding across."""
+    rng = np.random.default_rng(0)
+    base = synthetic_frame(width, height).astype(np.int16)
+    noisy = [np.clip(base + rng.normal(0, noise, base.shape), 0, 255).astype(np.uint8) for _ in range(variants)]
+    part = (width // 8, height // 5)
+    enter = frames // 2
+    for i in range(frames):
+        frame = noisy[i % variants]
+        if i >= enter:
+            frame = frame.copy()
+            x = (i - enter) * width // 40 % width
+            y = height // 2 - part[1] // 2
+            frame[y:y + part[1], x:x + part[0]] = (25, 25, 25)  # a dark part on the mid-grey belt
+        yield frame, i >= enter
+
+
+def run(frames, args, method, max_width):
+    detector = MotionDetector(method=method, roi=args.roi, min_area=args.min_area,
+                              cooldown=args.cooldown, max_width=max_width)
+    times, false_triggers, first_detection = [], 0, None
+    enter = None
+    for i, (frame, moving) in enumerate(frames):
+        if moving and enter is None:
+            enter = i
+        start = time.perf_counter()
+        fired = detector.check(frame, now=i / args.fps)
+        times.append((time.perf_counter() - start) * 1000)
+        if fired is not None:
+            if not moving:
+                false_triggers += 1
+            elif first_detection is None:
+                first_detection = i - enter
+    times = times[detector.warmup:]  # background building is not representative
+    mean = statistics.mean(times)
+    delay = f"{first_detection}" if first_detection is not None else "missed"
+    print(f"{method:>6}{max_width:>8}{statistics.median(times):>10.2f}{max(times):>10.2f}"
+          f"{mean * args.fps / 10:>9.1f}{delay:>10}{false_triggers:>8}{detector.triggers:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--fps", type=float, default=30, help="Camera frame rate the CPU share is given for")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--methods", nargs="+", default=list(MOTION_METHODS))
+    parser.add_argument("--max-width", type=int, nargs="+", default=[160, 320])
+    parser.add_argument("--roi", type=int, nargs=4, metavar=("X", "Y", "W", "H"))
+    parser.add_argument("--min-area", type=float, default=0.01)
+    parser.add_argument("--cooldown", type=float, default=2.0)
+    args = parser.parse_args()
+
+    frames = [(frame, moving) for frame, moving in scene(args.width, args.height, args.frames)]
+    roi = "full frame" if args.roi is None else "ROI {2}x{3}+{0}+{1}".format(*args.roi)
+    print(f"{args.width}x{args.height} @ {args.fps:g} fps, {roi}, {args.frames} frames "
+          f"(part enters at frame {args.frames // 2})")
+    print(f"{'method':>6}{'thumb':>8}{'p50 ms':>10}{'max ms':>10}{'core %':>9}{'delay':>10}{'false':>8}{'triggers':>10}")
+    for method in args.methods:
+        for max_width in args.max_width:
+            run(frames, args, method, max_width)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Measure the per-camera overhead of running several grabbers in one process.
+
+Each synthetic camera runs the same capture loop as FrameGrabber (its own thread
+decoding into a FrameRing). Reports process CPU% and resident memory as the camera
+count grows, so the marginal cost of one more camera is visible.
+
+    python benchmarks/bench_multi_camera.py --cameras 1 2 4 8 --width 1280 --height 720
+"""
+import argparse
+import os
+import resource
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frame_buffer import FrameRing  # noqa: E402
+from bench_frame_ring import SyntheticCapture  # noqa: E402
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 1e6
+
+
+def grab_loop(cap, ring, stop):
+    while not stop.is_set():
+        index, slot = ring.writable_slot()
+        ret, frame = cap.read(image=slot)
+        ring.commit(index, frame, time.monotonic())
+
+
+def run(count, args):
+    stop = threading.Event()
+    rss_before = rss_mb()
+    threads = []
+    for i in range(count):
+        cap = SyntheticCapture(args.width, args.height, args.fps)
+        ring = FrameRing(args.slots)
+        thread = threading.Thread(target=grab_loop, args=(cap, ring, stop), name=f"grabber-{i}", daemon=True)
+        threads.append(thread)
+    for thread in threads:
+        thread.start()
+    time.sleep(0.5)  # let every ring fill its slots
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    time.sleep(args.seconds)
+    cpu = (time.process_time() - cpu_start) / (time.perf_counter() - wall_start) * 100
+    rss = rss_mb() - rss_before
+    stop.set()
+    for thread in threads:
+        thread.join()
+    print(f"{count:>7}{cpu:>10.1f}{cpu / count:>14.1f}{rss:>10.0f}{rss / count:>14.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cameras", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--slots", type=int, default=3)
+    parser.add_argument("--seconds", type=float, default=3)
+    args = parser.parse_args()
+
+    print(f"{args.width}x{args.height} @ {args.fps} fps, {args.slots} ring slots per camera")
+    print(f"{'cameras':>7}{'CPU %':>10}{'CPU %/camera':>14}{'RSS MB':>10}{'MB/camera':>14}")
+    for count in args.cameras:
+        run(count, args)
+
+
+if __name__ == "__main__":
+    main()
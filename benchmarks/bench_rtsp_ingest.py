@@ -0,0 +1,158 @@
+"""Compare CPU usage and trigger latency of the RTSP ingest backends and decode modes.
+
+Point --url at a real camera to measure it; without --url a synthetic H.264 clip is
+generated with PyAV and played back at --fps, so only decode cost (not network
+behaviour) is compared. Trigger latency is the age of the frame handed out plus the
+time it took to get it, i.e. how far the uploaded image lags the trigger.
+
+    python benchmarks/bench_rtsp_ingest.py --url rtsp://192.168.1.20/stream1 --seconds 10
+    python benchmarks/bench_rtsp_ingest.py --width 1920 --height 1080 --gop 60
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frame_buffer import FrameRing  # noqa: E402
+from rtsp import AV_AVAILABLE, RtspOptions, open_rtsp_capture  # noqa: E402
+from bench_encoders import synthetic_frame  # noqa: E402
+
+if AV_AVAILABLE:
+    import av
+
+
+def write_clip(path, width, height, fps, gop, seconds):
+    container = av.open(path, 'w')
+    stream = container.add_stream('libx264', rate=int(fps))
+    stream.width, stream.height, stream.pix_fmt = width, height, 'yuv420p'
+    stream.options = {'g': str(gop), 'tune': 'zerolatency', 'preset': 'veryfast'}
+    base = synthetic_frame(width, height)
+    for i in range(int(fps * seconds)):
+        frame = av.VideoFrame.from_ndarray(np.roll(base, i * 4, axis=1), format='bgr24')
+        for packet in stream.encode(frame):
+            container.mux(packet)
+    for packet in stream.encode():
+        container.mux(packet)
+    container.close()
+
+
+def paced(packets, fps):
+    """Release file packets at the camera frame rate, like a live stream."""
+    next_time = time.monotonic()
+    for packet in packets:
+        next_time += 1.0 / fps
+        time.sleep(max(0.0, next_time - time.monotonic()))
+        yield packet
+
+
+def grab_loop(cap, ring, options, stop, pace_fps):
+    next_time = time.monotonic()
+    while not stop.is_set():
+        if options.decode == 'on-demand':
+            ok = cap.grab()
+        else:
+            index, slot = ring.writable_slot()
+            ok, frame = cap.read(image=slot)
+            if ok:
+                ring.commit(index, frame, getattr(cap, 'frame_time', None) or time.monotonic())
+        if not ok:
+            return
+        if pace_fps and options.backend != 'pyav':
+            next_time += 1.0 / pace_fps
+            time.sleep(max(0.0, next_time - time.monotonic()))
+
+
+def trigger_frame(cap, ring, options, lock):
+    """What FrameGrabber hands a trigger: (frame age + fetch time) in ms."""
+    start = time.monotonic()
+    if options.decode == 'on-demand':
+        with lock:
+            index, slot = ring.writable_slot()
+            ok, frame = cap.retrieve(image=slot)
+            if ok:
+                ring.commit(index, frame, cap.frame_time)
+    with ring.latest() as view:
+        if view is None:
+            return None
+        view.copy()
+        with ring.closest(time.monotonic() + 3600) as (_, stamp):
+            pass
+    return (time.monotonic() - min(stamp, start)) * 1000
+
+
+def run(url, options, args, pace_fps):
+    cap = open_rtsp_capture(url, options)
+    if not cap.isOpened():
+        print(f"{options.describe():<44} could not open {url}")
+        return
+    if pace_fps and options.backend == 'pyav':
+        cap._packets = paced(cap._packets, pace_fps)
+    ring = FrameRing(3)
+    stop = threading.Event()
+    thread = threading.Thread(target=grab_loop, args=(cap, ring, options, stop, pace_fps), daemon=True)
+    thread.start()
+    time.sleep(1.0)
+
+    lock = threading.Lock()
+    latencies = []
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    deadline = time.monotonic() + args.seconds
+    while time.monotonic() < deadline and thread.is_alive():
+        time.sleep(random.uniform(0.2, 0.6))
+        latency = trigger_frame(cap, ring, options, lock)
+        if latency is not None:
+            latencies.append(latency)
+    cpu = (time.process_time() - cpu_start) / (time.perf_counter() - wall_start) * 100
+    stop.set()
+    thread.join(timeout=2)
+    cap.release()
+    if not latencies:
+        print(f"{options.describe():<44}{cpu:>8.1f}   no frames")
+        return
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{options.describe():<44}{cpu:>8.1f}{statistics.median(latencies):>10.1f}{p95:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="RTSP URL (default: generated H.264 clip)")
+    parser.add_argument("--transport", default="tcp", choices=["tcp", "udp"])
+    parser.add_argument("--hw-decode", action="store_true")
+    parser.add_argument("--seconds", type=float, default=8)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--gop", type=int, default=30, help="Keyframe interval of the generated clip")
+    args = parser.parse_args()
+
+    url, pace_fps = args.url, None
+    if url is None:
+        if not AV_AVAILABLE:
+            sys.exit("Generating the test clip needs PyAV (pip install av), or pass --url")
+        url = "/tmp/bench_rtsp_ingest.mp4"
+        write_clip(url, args.width, args.height, args.fps, args.gop, args.seconds + 5)
+        pace_fps = args.fps
+        print(f"synthetic {args.width}x{args.height} @ {args.fps:g} fps, keyframe every {args.gop} frames")
+
+    configs = [RtspOptions('opencv', args.transport, low_latency=False, hw_decode=args.hw_decode),
+               RtspOptions('opencv', args.transport, hw_decode=args.hw_decode)]
+    if AV_AVAILABLE:
+        configs += [RtspOptions('pyav', args.transport, decode=mode, hw_decode=args.hw_decode)
+                    for mode in ('all', 'keyframes', 'on-demand')]
+    if args.url and 'GStreamer:                   YES' in __import__('cv2').getBuildInformation():
+        configs.append(RtspOptions('gstreamer', args.transport, hw_decode=args.hw_decode))
+
+    print(f"{'backend':<44}{'CPU %':>8}{'p50 ms':>10}{'p95 ms':>10}")
+    for options in configs:
+        run(url, options.validate(), args, pace_fps)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Compare JPEG snapshot latency of the per-trigger digest fetch and the pooled SnapshotClient.
+
+Starts local digest-protected snapshot cameras (HTTP/1.1 keep-alive, MD5 + qop=auth),
+then fires --triggers bursts at all --cameras at once:
+  - legacy: what fetch_jpeg_frame did before - a new HTTPDigestAuth per snapshot on the
+            shared pooled session, fetched by --workers upload workers
+  - pooled: one SnapshotClient per camera, every fetch started at trigger time
+Reports trigger-to-snapshot latency percentiles, HTTP requests per snapshot (a digest
+challenge costs a second one) and new connections. --rtt adds an emulated network round
+trip per request (and per new connection, for the TCP handshake), which is where the
+saved 401 round trip shows on a real network.
+
+    python benchmarks/bench_snapshot.py
+    python benchmarks/bench_snapshot.py --cameras 4 --rtt 5 --camera-latency 30
+"""
+import argparse
+import hashlib
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import requests
+from requests.utils import parse_dict_header
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from snapshot import SnapshotClient  # noqa: E402
+from transport import create_session  # noqa: E402
+from bench_encoders import synthetic_frame  # noqa: E402
+
+USERNAME, PASSWORD, REALM = 'bench', 'secret', 'camera'
+
+
+# --------------------- Digest Camera Stand-in ---------------------
+class DigestCamera:
+    """Snapshot endpoint that requires digest auth. Nonces expire after `nonce_lifetime`."""
+
+    def __init__(self, image, rtt=0.0, latency=0.0, nonce_lifetime=300.0):
+        self.requests = 0
+        self.challenges = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._nonces = {}
+        camera = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with camera._lock:
+                    camera.connections += 1
+                time.sleep(rtt)  # TCP handshake
+
+            def _authorized(self):
+                header = self.headers.get('Authorization', '')
+                if not header.startswith('Digest '):
+                    return False, False
+                fields = parse_dict_header(header[7:])
+                issued = camera._nonces.get(fields.get('nonce'))
+                if issued is None:
+                    return False, False
+                if time.monotonic() - issued > nonce_lifetime:
+                    return False, True
+                ha1 = hashlib.md5(f"{USERNAME}:{REALM}:{PASSWORD}".encode()).hexdigest()
+                ha2 = hashlib.md5(f"{self.command}:{fields.get('uri')}".encode()).hexdigest()
+                expected = hashlib.md5(f"{ha1}:{fields['nonce']}:{fields.get('nc')}:{fields.get('cnonce')}:"
+                                       f"auth:{ha2}".encode()).hexdigest()
+                return fields.get('response') == expected, False
+
+            def _respond(self, body):
+                with camera._lock:
+                    camera.requests += 1
+                time.sleep(rtt)
+                ok, stale = self._authorized()
+                if not ok:
+                    nonce = os.urandom(16).hex()
+                    with camera._lock:
+                        camera._nonces[nonce] = time.monotonic()
+                        camera.challenges += 1
+                    self.send_response(401)
+                    self.send_header('WWW-Authenticate', f'Digest realm="{REALM}", nonce="{nonce}", qop="auth", '
+                                                         f'algorithm=MD5, opaque="bench"'
+                                                         + (', stale=true' if stale else ''))
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                time.sleep(latency)
+                self.send_response(200)
+                self.send_header('Content-Type', 'image/jpeg')
+                self.send_header('Content-Length', str(len(image)))
+                self.end_headers()
+                if body:
+                    try:
+                        self.wfile.write(image)
+                    except (BrokenPipeError, ConnectionResetError):
+                        pass  # the client gave up at its deadline
+
+            def do_GET(self):
+                self._respond(True)
+
+            def do_HEAD(self):
+                self._respond(False)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/snapshot.jpg"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def reset(self):
+        with self._lock:
+            self.requests = self.challenges = self.connections = 0
+
+    def close(self):
+        self.server.shutdown()
+
+
+# --------------------- Fetchers ---------------------
+def legacy_fetcher(urls, workers):
+    session = create_session(pool_maxsize=max(4, workers + 2))
+    pool = ThreadPoolExecutor(max_workers=workers)
+
+    def fetch(url):
+        response = session.get(url, timeout=15, auth=requests.auth.HTTPDigestAuth(USERNAME, PASSWORD))
+        response.raise_for_status()
+        return response.content
+
+    def burst():
+        return [pool.submit(fetch, url) for url in urls]
+
+    return burst, lambda futures: [future.result() for future in futures], pool.shutdown
+
+
+def pooled_fetcher(urls, timeout):
+    clients = [SnapshotClient(url, USERNAME, PASSWORD, timeout=timeout) for url in urls]
+    for client in clients:
+        client.warm()
+
+    def burst():
+        return [client.submit() for client in clients]
+
+    def stop():
+        for client in clients:
+            client.stop()
+
+    return burst, lambda requests_: [request.result() for request in requests_], stop
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run(name, fetcher, cameras, args):
+    burst, wait, stop = fetcher
+    latencies, failures = [], 0
+    for _ in range(args.triggers):
+        trigger = time.perf_counter()
+        pending = burst()
+        try:
+            for data in wait(pending):
+                if not data:
+                    failures += 1
+        except Exception:
+            failures += 1
+        latencies.append((time.perf_counter() - trigger) * 1000)  # until the whole burst is in
+        time.sleep(args.interval)
+    stop()
+    latencies.sort()
+    snapshots = args.triggers * len(cameras)  # the warm-up request is spread over all of them
+    requests_sent = sum(camera.requests for camera in cameras)
+    connections = sum(camera.connections for camera in cameras)
+    print(f"{name:>8}{percentile(latencies, 0.5):>9.1f}{percentile(latencies, 0.95):>9.1f}"
+          f"{percentile(latencies, 0.99):>9.1f}{requests_sent / snapshots:>10.2f}{connections:>7}{failures:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cameras", type=int, default=2, help="JPEG cameras triggered together")
+    parser.add_argument("--triggers", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.02, help="Seconds between bursts")
+    parser.add_argument("--workers", type=int, default=2, help="Upload workers fetching for the legacy path")
+    parser.add_argument("--rtt", type=float, default=2, help="Emulated network round trip (ms)")
+    parser.add_argument("--camera-latency", type=float, default=20, help="Time the camera takes per snapshot (ms)")
+    parser.add_argument("--nonce-lifetime", type=float, default=300, help="Seconds before the camera's nonce is stale")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    args = parser.parse_args()
+
+    image = cv2.imencode('.jpg', synthetic_frame(args.width, args.height))[1].tobytes()
+    cameras = [DigestCamera(image, args.rtt / 1000, args.camera_latency / 1000, args.nonce_lifetime)
+               for _ in range(args.cameras)]
+    urls = [camera.url for camera in cameras]
+    print(f"{args.cameras} digest cameras, {len(image) / 1e3:.0f} kB snapshots, RTT {args.rtt:g}ms, "
+          f"camera latency {args.camera_latency:g}ms, {args.triggers} bursts (latency = whole burst)")
+    print(f"{'path':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/snap':>10}{'conns':>7}{'fails':>7}")
+    for name, make_fetcher in (('legacy', lambda: legacy_fetcher(urls, args.workers)),
+                               ('pooled', lambda: pooled_fetcher(urls, 5.0))):
+        for camera in cameras:
+            camera.reset()  # connections and challenges of the pooled warm-up count too
+        run(name, make_fetcher(), cameras, args)
+    for camera in cameras:
+        camera.close()
+
+
+if __name__ == "__main__":
+    main()
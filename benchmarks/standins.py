@@ -0,0 +1,322 @@
+"""Local stand-ins for the camera, the MQTT broker and the MVI edge, used by bench_load.py.
+
+  - SyntheticCamera / VideoFileCamera: cv2.VideoCapture look-alikes paced at a frame rate
+  - MiniBroker: just enough of MQTT 3.1.1 (QoS 0) on localhost for paho-mqtt to connect,
+    subscribe and receive the triggers published by the load generator
+  - MviStandIn: HTTPS server answering /users/sessions, /users/sessions/keepalive and
+    /devices/images, recording when every image arrived and its filename
+"""
+import json
+import os
+import re
+import socket
+import ssl
+import struct
+import subprocess
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+from paho.mqtt.client import topic_matches_sub
+
+from bench_encoders import synthetic_frame
+
+
+# --------------------- Frame Sources ---------------------
+class _PacedCapture:
+    """cv2.VideoCapture interface shared by the stand-in cameras: read() blocks until
+    the next frame is due, like a camera delivering `fps` frames per second."""
+
+    def __init__(self, width, height, fps):
+        self.width = width
+        self.height = height
+        self.period = 1.0 / fps
+        self.next_frame = time.monotonic()
+        self.frames = 0
+        self._opened = True
+
+    def _wait(self):
+        delay = self.next_frame - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        # Never bank more than one frame when the reader falls behind
+        self.next_frame = max(self.next_frame + self.period, time.monotonic() - self.period)
+
+    def _next(self):
+        raise NotImplementedError
+
+    def isOpened(self):
+        return self._opened
+
+    def grab(self):
+        self._wait()
+        self.frames += 1
+        return self._opened
+
+    def retrieve(self, image=None):
+        frame = self._next()
+        if image is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            frame = image
+        return True, frame
+
+    def read(self, image=None):
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+    def set(self, prop, value):
+        return True
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop == cv2.CAP_PROP_FPS:
+            return 1.0 / self.period
+        return 0.0
+
+    def release(self):
+        self._opened = False
+
+
+class SyntheticCamera(_PacedCapture):
+    """A moving synthetic scene. With `mjpeg` every frame is JPEG-decoded like a USB
+    camera in MJPEG mode, so the capture thread costs about what a real one does."""
+
+    def __init__(self, width=1920, height=1080, fps=30, mjpeg=True, variants=8):
+        super().__init__(width, height, fps)
+        base = synthetic_frame(width, height)
+        # Shifted copies so the frozen-frame check sees a live scene
+        self.variants = [np.roll(base, i * 24, axis=1) for i in range(variants)]
+        self.mjpeg = mjpeg
+        if mjpeg:
+            self.variants = [cv2.imencode('.jpg', v, [cv2.IMWRITE_JPEG_QUALITY, 90])[1] for v in self.variants]
+
+    def _next(self):
+        variant = self.variants[self.frames % len(self.variants)]
+        return cv2.imdecode(variant, cv2.IMREAD_COLOR) if self.mjpeg else variant
+
+
+class VideoFileCamera(_PacedCapture):
+    """Plays a video file at `fps` (default: the file's own rate), looping at the end."""
+
+    def __init__(self, path, fps=None):
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise IOError(f"Cannot open video file {path}")
+        width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        super().__init__(width, height, fps or self.cap.get(cv2.CAP_PROP_FPS) or 30)
+
+    def _next(self):
+        ret, frame = self.cap.read()
+        if not ret:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return frame
+
+    def release(self):
+        super().release()
+        self.cap.release()
+
+
+# --------------------- MQTT Broker ---------------------
+def _encode_length(length):
+    out = bytearray()
+    while True:
+        byte, length = length % 128, length // 128
+        out.append(byte | (0x80 if length else 0))
+        if not length:
+            return bytes(out)
+
+
+def _utf8(text):
+    data = text.encode()
+    return struct.pack('!H', len(data)) + data
+
+
+class MiniBroker:
+    """Single-process MQTT 3.1.1 broker for QoS 0 triggers.
+
+    Handles CONNECT, SUBSCRIBE, UNSUBSCRIBE, PUBLISH, PINGREQ and DISCONNECT, which is all
+    the uploader uses. `publish()` delivers a message to every matching subscriber and
+    returns how many received it.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.server = socket.create_server((host, port))
+        self.port = self.server.getsockname()[1]
+        self._lock = threading.Lock()
+        self._clients = {}  # socket -> set of subscribed topic filters
+        self.connected = threading.Event()
+        self.subscribed = threading.Event()
+        threading.Thread(target=self._accept, name="mini-broker", daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _read_packet(self, conn):
+        header = conn.recv(1)
+        if not header:
+            return None, None
+        length, shift = 0, 0
+        while True:
+            byte = conn.recv(1)[0]
+            length |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        body = b''
+        while len(body) < length:
+            chunk = conn.recv(length - len(body))
+            if not chunk:
+                return None, None
+            body += chunk
+        return header[0], body
+
+    def _serve(self, conn):
+        try:
+            while True:
+                kind, body = self._read_packet(conn)
+                if kind is None:
+                    break
+                packet_type = kind >> 4
+                if packet_type == 1:  # CONNECT
+                    with self._lock:
+                        self._clients[conn] = set()
+                    conn.sendall(b'\x20\x02\x00\x00')
+                    self.connected.set()
+                elif packet_type == 8:  # SUBSCRIBE
+                    packet_id, offset, granted = body[:2], 2, b''
+                    while offset < len(body):
+                        size = struct.unpack('!H', body[offset:offset + 2])[0]
+                        topic = body[offset + 2:offset + 2 + size].decode()
+                        offset += 3 + size
+                        with self._lock:
+                            self._clients[conn].add(topic)
+                        granted += b'\x00'
+                    conn.sendall(b'\x90' + _encode_length(2 + len(granted)) + packet_id + granted)
+                    self.subscribed.set()
+                elif packet_type == 10:  # UNSUBSCRIBE
+                    conn.sendall(b'\xb0\x02' + body[:2])
+                elif packet_type == 3:  # PUBLISH (QoS 0 from a client)
+                    size = struct.unpack('!H', body[:2])[0]
+                    self.publish(body[2:2 + size].decode(), body[2 + size:])
+                elif packet_type == 12:  # PINGREQ
+                    conn.sendall(b'\xd0\x00')
+                elif packet_type == 14:  # DISCONNECT
+                    break
+        except (OSError, IndexError):
+            pass
+        finally:
+            with self._lock:
+                self._clients.pop(conn, None)
+            conn.close()
+
+    def publish(self, topic, payload, retain=False):
+        if isinstance(payload, str):
+            payload = payload.encode()
+        body = _utf8(topic) + payload
+        packet = bytes([0x30 | (0x01 if retain else 0)]) + _encode_length(len(body)) + body
+        with self._lock:
+            targets = [conn for conn, topics in self._clients.items()
+                       if any(topic_matches_sub(sub, topic) for sub in topics)]
+        for conn in targets:
+            try:
+                conn.sendall(packet)
+            except OSError:
+                pass
+        return len(targets)
+
+    def close(self):
+        self.server.close()
+
+
+# --------------------- MVI Edge ---------------------
+_FILENAME = re.compile(rb'filename="([^"]+)"')
+
+
+def self_signed_cert(directory):
+    """(certfile, keyfile) for localhost, generated with the openssl CLI."""
+    cert, key = os.path.join(directory, 'cert.pem'), os.path.join(directory, 'key.pem')
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+                    '-subj', '/CN=localhost', '-keyout', key, '-out', cert],
+                   check=True, capture_output=True)
+    return cert, key
+
+
+class MviStandIn:
+    """HTTPS stand-in for the MVI edge API. `uploads` holds (arrival wall time, uuid,
+    filename, bytes) per image, including each part of a multi-file request; `latency`
+    adds a fixed server-side delay per upload request."""
+
+    def __init__(self, certfile, keyfile, host='127.0.0.1', port=0, latency=0.0):
+        self.uploads = []
+        self.sessions = 0
+        self.keep_alives = 0
+        self.latency = latency
+        self._lock = threading.Lock()
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _send(self, code, body=b'{}'):
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                data = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if self.path.endswith('/users/sessions'):
+                    with standin._lock:
+                        standin.sessions += 1
+                    return self._send(200, json.dumps({'token': f"bench-{time.time():.0f}"}).encode())
+                if '/devices/images' in self.path:
+                    if standin.latency:
+                        time.sleep(standin.latency)
+                    # One entry per file part, so multi-file requests count every frame
+                    names = [name.decode() for name in _FILENAME.findall(data)] or ['']
+                    uuid = self.path.rpartition('uuid=')[2]
+                    arrival = time.time()
+                    with standin._lock:
+                        standin.uploads.extend((arrival, uuid, name, len(data) // len(names)) for name in names)
+                    return self._send(200)
+                self._send(404)
+
+            def do_GET(self):
+                if self.path.endswith('/keepalive'):
+                    with standin._lock:
+                        standin.keep_alives += 1
+                    return self._send(200)
+                self._send(404)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile, keyfile)
+        self.server.socket = context.wrap_socket(self.server.socket, server_side=True)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, name="mvi-standin", daemon=True).start()
+
+    def upload_count(self):
+        with self._lock:
+            return len(self.uploads)
+
+    def close(self):
+        self.server.shutdown()
@@ -0,0 +1,67 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+IDLE_MODES = ('full', 'grab', 'throttle')
+
+
+# --------------------- Capture Scheduler ---------------------
+class CaptureScheduler:
+    """Decides how hard a grabber thread works between triggers.
+
+    The grabber runs at full camera rate while armed: for `armed_seconds` after
+    start-up, after each trigger and after a pre-arm message. Once that window
+    lapses it idles according to `idle_mode`:
+      - full:     never idle (decode every frame, the original behaviour)
+      - grab:     keep dequeuing frames with cap.grab() but skip decoding them, so the
+                  camera queue never goes stale and the next decoded frame is current
+      - throttle: decode one frame every 1/`idle_fps` seconds to keep the ring warm
+    `arm()` wakes an idle grabber immediately. `armed` only reads the state; the
+    grabber loop calls `poll()`, which also logs and counts idle/armed transitions.
+    """
+
+    def __init__(self, idle_mode='full', armed_seconds=30.0, idle_fps=1.0, name="camera"):
+        if idle_mode not in IDLE_MODES:
+            raise ValueError(f"idle mode must be one of {', '.join(IDLE_MODES)}, got '{idle_mode}'")
+        self.idle_mode = idle_mode
+        self.armed_seconds = armed_seconds
+        self.idle_interval = 1.0 / idle_fps if idle_fps > 0 else 1.0
+        self.name = name
+        self._armed_until = time.monotonic() + armed_seconds
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._was_armed = True
+        self.wakeups = 0  # idle -> armed transitions
+
+    @property
+    def armed(self):
+        return self.idle_mode == 'full' or time.monotonic() < self._armed_until
+
+    def poll(self):
+        """Whether the grabber should run at full rate now; logs and counts state changes."""
+        with self._lock:
+            armed = self.armed
+            changed = armed != self._was_armed
+            if changed:
+                self._was_armed = armed
+                if armed:
+                    self.wakeups += 1
+        if changed:
+            logger.info(f"[{self.name}] Capture {'armed - full frame rate' if armed else f'idle ({self.idle_mode})'}")
+        return armed
+
+    def arm(self, seconds=None):
+        """Run at full rate for `seconds` (default `armed_seconds`). Returns whether it already was."""
+        until = time.monotonic() + (self.armed_seconds if seconds is None else seconds)
+        with self._lock:
+            was_armed = self.armed
+            self._armed_until = max(self._armed_until, until)
+        self._wake.set()
+        return was_armed
+
+    def idle_wait(self):
+        """Sleep for one idle interval (1/`idle_fps`) between throttled frames; `arm()` ends it early."""
+        self._wake.wait(self.idle_interval)
+        self._wake.clear()
@@ -0,0 +1,131 @@
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from encoders import EncodedImage, PngEncoder
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+ADLER_BASE = 65521
+MIN_TILE_ROWS = 64  # below this a tile costs more in overhead than it saves
+
+
+# --------------------- Parallel PNG ---------------------
+def adler32_combine(adler1, adler2, length2):
+    """Adler-32 of A+B from the checksums of A and B (zlib's adler32_combine)."""
+    rem = length2 % ADLER_BASE
+    sum1 = adler1 & 0xFFFF
+    sum2 = (rem * sum1 + (adler1 >> 16) + (adler2 >> 16) + ADLER_BASE - rem) % ADLER_BASE
+    sum1 = (sum1 + (adler2 & 0xFFFF) + ADLER_BASE - 1) % ADLER_BASE
+    return sum1 | (sum2 << 16)
+
+
+def png_chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+
+def deflate_rows(rows, level, strategy, last):
+    """Filter and deflate a band of image rows for a PNG IDAT stream.
+
+    Uses PNG filter 1 (Sub) on every row, like OpenCV's default PNG settings, so no row
+    depends on the band above and bands can be compressed independently. Returns the raw
+    deflate data (byte-aligned so bands can be concatenated), its Adler-32 and the length
+    of the filtered data.
+    """
+    height = rows.shape[0]
+    channels = 1 if rows.ndim == 2 else rows.shape[2]
+    pixels = rows.reshape(height, -1) if channels == 1 else rows[..., ::-1].reshape(height, -1)  # BGR -> RGB
+    filtered = np.empty((height, pixels.shape[1] + 1), dtype=np.uint8)
+    filtered[:, 0] = 1
+    filtered[:, 1:channels + 1] = pixels[:, :channels]
+    np.subtract(pixels[:, channels:], pixels[:, :-channels], out=filtered[:, channels + 1:])
+    data = filtered.data
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15, 8, strategy)
+    compressed = compressor.compress(data) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+    return compressed, zlib.adler32(data), filtered.nbytes
+
+
+class TiledPngEncoder:
+    """PNG encoder that compresses horizontal bands of the frame in parallel.
+
+    The bands are deflated independently (zlib releases the GIL, so threads run on
+    separate cores) and joined into one ordinary PNG, the way pigz builds a single gzip
+    stream. Files are a little larger than a single-threaded encode because matches
+    cannot reach across band boundaries.
+    """
+    extension = PngEncoder.extension
+    content_type = PngEncoder.content_type
+
+    def __init__(self, executor, tiles, compression=None):
+        self.executor = executor
+        self.tiles = tiles
+        # OpenCV's defaults when no level is given: fastest level, run-length strategy
+        self.level = 1 if compression is None else int(compression)
+        self.strategy = zlib.Z_RLE if compression is None else zlib.Z_DEFAULT_STRATEGY
+        self.fallback = PngEncoder(compression)
+
+    def encode(self, frame):
+        channels = 1 if frame.ndim == 2 else frame.shape[2]
+        height, width = frame.shape[:2]
+        tiles = min(self.tiles, height // MIN_TILE_ROWS)
+        if frame.dtype != np.uint8 or channels not in (1, 3) or tiles < 2:
+            return self.fallback.encode(frame)
+        bounds = np.linspace(0, height, tiles + 1).astype(int)
+        futures = [self.executor.submit(deflate_rows, frame[start:stop], self.level, self.strategy, i == tiles - 1)
+                   for i, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:]))]
+        bands = [future.result() for future in futures]
+
+        checksum = bands[0][1]
+        for _, adler, length in bands[1:]:
+            checksum = adler32_combine(checksum, adler, length)
+        stream = b''.join([b'\x78\x01'] + [compressed for compressed, _, _ in bands] + [struct.pack('>I', checksum)])
+        header = struct.pack('>IIBBBBB', width, height, 8, 0 if channels == 1 else 2, 0, 0, 0)
+        data = b''.join([PNG_SIGNATURE, png_chunk(b'IHDR', header), png_chunk(b'IDAT', stream),
+                         png_chunk(b'IEND', b'')])
+        return EncodedImage(data, self.extension, self.content_type)
+
+
+# --------------------- Encode Executor ---------------------
+class EncodeExecutor:
+    """Runs frame encodes on a pool of `workers` threads.
+
+    cv2.imencode and zlib release the GIL, so threads scale across cores and workers
+    read the frame in place - nothing is copied or pickled on the way. With `tiles` > 1
+    (default: one per worker) PNG frames are split into that many bands compressed in
+    parallel; other formats have no independently decodable tiles and are encoded whole
+    on the pool.
+    Waits for the result, so callers (the upload workers) keep their own ordering.
+    """
+
+    def __init__(self, encoder, workers=None, tiles=None):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.tiles = max(1, tiles or self.workers)
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="encode")
+        self.encoder = encoder
+        if self.tiles > 1 and isinstance(encoder, PngEncoder):
+            compression = encoder.params[1] if encoder.params else None
+            self.encoder = TiledPngEncoder(self.pool, self.tiles, compression)
+
+    @property
+    def extension(self):
+        return self.encoder.extension
+
+    @property
+    def content_type(self):
+        return self.encoder.content_type
+
+    def describe(self):
+        tiled = f", {self.tiles} tiles per frame" if isinstance(self.encoder, TiledPngEncoder) else ""
+        return f"{self.workers} encode threads{tiled}"
+
+    def encode(self, frame):
+        if not isinstance(frame, np.ndarray):
+            return self.encoder.encode(frame)  # pass-through bytes, nothing to encode
+        if isinstance(self.encoder, TiledPngEncoder):
+            return self.encoder.encode(frame)  # bands already run on the pool
+        return self.pool.submit(self.encoder.encode, frame).result()
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False)
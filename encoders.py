@@ -0,0 +1,107 @@
+import logging
+from dataclasses import dataclass
+from typing import Any
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------- Encoded Image ---------------------
+@dataclass
+class EncodedImage:
+    data: Any  # bytes or a 1-D uint8 buffer from cv2.imencode
+    extension: str
+    content_type: str
+
+    @property
+    def size(self):
+        return len(self.data)
+
+
+# --------------------- Encoders ---------------------
+class PngEncoder:
+    """Lossless PNG. Compression 0-9 trades CPU for size.
+
+    Leave compression as None to use OpenCV's default settings, which are tuned for speed
+    and usually beat an explicit level on encode time.
+    """
+    extension = 'png'
+    content_type = 'image/png'
+
+    def __init__(self, compression=None):
+        self.params = [] if compression is None else [cv2.IMWRITE_PNG_COMPRESSION, int(compression)]
+
+    def encode(self, frame):
+        success, buffer = cv2.imencode('.png', frame, self.params)
+        if not success:
+            raise ValueError("PNG encoding failed")
+        return EncodedImage(buffer, self.extension, self.content_type)
+
+
+class JpegEncoder:
+    extension = 'jpg'
+    content_type = 'image/jpeg'
+
+    def __init__(self, quality=95):
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+
+    def encode(self, frame):
+        success, buffer = cv2.imencode('.jpg', frame, self.params)
+        if not success:
+            raise ValueError("JPEG encoding failed")
+        return EncodedImage(buffer, self.extension, self.content_type)
+
+
+class WebpEncoder:
+    """WebP; quality above 100 selects lossless mode."""
+    extension = 'webp'
+    content_type = 'image/webp'
+
+    def __init__(self, quality=90):
+        self.params = [cv2.IMWRITE_WEBP_QUALITY, int(quality)]
+
+    def encode(self, frame):
+        success, buffer = cv2.imencode('.webp', frame, self.params)
+        if not success:
+            raise ValueError("WebP encoding failed")
+        return EncodedImage(buffer, self.extension, self.content_type)
+
+
+class PassthroughEncoder:
+    """Forward already-encoded JPEG bytes (e.g. a camera snapshot) without decode/re-encode.
+
+    Decoded frames from streaming cameras have no original bytes, so they fall back to JPEG.
+    """
+    extension = 'jpg'
+    content_type = 'image/jpeg'
+
+    def __init__(self, quality=95):
+        self.fallback = JpegEncoder(quality)
+
+    def encode(self, frame):
+        if isinstance(frame, (bytes, bytearray, memoryview)):
+            return EncodedImage(frame, self.extension, self.content_type)
+        return self.fallback.encode(frame)
+
+
+IMAGE_FORMATS = ('png', 'jpeg', 'webp', 'passthrough')
+
+
+def create_encoder(image_format='png', png_compression=None, jpeg_quality=95, webp_quality=90):
+    image_format = image_format.lower()
+    if image_format == 'png':
+        return PngEncoder(png_compression)
+    if image_format in ('jpeg', 'jpg'):
+        return JpegEncoder(jpeg_quality)
+    if image_format == 'webp':
+        return WebpEncoder(webp_quality)
+    if image_format == 'passthrough':
+        return PassthroughEncoder(jpeg_quality)
+    raise ValueError(f"Invalid image format '{image_format}' (must be one of {', '.join(IMAGE_FORMATS)})")
+
+
+def decode_jpeg(data):
+    """Decode JPEG bytes into a BGR frame, or None if they are not a valid image."""
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
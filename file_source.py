@@ -0,0 +1,243 @@
+import logging
+import mmap
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+from rtsp import video_capture
+
+logger = logging.getLogger(__name__)
+
+FILE_PACINGS = ('realtime', 'fast')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp')
+DIRECTORY_FPS = 10.0  # real-time rate of an image directory unless file-fps says otherwise
+
+
+# --------------------- Options ---------------------
+@dataclass
+class FileOptions:
+    """How a FILE camera replays a video file or a directory of images.
+
+      pacing:      realtime (frames arrive at `fps`, like a live camera) or fast (as quickly
+                   as they can be decoded, for throughput tests and bulk reprocessing)
+      fps:         real-time rate; 0 uses the video's own rate (DIRECTORY_FPS for images)
+      loop:        start over at the end; otherwise the last frame stays buffered
+      prefetch:    frames decoded ahead on a background thread (0 decodes on read)
+      every_frame: upload every replayed frame as if it had been triggered
+    """
+    pacing: str = 'realtime'
+    fps: float = 0.0
+    loop: bool = True
+    prefetch: int = 4
+    every_frame: bool = False
+
+    def validate(self):
+        if self.pacing not in FILE_PACINGS:
+            raise ValueError(f"file-pacing must be one of {', '.join(FILE_PACINGS)}, got '{self.pacing}'")
+        if self.fps < 0:
+            raise ValueError(f"file-fps must be 0 (native rate) or positive, got {self.fps}")
+        if self.prefetch < 0:
+            raise ValueError(f"file-prefetch must be 0 or more frames, got {self.prefetch}")
+        return self
+
+    def describe(self):
+        parts = [self.pacing if self.pacing == 'fast' else f"realtime at {self.fps:g} fps" if self.fps else "realtime"]
+        parts.append("looping" if self.loop else "once")
+        parts.append(f"prefetch {self.prefetch}" if self.prefetch else "no prefetch")
+        if self.every_frame:
+            parts.append("every frame uploaded")
+        return ", ".join(parts)
+
+
+# --------------------- Frame Readers ---------------------
+def read_image(path):
+    """Decode an image file straight from a read-only memory map (None if unreadable)."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            data = np.frombuffer(mapped, dtype=np.uint8)
+            try:
+                return cv2.imdecode(data, cv2.IMREAD_COLOR)
+            finally:
+                del data  # the map cannot close while a view of it exists
+
+
+def list_images(directory):
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.lower().endswith(IMAGE_EXTENSIONS))
+
+
+class FileCapture:
+    """cv2.VideoCapture look-alike that replays a video file or an image directory.
+
+    Image directories are read in file name order, each file decoded from a memory map.
+    With `prefetch` a background thread decodes that many frames ahead, so slow storage
+    or a slow codec is hidden behind the consumer; prefetched frames are handed over as
+    decoded (the frame ring adopts them) instead of being copied into the caller's buffer.
+    Real-time pacing releases frames no faster than `fps`, never banking more than one
+    frame when the reader falls behind. Once the source ends without `loop`, reads fail
+    and `finished` is set.
+    """
+
+    def __init__(self, path, options):
+        self.path = path
+        self.options = options
+        self.video = None
+        self.files = None
+        if os.path.isdir(path):
+            self.files = list_images(path)
+            if not self.files:
+                raise IOError(f"No images ({', '.join(IMAGE_EXTENSIONS)}) in directory {path}")
+            native_fps = DIRECTORY_FPS
+        elif os.path.isfile(path):
+            self.video = video_capture(path)
+            if not self.video.isOpened():
+                raise IOError(f"Cannot open video file {path}")
+            native_fps = self.video.get(cv2.CAP_PROP_FPS) or 30.0
+        else:
+            raise IOError(f"No such video file or image directory: {path}")
+        self.fps = options.fps or native_fps
+        self.period = 1.0 / self.fps if options.pacing == 'realtime' else 0.0
+        self.position = 0  # next image index (directories)
+        self.frames = 0  # frames handed out
+        self._decoded = 0
+        self.loops = 0
+        self.finished = False
+        self._opened = True
+        self._next_due = time.monotonic()
+        self._pending = None
+        self._queue = None
+        if options.prefetch:
+            self._queue = queue.Queue(maxsize=options.prefetch)
+            self._thread = threading.Thread(target=self._prefetch, name=f"prefetch-{os.path.basename(path)}",
+                                            daemon=True)
+            self._thread.start()
+
+    def describe(self):
+        source = f"{len(self.files)} images in {self.path}" if self.files else f"video {self.path}"
+        return f"{source} ({self.options.describe()})"
+
+    def _read_source(self, out=None):
+        if self.video is not None:
+            ret, frame = self.video.read(image=out) if out is not None else self.video.read()
+            return frame if ret else None
+        while self.position < len(self.files):
+            path = self.files[self.position]
+            self.position += 1
+            try:
+                frame = read_image(path)
+            except (OSError, ValueError) as e:
+                frame = None
+                logger.warning(f"Cannot read {path}: {e}")
+            if frame is not None:
+                return frame
+            logger.warning(f"Skipping unreadable image {path}")
+        return None
+
+    def _rewind(self):
+        if self.video is not None:
+            self.video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self.position = 0
+        self.loops += 1
+
+    def _decode_next(self, out=None):
+        """The next frame, starting over at the end when looping. None once the source is exhausted."""
+        frame = self._read_source(out)
+        if frame is None and self.options.loop and self._decoded:
+            self._rewind()
+            frame = self._read_source(out)
+        if frame is not None:
+            self._decoded += 1
+        return frame
+
+    def _prefetch(self):
+        try:
+            while self._opened:
+                frame = self._decode_next()
+                while self._opened:
+                    try:
+                        self._queue.put(frame, timeout=0.5)
+                        break
+                    except queue.Full:
+                        continue
+                if frame is None:
+                    return
+        finally:
+            if not self._opened and self.video is not None:
+                self.video.release()
+
+    def _pace(self):
+        if not self.period:
+            return
+        delay = self._next_due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next_due = max(self._next_due + self.period, time.monotonic() - self.period)
+
+    def isOpened(self):
+        return self._opened
+
+    def _advance(self, out=None):
+        """Make the next frame (decoded into `out` when possible) pending. False at the end."""
+        if self.finished or not self._opened:
+            return False
+        if self._queue is not None:
+            while True:
+                try:
+                    frame = self._queue.get(timeout=0.5)
+                    break
+                except queue.Empty:
+                    if not self._opened:
+                        return False
+        else:
+            frame = self._decode_next(out)
+        if frame is None:
+            self.finished = True
+            logger.info(f"Replay of {self.path} finished after {self.frames} frames")
+            return False
+        self._pace()
+        self._pending = frame
+        self.frames += 1
+        return True
+
+    def grab(self):
+        return self._advance()
+
+    def retrieve(self, image=None):
+        frame, self._pending = self._pending, None
+        return frame is not None, frame
+
+    def read(self, image=None):
+        if not self._advance(image):
+            return False, None
+        return self.retrieve()
+
+    def set(self, prop, value):
+        return False
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.frames)
+        if self.video is not None:
+            return self.video.get(prop)
+        return 0.0
+
+    def release(self):
+        self._opened = False
+        if self._queue is not None:
+            # Unblock the prefetch thread so it notices the release
+            try:
+                while True:
+                    self._queue.get_nowait()
+            except queue.Empty:
+                pass
+        if self.video is not None and (self._queue is None or not self._thread.is_alive()):
+            self.video.release()
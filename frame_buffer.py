@@ -0,0 +1,142 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------- Frame Ring Buffer ---------------------
+class FrameRing:
+    """Preallocated N-slot ring of frame arrays shared by one writer and many readers.
+
+    The capture thread asks for a slot with `writable_slot()`, has the camera decode
+    straight into it (cv2 `cap.read(image=...)`), then publishes it with `commit()`.
+    Nothing is copied per frame; readers borrow a read-only view of a slot (`latest()`,
+    `closest()`) and copy it only when a trigger actually needs the frame. Borrowed slots
+    are pinned so the writer never overwrites them.
+
+    Every slot also carries the time.monotonic() capture timestamp of its frame, so the
+    ring doubles as a short, fixed-memory frame history: `closest(t)` returns the frame
+    captured nearest to an event time, including frames from just before the trigger.
+    """
+
+    def __init__(self, slots=3):
+        if slots < 2:
+            raise ValueError("FrameRing needs at least 2 slots")
+        self._buffers = [None] * slots
+        self._pins = [0] * slots
+        self._stamps = [None] * slots
+        self._lock = threading.Lock()
+        self._new_frame = threading.Condition(self._lock)
+        self._latest = -1
+        self._next = 0
+        self.sequence = 0
+
+    @property
+    def slots(self):
+        return len(self._buffers)
+
+    def writable_slot(self, shape=None, dtype=np.uint8):
+        """Return (index, buffer) for the writer. The buffer may be None before the
+        first frame, in which case the camera allocates it and `commit()` adopts it."""
+        with self._lock:
+            for _ in range(len(self._buffers)):
+                index = self._next
+                self._next = (self._next + 1) % len(self._buffers)
+                if index != self._latest and self._pins[index] == 0:
+                    break
+            else:
+                # Every other slot is pinned by a slow reader - fall back to a fresh buffer
+                return None, None
+            # Drop the old timestamp so history lookups skip the slot while it is being overwritten
+            self._stamps[index] = None
+            buffer = self._buffers[index]
+        if buffer is None and shape is not None:
+            buffer = np.empty(shape, dtype=dtype)
+            self._buffers[index] = buffer
+        return index, buffer
+
+    def commit(self, index, frame, timestamp=None):
+        """Publish `frame` (normally the slot buffer itself) as the latest frame.
+
+        `timestamp` is the monotonic capture time; defaults to now.
+        """
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        with self._lock:
+            if index is None:
+                index = self._steal_unpinned_slot()
+                if index is None:
+                    return
+            # cap.read() reallocates when the resolution changes - adopt its array in place of ours
+            self._buffers[index] = frame
+            self._stamps[index] = timestamp
+            self._latest = index
+            self.sequence += 1
+            self._new_frame.notify_all()
+
+    def _steal_unpinned_slot(self):
+        for index in range(len(self._buffers)):
+            if index != self._latest and self._pins[index] == 0:
+                return index
+        return None
+
+    def _pin(self, index):
+        # Caller holds the lock
+        if index < 0:
+            return None, None
+        self._pins[index] += 1
+        frame = self._buffers[index].view()
+        frame.flags.writeable = False
+        return frame, self._stamps[index]
+
+    def _unpin(self, index):
+        with self._lock:
+            self._pins[index] -= 1
+
+    @contextmanager
+    def latest(self):
+        """Borrow a read-only view of the newest frame (None if nothing captured yet)."""
+        with self._lock:
+            index = self._latest
+            frame, _ = self._pin(index)
+        try:
+            yield frame
+        finally:
+            if frame is not None:
+                self._unpin(index)
+
+    @contextmanager
+    def closest(self, target_time):
+        """Borrow (view, timestamp) of the frame captured closest to `target_time`.
+
+        Yields (None, None) if nothing has been captured yet.
+        """
+        with self._lock:
+            index = -1
+            best = None
+            for i, stamp in enumerate(self._stamps):
+                if stamp is None:
+                    continue
+                distance = abs(stamp - target_time)
+                if best is None or distance < best:
+                    index, best = i, distance
+            frame, stamp = self._pin(index)
+        try:
+            yield frame, stamp
+        finally:
+            if frame is not None:
+                self._unpin(index)
+
+    def wait_for_frame_after(self, target_time, timeout):
+        """Block until a frame captured at or after `target_time` exists. Returns True if one does."""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while self._latest < 0 or self._stamps[self._latest] < target_time:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._new_frame.wait(remaining)
+            return True
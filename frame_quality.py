@@ -0,0 +1,122 @@
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+QUALITY_ISSUES = ('black', 'frozen', 'blurry', 'underexposed', 'overexposed')
+
+
+def sample_view(frame, max_width=240):
+    """Strided view of `frame` about `max_width` pixels wide. No pixels are copied."""
+    stride = max(1, frame.shape[1] // max_width)
+    return frame[::stride, ::stride]
+
+
+def is_black(frame, threshold=5.0, max_width=240):
+    """Cheap black-frame test: mean brightness of a strided sample below `threshold`."""
+    return float(sample_view(frame, max_width).mean()) < threshold
+
+
+# --------------------- Quality Report ---------------------
+@dataclass
+class QualityReport:
+    mean: float
+    sharpness: Optional[float] = None  # Laplacian variance of the thumbnail
+    dark_fraction: float = 0.0  # share of thumbnail pixels at or below the dark level
+    bright_fraction: float = 0.0  # share of thumbnail pixels at or above the clip level
+    change: Optional[float] = None  # mean absolute difference to the previous checked frame
+    issues: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self):
+        return not self.issues
+
+    def describe(self):
+        parts = [f"mean={self.mean:.1f}", f"dark={self.dark_fraction:.0%}", f"bright={self.bright_fraction:.0%}"]
+        if self.sharpness is not None:
+            parts.append(f"sharpness={self.sharpness:.0f}")
+        if self.change is not None:
+            parts.append(f"change={self.change:.2f}")
+        return ", ".join(parts)
+
+
+# --------------------- Quality Checker ---------------------
+class FrameQualityChecker:
+    """Black, frozen, blur and exposure checks computed on a small grayscale thumbnail.
+
+    The thumbnail is a strided sample of the frame (every Nth pixel of every Nth row),
+    so a check touches a few tens of thousands of pixels regardless of resolution.
+    Frozen detection compares against the previous frame checked by the same instance,
+    so keep one checker per camera. Pass the capture `timestamp` where it is known: a
+    frame with the same timestamp as the previous check (two triggers selecting the same
+    buffered frame) is the same capture, not a frozen camera, and is not compared.
+    `frozen=False` skips the comparison for sources that cannot freeze (file replay).
+
+    `blur_threshold` of 0 disables the blur check - sharpness depends on the scene, so
+    pick a value from the `sharpness` logged for known-good frames.
+    """
+
+    def __init__(self, black_threshold=5.0, blur_threshold=0.0, dark_level=10, dark_fraction=0.6,
+                 bright_level=250, bright_fraction=0.25, frozen_threshold=0.0, max_width=240):
+        self.black_threshold = black_threshold
+        self.blur_threshold = blur_threshold
+        self.dark_level = dark_level
+        self.dark_fraction = dark_fraction
+        self.bright_level = bright_level
+        self.bright_fraction = bright_fraction
+        self.frozen_threshold = frozen_threshold
+        self.max_width = max_width
+        self._previous = None
+        self._previous_stamp = None
+        self._lock = threading.Lock()
+
+    def thumbnail(self, frame):
+        view = sample_view(frame, self.max_width)
+        if view.ndim == 3 and view.shape[2] == 3:
+            return cv2.cvtColor(np.ascontiguousarray(view), cv2.COLOR_BGR2GRAY)
+        if view.ndim == 3:
+            view = view[..., 0]
+        return np.ascontiguousarray(view)
+
+    def check(self, frame, timestamp=None, frozen=True):
+        """Return a QualityReport for `frame` (a BGR or grayscale uint8 array)."""
+        thumb = self.thumbnail(frame)
+        pixels = thumb.size
+        report = QualityReport(mean=float(thumb.mean()))
+        report.dark_fraction = np.count_nonzero(thumb <= self.dark_level) / pixels
+        report.bright_fraction = np.count_nonzero(thumb >= self.bright_level) / pixels
+
+        if frozen:
+            with self._lock:
+                previous, previous_stamp = self._previous, self._previous_stamp
+                recheck = timestamp is not None and timestamp == previous_stamp
+                if not recheck:
+                    self._previous, self._previous_stamp = thumb, timestamp
+            if previous is not None and not recheck and previous.shape == thumb.shape:
+                report.change = float(cv2.absdiff(thumb, previous).mean())
+
+        if report.mean < self.black_threshold:
+            report.issues.append('black')
+            return report  # nothing else is meaningful on a black frame
+        if report.change is not None and report.change <= self.frozen_threshold:
+            report.issues.append('frozen')
+        if self.blur_threshold > 0:
+            report.sharpness = float(cv2.Laplacian(thumb, cv2.CV_64F).var())
+            if report.sharpness < self.blur_threshold:
+                report.issues.append('blurry')
+        if report.dark_fraction >= self.dark_fraction:
+            report.issues.append('underexposed')
+        if report.bright_fraction >= self.bright_fraction:
+            report.issues.append('overexposed')
+        return report
+
+    def reset(self):
+        """Forget the previous frame, e.g. after the camera was reopened."""
+        with self._lock:
+            self._previous = None
+            self._previous_stamp = None
@@ -0,0 +1,178 @@
+import logging
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from frame_quality import sample_view
+
+logger = logging.getLogger(__name__)
+
+MOTION_METHODS = ('diff', 'mog2')
+DEFAULT_THRESHOLDS = {'diff': 25.0, 'mog2': 16.0}
+
+
+# --------------------- Motion Detector ---------------------
+class MotionDetector:
+    """Decides whether a frame shows something moving in a region of interest.
+
+    Works on a small grayscale thumbnail of the ROI (a strided sample about `max_width`
+    pixels wide, blurred to suppress sensor noise), so a check costs the same at any
+    camera resolution:
+      - diff: absolute difference to a running-average background; a pixel has changed
+              when it differs by more than `threshold` grey levels
+      - mog2: OpenCV's MOG2 background subtractor with `threshold` as its variance
+              threshold; copes better with flicker and slow lighting changes but costs
+              several times more per frame
+    The background adapts at `background_rate` per frame, so a part that stops in view
+    is absorbed after a few dozen frames. `check()` fires when at least `min_area` of the
+    ROI has changed and `cooldown` seconds have passed since it last fired. The first
+    frames after start (or a resolution change) only build the background.
+    """
+
+    def __init__(self, method='diff', roi=None, threshold=None, min_area=0.01, cooldown=2.0,
+                 background_rate=0.05, max_width=160):
+        if method not in MOTION_METHODS:
+            raise ValueError(f"motion method must be one of {', '.join(MOTION_METHODS)}, got '{method}'")
+        if roi is not None:
+            roi = tuple(int(v) for v in roi)
+            if len(roi) != 4 or roi[0] < 0 or roi[1] < 0 or roi[2] <= 0 or roi[3] <= 0:
+                raise ValueError(f"motion ROI must be [x, y, width, height], got {list(roi)}")
+        if not 0 < min_area <= 1:
+            raise ValueError(f"motion min area must be a fraction in (0, 1], got {min_area}")
+        if not 0 < background_rate <= 1:
+            raise ValueError(f"motion background rate must be in (0, 1], got {background_rate}")
+        self.method = method
+        self.roi = roi
+        self.threshold = float(DEFAULT_THRESHOLDS[method] if threshold is None else threshold)
+        self.min_area = min_area
+        self.cooldown = cooldown
+        self.background_rate = background_rate
+        self.max_width = max_width
+        self.warmup = int(2 / background_rate)  # frames until the background has settled
+        self.last_score = 0.0
+        self.triggers = 0
+        self._last_trigger = None
+        self.reset()
+
+    def describe(self):
+        roi = "full frame" if self.roi is None else "ROI {}x{}+{}+{}".format(self.roi[2], self.roi[3], *self.roi[:2])
+        return (f"{self.method}, {roi}, threshold {self.threshold:g}, min area {self.min_area:.1%}, "
+                f"cooldown {self.cooldown:g}s")
+
+    def reset(self):
+        """Rebuild the background from the next frames, e.g. after the camera was reopened."""
+        self._background = None
+        self._subtractor = None
+        self._frames = 0
+
+    def thumbnail(self, frame):
+        if self.roi is not None:
+            x, y, width, height = self.roi
+            region = frame[y:y + height, x:x + width]
+            if region.size == 0:
+                raise ValueError(f"motion ROI {list(self.roi)} lies outside the "
+                                 f"{frame.shape[1]}x{frame.shape[0]} frame")
+            frame = region
+        view = sample_view(frame, self.max_width)
+        if view.ndim == 3 and view.shape[2] == 3:
+            thumb = cv2.cvtColor(np.ascontiguousarray(view), cv2.COLOR_BGR2GRAY)
+        else:
+            thumb = np.ascontiguousarray(view[..., 0] if view.ndim == 3 else view)
+        return cv2.GaussianBlur(thumb, (5, 5), 0)
+
+    def score(self, frame):
+        """Fraction of the ROI that differs from the background, then learn the frame."""
+        thumb = self.thumbnail(frame)
+        if self._frames and self._shape != thumb.shape:
+            self.reset()
+        self._shape = thumb.shape
+        self._frames += 1
+        if self.method == 'mog2':
+            if self._subtractor is None:
+                self._subtractor = cv2.createBackgroundSubtractorMOG2(
+                    history=self.warmup, varThreshold=self.threshold, detectShadows=False)
+            mask = self._subtractor.apply(thumb, learningRate=self.background_rate)
+        else:
+            if self._background is None:
+                self._background = thumb.astype(np.float32)
+            difference = cv2.absdiff(thumb, cv2.convertScaleAbs(self._background))
+            _, mask = cv2.threshold(difference, self.threshold, 255, cv2.THRESH_BINARY)
+            cv2.accumulateWeighted(thumb, self._background, self.background_rate)
+        return cv2.countNonZero(mask) / mask.size
+
+    def check(self, frame, now=None):
+        """Return the changed fraction if this frame fires a trigger, else None."""
+        now = time.monotonic() if now is None else now
+        self.last_score = self.score(frame)
+        if self._frames <= self.warmup or self.last_score < self.min_area:
+            return None
+        if self._last_trigger is not None and now - self._last_trigger < self.cooldown:
+            return None
+        self._last_trigger = now
+        self.triggers += 1
+        return self.last_score
+
+
+# --------------------- Motion Watcher ---------------------
+class MotionWatcher:
+    """Thread that runs a MotionDetector over every frame a grabber commits to its ring.
+
+    `ring()` returns the FrameRing to watch; it is looked up per frame because camera
+    recovery replaces the grabber. Frames are inspected in place (a pinned read-only
+    view, nothing copied) and only the newest one is checked, so a slow check skips
+    frames instead of falling behind. `on_motion(stamp, score)` gets the capture
+    timestamp of the frame that fired; `on_check(seconds)` the time every check took.
+    """
+
+    def __init__(self, detector, ring, on_motion, on_check=None, name="camera"):
+        self.detector = detector
+        self.ring = ring
+        self.on_motion = on_motion
+        self.on_check = on_check
+        self.name = name
+        self.running = False
+        self._thread = None
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name=f"motion-{self.name}", daemon=True)
+        self._thread.start()
+        logger.info(f"[{self.name}] Motion trigger started ({self.detector.describe()})")
+
+    def _run(self):
+        watched, last_stamp = None, None
+        while self.running:
+            ring = self.ring()
+            if ring is not watched:
+                watched = ring
+                self.detector.reset()  # a restarted grabber starts a new background
+            if last_stamp is not None and not ring.wait_for_frame_after(last_stamp + 1e-6, timeout=1.0):
+                continue
+            started = time.monotonic()
+            try:
+                with ring.closest(started) as (view, stamp):
+                    if view is None:
+                        time.sleep(0.1)
+                        continue
+                    if stamp == last_stamp:
+                        continue
+                    score = self.detector.check(view, stamp)
+            except Exception as e:
+                logger.error(f"[{self.name}] Motion check failed: {e}")
+                time.sleep(1)
+                continue
+            last_stamp = stamp
+            if self.on_check:
+                self.on_check(time.monotonic() - started)
+            if score is not None:
+                try:
+                    self.on_motion(stamp, score)
+                except Exception as e:
+                    logger.error(f"[{self.name}] Motion trigger failed: {e}")
+
+    def stop(self):
+        self.running = False
+        if self._thread:
+            self._thread.join(timeout=2.0)
@@ -0,0 +1,175 @@
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DROP_POLICIES = ('drop-oldest', 'drop-newest', 'block')
+
+
+# --------------------- Capture Job ---------------------
+@dataclass
+class CaptureJob:
+    """A single trigger travelling through the capture -> encode -> upload stages.
+
+    All timestamps are time.monotonic() values so they can be compared across threads.
+    """
+    frame: Any
+    trigger_time: float
+    capture_time: Optional[float] = None
+    enqueue_time: Optional[float] = None
+    event_time: Optional[float] = None  # when the triggering event happened (defaults to trigger_time)
+    frame_time: Optional[float] = None  # when the selected frame was captured by the camera
+    camera: Any = None  # the source the job belongs to
+    correlation_id: Optional[str] = None  # shared by every job captured for the same burst trigger
+    snapshot: Any = None  # JPEG snapshot fetch started at trigger time (SnapshotRequest)
+    quality_flags: List[str] = field(default_factory=list)  # quality issues the frame was uploaded with
+    deferred: bool = False  # handed to a later stage (upload batcher) that finishes it and logs its latency
+    marks: List[Tuple[str, float]] = field(default_factory=list)
+
+    @property
+    def frame_age_ms(self):
+        """How old the selected frame was when the trigger arrived (negative if captured after)."""
+        if self.frame_time is None:
+            return None
+        return (self.trigger_time - self.frame_time) * 1000
+
+    @property
+    def event_skew_ms(self):
+        """Capture time of the selected frame relative to the event time."""
+        if self.frame_time is None:
+            return None
+        event_time = self.trigger_time if self.event_time is None else self.event_time
+        return (self.frame_time - event_time) * 1000
+
+    def mark(self, stage):
+        """Record the completion time of a processing stage."""
+        self.marks.append((stage, time.monotonic()))
+
+    def stage_summary(self):
+        """Format the per-stage latencies (in ms) relative to the trigger."""
+        parts = []
+        prev = self.trigger_time
+        if self.capture_time is not None:
+            parts.append(f"capture {(self.capture_time - self.trigger_time) * 1000:.1f}ms")
+            prev = self.capture_time
+        for stage, stamp in self.marks:
+            parts.append(f"{stage} {(stamp - prev) * 1000:.1f}ms")
+            prev = stamp
+        parts.append(f"total {(prev - self.trigger_time) * 1000:.1f}ms")
+        return " | ".join(parts)
+
+
+# --------------------- Bounded Worker Pipeline ---------------------
+class CapturePipeline:
+    """Bounded queue plus a pool of worker threads that run `handler(job)`.
+
+    Frames are captured by the caller at trigger time and submitted here, so slow
+    encoding/uploads never block the MQTT network loop. When the queue is full the
+    drop policy decides what happens:
+      - drop-oldest: discard the oldest queued job to make room for the new one
+      - drop-newest: discard the incoming job
+      - block:       wait up to `block_timeout` seconds for room, then discard it
+    """
+
+    def __init__(self, handler: Callable[[CaptureJob], None], queue_depth=8, workers=2,
+                 drop_policy='drop-oldest', block_timeout=1.0, name='upload'):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Invalid drop policy '{drop_policy}' (must be one of {', '.join(DROP_POLICIES)})")
+        self.handler = handler
+        self.queue = queue.Queue(maxsize=max(1, int(queue_depth)))
+        self.worker_count = max(1, int(workers))
+        self.drop_policy = drop_policy
+        self.block_timeout = block_timeout
+        self.name = name
+        self.dropped = 0
+        self.processed = 0
+        self.failed = 0
+        self._stats_lock = threading.Lock()
+        self._threads = []
+        self.running = False
+
+    def start(self):
+        self.running = True
+        for i in range(self.worker_count):
+            thread = threading.Thread(target=self._worker, name=f"{self.name}-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"{self.name} pipeline started ({self.worker_count} workers, queue depth {self.queue.maxsize}, "
+                    f"policy {self.drop_policy})")
+
+    def submit(self, job: CaptureJob, wait=False):
+        """Queue a job without blocking the caller (except under the 'block' policy).
+
+        With wait=True the caller blocks until there is room whatever the policy, for
+        sources that must not lose frames. Returns True if the job was queued.
+        """
+        job.enqueue_time = time.monotonic()
+        if wait:
+            self.queue.put(job)
+            return True
+        try:
+            if self.drop_policy == 'block':
+                self.queue.put(job, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(job)
+            return True
+        except queue.Full:
+            pass
+
+        if self.drop_policy == 'drop-oldest':
+            try:
+                self.queue.get_nowait()
+                self.queue.task_done()
+                self._count_drop("queue full - dropped oldest queued frame")
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(job)
+                return True
+            except queue.Full:
+                pass
+        self._count_drop("queue full - dropped incoming frame")
+        return False
+
+    def _count_drop(self, reason):
+        with self._stats_lock:
+            self.dropped += 1
+            dropped = self.dropped
+        logger.warning(f"{self.name} {reason} ({dropped} dropped so far)")
+
+    def _worker(self):
+        while self.running:
+            try:
+                job = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                job.mark('queued')
+                self.handler(job)
+                with self._stats_lock:
+                    self.processed += 1
+            except Exception as e:
+                with self._stats_lock:
+                    self.failed += 1
+                logger.error(f"{self.name} job failed: {e}")
+            finally:
+                if not job.deferred:
+                    logger.info(f"{self.name} stage latency: {job.stage_summary()}")
+                self.queue.task_done()
+
+    def qsize(self):
+        return self.queue.qsize()
+
+    def stop(self, timeout=5.0):
+        """Stop accepting work and wait briefly for in-flight jobs to finish."""
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.running = False
+        for thread in self._threads:
+            thread.join(timeout=max(0.0, deadline - time.monotonic()))
+        self._threads = []
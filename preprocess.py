@@ -0,0 +1,210 @@
+import logging
+import threading
+import time
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+from frame_quality import sample_view
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=32)
+def gamma_table(gamma):
+    """256-entry uint8 lookup table for `gamma` (values above 1 brighten)."""
+    values = np.arange(256, dtype=np.float64) / 255.0
+    return np.clip(np.round(values ** (1.0 / gamma) * 255), 0, 255).astype(np.uint8)
+
+
+def color_table(gamma=1.0, gains=None):
+    """Combined white-balance gains (per BGR channel) and gamma as a (256, 1, 3) cv2.LUT table."""
+    values = np.arange(256, dtype=np.float64)[:, None]
+    gains = np.ones(3) if gains is None else np.asarray(gains, dtype=np.float64)
+    values = np.clip(values * gains[None, :], 0, 255) / 255.0
+    table = np.clip(np.round(values ** (1.0 / gamma) * 255), 0, 255).astype(np.uint8)
+    return table.reshape(256, 1, 3)
+
+
+def gray_world_gains(frame):
+    """White-balance gains that make the average of a strided sample neutral grey."""
+    means = sample_view(frame).reshape(-1, 3).mean(axis=0)
+    return means.mean() / np.maximum(means, 1.0)
+
+
+# --------------------- Preprocessor ---------------------
+class Preprocessor:
+    """Crop, resize, rotate, white balance and gamma applied to frames before encoding.
+
+    Everything that only depends on the settings and the input frame size (the crop
+    window, the colour LUT, the remap grid for arbitrary rotation angles) is built once
+    per input shape and cached until `configure()` changes a setting.
+
+    Stages are ordered and fused to touch as few pixels as possible: the crop is a view
+    into the frame, geometry runs on the cropped region only (crop + resize + an arbitrary
+    rotation collapse into a single cv2.remap), and the colour LUT runs on whichever of
+    the cropped input or the output has fewer pixels.
+
+      crop:          (x, y, width, height) in input pixels
+      resize:        (width, height) of the output frame
+      rotate:        degrees counter-clockwise; multiples of 90 are lossless
+      gamma:         1.0 leaves brightness untouched
+      white_balance: (b, g, r) gains, or "auto" for grey-world gains per frame
+    """
+
+    def __init__(self, crop=None, resize=None, rotate=0, gamma=1.0, white_balance=None):
+        self._lock = threading.Lock()
+        self._plans = {}
+        self.configure(crop=crop, resize=resize, rotate=rotate, gamma=gamma, white_balance=white_balance)
+
+    def configure(self, crop=None, resize=None, rotate=0, gamma=1.0, white_balance=None):
+        """Apply new settings. Returns True (and drops cached tables/maps) if anything changed."""
+        settings = self._validate(crop, resize, rotate, gamma, white_balance)
+        with self._lock:
+            if getattr(self, 'settings', None) == settings:
+                return False
+            self.settings = settings
+            self._plans = {}
+        return True
+
+    @staticmethod
+    def _validate(crop, resize, rotate, gamma, white_balance):
+        if crop is not None:
+            crop = tuple(int(v) for v in crop)
+            if len(crop) != 4 or crop[0] < 0 or crop[1] < 0 or crop[2] <= 0 or crop[3] <= 0:
+                raise ValueError(f"crop must be [x, y, width, height], got {crop}")
+        if resize is not None:
+            resize = tuple(int(v) for v in resize)
+            if len(resize) != 2 or min(resize) <= 0:
+                raise ValueError(f"resize must be [width, height], got {resize}")
+        rotate = float(rotate or 0) % 360
+        gamma = float(gamma or 1.0)
+        if gamma <= 0:
+            raise ValueError(f"gamma must be positive, got {gamma}")
+        if isinstance(white_balance, str):
+            white_balance = white_balance.lower()
+            if white_balance != 'auto':
+                raise ValueError(f"white-balance must be [b, g, r] gains or 'auto', got {white_balance}")
+        elif white_balance is not None:
+            white_balance = tuple(float(v) for v in white_balance)
+            if len(white_balance) != 3 or min(white_balance) <= 0:
+                raise ValueError(f"white-balance must be [b, g, r] gains, got {white_balance}")
+            if white_balance == (1.0, 1.0, 1.0):
+                white_balance = None
+        return {"crop": crop, "resize": resize, "rotate": rotate, "gamma": gamma, "white_balance": white_balance}
+
+    @property
+    def enabled(self):
+        s = self.settings
+        return bool(s["crop"] or s["resize"] or s["rotate"] or s["gamma"] != 1.0 or s["white_balance"])
+
+    def describe(self):
+        s = self.settings
+        parts = []
+        if s["crop"]:
+            parts.append("crop {}x{}+{}+{}".format(s["crop"][2], s["crop"][3], s["crop"][0], s["crop"][1]))
+        if s["resize"]:
+            parts.append("resize {}x{}".format(*s["resize"]))
+        if s["rotate"]:
+            parts.append(f"rotate {s['rotate']:g} deg")
+        if s["white_balance"]:
+            wb = s["white_balance"]
+            parts.append("white balance " + (wb if isinstance(wb, str) else "/".join(f"{g:g}" for g in wb)))
+        if s["gamma"] != 1.0:
+            parts.append(f"gamma {s['gamma']:g}")
+        return ", ".join(parts) or "none"
+
+    # --------------------- Plans (cached per input shape) ---------------------
+    def _plan(self, shape):
+        plan = self._plans.get(shape)
+        if plan is None:
+            with self._lock:
+                plan = self._plans.get(shape)
+                if plan is None:
+                    plan = self._plans[shape] = self._build_plan(shape, self.settings)
+        return plan
+
+    @staticmethod
+    def _build_plan(shape, s):
+        height, width = shape[:2]
+        plan = {"crop": None, "resize": None, "rotate": None, "maps": None, "lut": None, "lut_first": False}
+
+        x, y, w, h = 0, 0, width, height
+        if s["crop"]:
+            x, y = min(s["crop"][0], width - 1), min(s["crop"][1], height - 1)
+            w, h = min(s["crop"][2], width - x), min(s["crop"][3], height - y)
+            plan["crop"] = (slice(y, y + h), slice(x, x + w))
+
+        out_w, out_h = s["resize"] or (w, h)
+        right_angle = s["rotate"] % 90 == 0
+        if right_angle:
+            quarter = int(s["rotate"] // 90)
+            plan["rotate"] = {1: cv2.ROTATE_90_COUNTERCLOCKWISE, 2: cv2.ROTATE_180,
+                              3: cv2.ROTATE_90_CLOCKWISE}.get(quarter)
+            # Resize before rotating (fewer pixels to move); a quarter turn swaps the axes
+            pre_w, pre_h = (out_h, out_w) if quarter in (1, 3) and s["resize"] else (out_w, out_h)
+            if (pre_w, pre_h) != (w, h):
+                plan["resize"] = (pre_w, pre_h)
+        else:
+            # Output pixel -> source pixel in the cropped region: scale, then rotate about the centre
+            rotation = cv2.getRotationMatrix2D((out_w / 2.0, out_h / 2.0), -s["rotate"], 1.0)
+            scale = np.diag([w / out_w, h / out_h])
+            grid_x, grid_y = np.meshgrid(np.arange(out_w, dtype=np.float32), np.arange(out_h, dtype=np.float32))
+            rot_x = rotation[0, 0] * grid_x + rotation[0, 1] * grid_y + rotation[0, 2]
+            rot_y = rotation[1, 0] * grid_x + rotation[1, 1] * grid_y + rotation[1, 2]
+            map_x = (rot_x * scale[0, 0]).astype(np.float32)
+            map_y = (rot_y * scale[1, 1]).astype(np.float32)
+            plan["maps"] = cv2.convertMaps(map_x, map_y, cv2.CV_16SC2)
+
+        channels = shape[2] if len(shape) == 3 else 1
+        if s["gamma"] != 1.0 or s["white_balance"]:
+            if channels == 3 and isinstance(s["white_balance"], tuple):
+                plan["lut"] = color_table(s["gamma"], s["white_balance"])
+            elif channels == 3 and s["white_balance"] == 'auto':
+                plan["lut"] = 'auto'
+            else:
+                plan["lut"] = gamma_table(s["gamma"])
+            plan["lut_first"] = w * h < out_w * out_h  # upscaling: colour-correct the smaller image
+        return plan
+
+    # --------------------- Processing ---------------------
+    def process(self, frame, on_stage=None):
+        """Return the processed frame. `on_stage(stage, seconds)` is called after each stage."""
+        if not self.enabled:
+            return frame
+        plan = self._plan(frame.shape)
+        started = time.perf_counter()
+
+        def done(stage):
+            nonlocal started
+            now = time.perf_counter()
+            if on_stage:
+                on_stage(stage, now - started)
+            started = now
+
+        if plan["crop"]:
+            frame = frame[plan["crop"]]
+            done('crop')
+        if plan["lut"] is not None and plan["lut_first"]:
+            frame = self._apply_lut(frame, plan)
+            done('color')
+        if plan["maps"] is not None:
+            frame = cv2.remap(frame, plan["maps"][0], plan["maps"][1], cv2.INTER_LINEAR)
+            done('warp')
+        if plan["resize"]:
+            frame = cv2.resize(frame, plan["resize"], interpolation=cv2.INTER_AREA)
+            done('resize')
+        if plan["rotate"] is not None:
+            frame = cv2.rotate(frame, plan["rotate"])
+            done('rotate')
+        if plan["lut"] is not None and not plan["lut_first"]:
+            frame = self._apply_lut(frame, plan)
+            done('color')
+        return frame
+
+    def _apply_lut(self, frame, plan):
+        table = plan["lut"]
+        if isinstance(table, str):  # 'auto' white balance: gains depend on the frame
+            table = color_table(self.settings["gamma"], gray_world_gains(frame))
+        return cv2.LUT(frame, table)
@@ -0,0 +1,247 @@
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+# Optional imports with graceful fallbacks
+try:
+    import av  # PyAV - FFmpeg demux/decode without OpenCV's capture loop
+    AV_AVAILABLE = True
+except ImportError:
+    AV_AVAILABLE = False
+    av = None
+
+logger = logging.getLogger(__name__)
+
+RTSP_BACKENDS = ('opencv', 'gstreamer', 'pyav')
+RTSP_TRANSPORTS = ('tcp', 'udp')
+RTSP_DECODE_MODES = ('all', 'keyframes', 'on-demand')
+
+# Guards OPENCV_FFMPEG_CAPTURE_OPTIONS, which FFmpeg-backed opens read from the environment
+_ffmpeg_env_lock = threading.Lock()
+
+
+# --------------------- Options ---------------------
+@dataclass
+class RtspOptions:
+    """How an RTSP camera is ingested.
+
+      backend:     opencv (cv2 + FFmpeg), gstreamer (cv2 + GStreamer pipeline) or pyav
+      transport:   tcp (reliable) or udp (lower latency, may drop packets on a busy network)
+      low_latency: disable demuxer/jitter buffering so the newest frame is delivered at once
+      decode:      all frames, keyframes only, or on-demand (demux everything, decode the
+                   current GOP only when a frame is requested) - the last two need pyav
+      hw_decode:   use the V4L2 M2M hardware decoder (Raspberry Pi and similar) if present
+    """
+    backend: str = 'opencv'
+    transport: str = 'tcp'
+    low_latency: bool = True
+    decode: str = 'all'
+    hw_decode: bool = False
+
+    def validate(self):
+        if self.backend not in RTSP_BACKENDS:
+            raise ValueError(f"rtsp-backend must be one of {', '.join(RTSP_BACKENDS)}, got '{self.backend}'")
+        if self.transport not in RTSP_TRANSPORTS:
+            raise ValueError(f"rtsp-transport must be one of {', '.join(RTSP_TRANSPORTS)}, got '{self.transport}'")
+        if self.decode not in RTSP_DECODE_MODES:
+            raise ValueError(f"rtsp-decode must be one of {', '.join(RTSP_DECODE_MODES)}, got '{self.decode}'")
+        if self.decode != 'all' and self.backend != 'pyav':
+            raise ValueError(f"rtsp-decode '{self.decode}' requires rtsp-backend 'pyav'")
+        if self.backend == 'pyav' and not AV_AVAILABLE:
+            raise ValueError("rtsp-backend 'pyav' requires the av package (pip install av)")
+        return self
+
+    def describe(self):
+        parts = [self.backend, self.transport.upper(), f"decode {self.decode}"]
+        if self.low_latency:
+            parts.append("low latency")
+        if self.hw_decode:
+            parts.append("hardware decode")
+        return ", ".join(parts)
+
+
+# --------------------- OpenCV Backends ---------------------
+def video_capture(*args):
+    """cv2.VideoCapture(*args), opened while no RTSP open has its FFmpeg options in the environment.
+
+    Every VideoCapture in the process must be constructed through this: a USB or file
+    open on another thread (possibly through FFmpeg) would otherwise pick up the options
+    an RTSP open set temporarily.
+    """
+    with _ffmpeg_env_lock:
+        return cv2.VideoCapture(*args)
+
+
+def ffmpeg_options(options):
+    """FFmpeg demuxer options for the transport and latency settings."""
+    opts = {'rtsp_transport': options.transport}
+    if options.low_latency:
+        opts.update({'fflags': 'nobuffer', 'flags': 'low_delay', 'max_delay': '0'})
+    return opts
+
+
+def open_opencv_capture(url, options):
+    """cv2.VideoCapture over FFmpeg with the transport/latency options applied."""
+    params = []
+    if options.hw_decode:
+        params = [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+    # OpenCV only reads FFmpeg options from the environment, at open time
+    with _ffmpeg_env_lock:
+        previous = os.environ.get('OPENCV_FFMPEG_CAPTURE_OPTIONS')
+        os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = '|'.join(f"{k};{v}" for k, v in ffmpeg_options(options).items())
+        try:
+            cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG, params)
+        finally:
+            if previous is None:
+                os.environ.pop('OPENCV_FFMPEG_CAPTURE_OPTIONS', None)
+            else:
+                os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = previous
+    if cap.isOpened():
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+
+def gstreamer_pipeline(url, options):
+    protocols = 'tcp' if options.transport == 'tcp' else 'udp'
+    latency = 0 if options.low_latency else 200
+    if options.hw_decode:
+        decode = 'rtph264depay ! h264parse ! v4l2h264dec'
+    else:
+        decode = 'decodebin'
+    return (f'rtspsrc location="{url}" protocols={protocols} latency={latency} drop-on-latency=true ! '
+            f'{decode} ! videoconvert ! video/x-raw,format=BGR ! appsink drop=true max-buffers=1 sync=false')
+
+
+def open_gstreamer_capture(url, options):
+    if 'GStreamer:                   YES' not in cv2.getBuildInformation():
+        raise IOError("This OpenCV build has no GStreamer support (rtsp-backend 'gstreamer')")
+    return video_capture(gstreamer_pipeline(url, options), cv2.CAP_GSTREAMER)
+
+
+# --------------------- PyAV Backend ---------------------
+class PyAVCapture:
+    """RTSP reader on PyAV with a cv2.VideoCapture-like grab()/retrieve()/read() interface.
+
+    In `on-demand` mode grab() only demuxes: packets since the last keyframe are kept
+    and retrieve() decodes just the ones it has not decoded yet, so an idle camera costs
+    network I/O but almost no CPU. `keyframes` mode drops every non-key packet before
+    it reaches the decoder. `frame_time` is the time.monotonic() arrival of the packet
+    behind the last retrieved frame.
+    """
+
+    def __init__(self, url, options, open_timeout=10.0):
+        self.options = options
+        av_options = dict(ffmpeg_options(options)) if url.startswith('rtsp') else {}
+        self.container = av.open(url, options=av_options, timeout=(open_timeout, open_timeout))
+        self.stream = self.container.streams.video[0]
+        self.codec = self._create_decoder()
+        self._packets = self.container.demux(self.stream)
+        self._lock = threading.Lock()
+        self._opened = True
+        self._frame = None  # last decoded av.VideoFrame
+        self._frame_arrival = None
+        self._pending = False  # decoded but not yet retrieved
+        self._gop = []  # on-demand: (packet, arrival) since the last keyframe
+        self._decoded = 0  # on-demand: packets of the current GOP already fed to the decoder
+        self.frame_time = None
+        self.packet_time = None  # arrival of the newest demuxed packet
+
+    def _create_decoder(self):
+        name = self.stream.codec_context.name
+        if self.options.hw_decode:
+            hw_name = f"{name}_v4l2m2m"
+            try:
+                return self._open_decoder(hw_name)
+            except (av.FFmpegError, ValueError) as e:
+                # Listed in FFmpeg builds without the kernel device behind it, e.g. off the Pi
+                logger.warning(f"Hardware decoder {hw_name} unavailable ({e}) - decoding {name} in software")
+        return self._open_decoder(name)
+
+    def _open_decoder(self, name):
+        codec = av.CodecContext.create(name, 'r')
+        if self.stream.codec_context.extradata:
+            codec.extradata = self.stream.codec_context.extradata
+        if self.options.low_latency:
+            codec.options = {'flags': 'low_delay'}
+        codec.open()
+        return codec
+
+    def isOpened(self):
+        return self._opened
+
+    def _next_packet(self):
+        for packet in self._packets:
+            if packet.size == 0:
+                continue  # demuxer flush packet
+            if self.options.decode == 'keyframes' and not packet.is_keyframe:
+                continue
+            self.packet_time = time.monotonic()
+            return packet
+        self._opened = False
+        return None
+
+    def grab(self):
+        packet = self._next_packet()
+        if packet is None:
+            return False
+        arrival = self.packet_time
+        with self._lock:
+            if self.options.decode == 'on-demand':
+                if packet.is_keyframe:
+                    self._gop = []
+                    self._decoded = 0
+                    self.codec.flush_buffers()
+                if packet.is_keyframe or self._gop:
+                    self._gop.append((packet, arrival))
+                return True
+            for frame in self.codec.decode(packet):
+                self._frame, self._frame_arrival, self._pending = frame, arrival, True
+        return True
+
+    def _decode_gop(self):
+        # Caller holds the lock
+        for packet, arrival in self._gop[self._decoded:]:
+            for frame in self.codec.decode(packet):
+                self._frame, self._frame_arrival, self._pending = frame, arrival, True
+        self._decoded = len(self._gop)
+
+    def retrieve(self, image=None):
+        with self._lock:
+            if self.options.decode == 'on-demand':
+                self._decode_gop()
+            frame, self._pending = self._frame, False
+            self.frame_time = self._frame_arrival
+        if frame is None:
+            return False, None
+        array = frame.to_ndarray(format='bgr24')
+        if image is not None and image.shape == array.shape:
+            np.copyto(image, array)
+            array = image
+        return True, array
+
+    def read(self, image=None):
+        if self.options.decode != 'on-demand':
+            while not self._pending:
+                if not self.grab():
+                    return False, None
+        elif not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+    def release(self):
+        self._opened = False
+        self.container.close()
+
+
+def open_rtsp_capture(url, options):
+    """Open `url` with the configured backend. The result behaves like cv2.VideoCapture."""
+    if options.backend == 'pyav':
+        return PyAVCapture(url, options)
+    if options.backend == 'gstreamer':
+        return open_gstreamer_capture(url, options)
+    return open_opencv_capture(url, options)
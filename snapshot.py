@@ -0,0 +1,243 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from urllib.parse import urlparse
+
+import requests
+from requests.utils import parse_dict_header
+
+from transport import create_session
+
+logger = logging.getLogger(__name__)
+
+DIGEST_HASHES = {
+    'MD5': hashlib.md5,
+    'MD5-SESS': hashlib.md5,
+    'SHA': hashlib.sha1,
+    'SHA-256': hashlib.sha256,
+    'SHA-256-SESS': hashlib.sha256,
+    'SHA-512': hashlib.sha512,
+    'SHA-512-SESS': hashlib.sha512,
+}
+
+
+class SnapshotTimeout(TimeoutError):
+    """A snapshot did not arrive before its deadline."""
+
+
+# --------------------- Digest Authentication ---------------------
+class SharedDigestAuth(requests.auth.AuthBase):
+    """HTTP digest authentication that answers the server's challenge once, then reuses it.
+
+    requests.auth.HTTPDigestAuth keeps its challenge per thread and is normally created
+    per request, so every snapshot pays a 401 round trip. Here the last challenge (realm,
+    nonce, qop, ...) is shared by all threads and the Authorization header is sent with
+    the first attempt, counting up the nonce count as RFC 7616 requires. A 401 (new or
+    stale nonce) updates the challenge and the request is retried once on the same
+    connection. `challenges` counts the 401 round trips that were paid.
+    """
+
+    def __init__(self, username, password):
+        self.username = username or ''
+        self.password = password or ''
+        self._lock = threading.Lock()
+        self._challenge = None
+        self._nonce_count = 0
+        self.challenges = 0
+
+    def _header(self, method, url):
+        """Authorization header for the cached challenge (None if there is none or it is unsupported)."""
+        with self._lock:
+            challenge = self._challenge
+            if challenge is None:
+                return None
+            self._nonce_count += 1
+            nonce_count = self._nonce_count
+        algorithm = challenge.get('algorithm', 'MD5').upper()
+        hash_fn = DIGEST_HASHES.get(algorithm)
+        qops = [q.strip() for q in challenge.get('qop', '').split(',') if q.strip()]
+        if hash_fn is None or (qops and 'auth' not in qops):
+            return None  # unknown algorithm or auth-int only
+
+        def digest(text):
+            return hash_fn(text.encode()).hexdigest()
+
+        parsed = urlparse(url)
+        uri = parsed.path or '/'
+        if parsed.query:
+            uri += '?' + parsed.query
+        realm, nonce = challenge.get('realm', ''), challenge.get('nonce', '')
+        cnonce = os.urandom(8).hex()
+        nc = f"{nonce_count:08x}"
+        ha1 = digest(f"{self.username}:{realm}:{self.password}")
+        if algorithm.endswith('-SESS'):
+            ha1 = digest(f"{ha1}:{nonce}:{cnonce}")
+        ha2 = digest(f"{method}:{uri}")
+        if qops:
+            response = digest(f"{ha1}:{nonce}:{nc}:{cnonce}:auth:{ha2}")
+        else:
+            response = digest(f"{ha1}:{nonce}:{ha2}")
+
+        header = (f'Digest username="{self.username}", realm="{realm}", nonce="{nonce}", uri="{uri}", '
+                  f'response="{response}", algorithm={algorithm}')
+        if 'opaque' in challenge:
+            header += f', opaque="{challenge["opaque"]}"'
+        if qops:
+            header += f', qop=auth, nc={nc}, cnonce="{cnonce}"'
+        return header
+
+    def _handle_401(self, response, **kwargs):
+        request = response.request
+        authenticate = response.headers.get('www-authenticate', '')
+        if response.status_code != 401 or getattr(request, 'digest_retry', False) \
+                or not authenticate.lower().startswith('digest '):
+            return response
+        with self._lock:
+            self._challenge = parse_dict_header(authenticate[7:])
+            self._nonce_count = 0
+            self.challenges += 1
+
+        response.content  # drain the 401 body so the connection can be reused
+        response.close()
+        retry = request.copy()
+        retry.digest_retry = True
+        header = self._header(retry.method, retry.url)
+        if header is None:
+            return response
+        retry.headers['Authorization'] = header
+        retried = response.connection.send(retry, **kwargs)
+        retried.history.append(response)
+        retried.request = retry
+        return retried
+
+    def __call__(self, request):
+        header = self._header(request.method, request.url)
+        if header is not None:
+            request.headers['Authorization'] = header
+        request.register_hook('response', self._handle_401)
+        return request
+
+
+# --------------------- Snapshot Client ---------------------
+class SnapshotRequest:
+    """A snapshot being fetched in the background; `result()` enforces its deadline."""
+
+    def __init__(self, future, deadline, cancelled):
+        self.started = time.monotonic()
+        self.future = future
+        self.deadline = deadline
+        self.cancelled = cancelled
+
+    def result(self):
+        """The JPEG bytes. Raises SnapshotTimeout once the deadline has passed, or the fetch error."""
+        try:
+            return self.future.result(timeout=max(0.0, self.deadline - time.monotonic()))
+        except FutureTimeout:
+            self.cancelled.set()  # the fetch thread drops the response at its next chunk
+            self.future.cancel()
+            raise SnapshotTimeout("snapshot deadline passed") from None
+
+
+class SnapshotClient:
+    """Fetches JPEG snapshots from one camera over a persistent connection.
+
+    Snapshots go through a private pooled session, so the TCP (and TLS) connection to the
+    camera stays open between triggers, and through SharedDigestAuth, so the digest
+    challenge is answered once rather than per snapshot. `submit()` starts a fetch on one
+    of `concurrency` background threads and returns at once, which lets a burst fetch
+    from several cameras at the same moment; `timeout` is a hard deadline for the whole
+    fetch (connect, 401 retry and body), after which the caller gets SnapshotTimeout
+    while the abandoned request is closed in the background.
+
+    With `keep_warm` > 0 a HEAD request is sent whenever the camera has been idle that
+    long, so the connection and nonce are fresh when the next trigger arrives (cameras
+    commonly close idle keep-alive connections after a minute or so).
+    """
+
+    def __init__(self, url, username=None, password=None, timeout=5.0, concurrency=2, keep_warm=0.0,
+                 connect_timeout=3.0, name="camera"):
+        self.url = url
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.keep_warm = keep_warm
+        self.concurrency = max(1, int(concurrency))
+        self.name = name
+        self.auth = SharedDigestAuth(username, password) if username else None
+        self.session = create_session(pool_connections=1, pool_maxsize=self.concurrency,
+                                      connect_timeout=connect_timeout, read_timeout=timeout)
+        self.session.auth = self.auth
+        self.pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix=f"snapshot-{name}")
+        self.last_used = time.monotonic()
+        self.running = True
+        self._warm_thread = None
+
+    @property
+    def stats(self):
+        return self.session.stats
+
+    def describe(self):
+        parts = [f"deadline {self.timeout:g}s", f"{self.concurrency} concurrent"]
+        if self.auth:
+            parts.append("digest auth")
+        if self.keep_warm:
+            parts.append(f"kept warm every {self.keep_warm:g}s")
+        return ", ".join(parts)
+
+    def submit(self, timeout=None):
+        """Start fetching a snapshot now; returns a SnapshotRequest."""
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        cancelled = threading.Event()
+        return SnapshotRequest(self.pool.submit(self._fetch, deadline, cancelled), deadline, cancelled)
+
+    def fetch(self, timeout=None):
+        return self.submit(timeout).result()
+
+    def _fetch(self, deadline, cancelled):
+        self.last_used = time.monotonic()
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or cancelled.is_set():
+            raise SnapshotTimeout("snapshot deadline passed before the request started")
+        with self.session.get(self.url, stream=True, timeout=(min(self.connect_timeout, remaining), remaining)) as response:
+            response.raise_for_status()
+            chunks = []
+            for chunk in response.iter_content(65536):
+                if cancelled.is_set() or time.monotonic() > deadline:
+                    raise SnapshotTimeout("snapshot deadline passed while reading the image")
+                chunks.append(chunk)
+        self.last_used = time.monotonic()
+        return b''.join(chunks)
+
+    def warm(self):
+        """Open the connection and answer the digest challenge ahead of the first snapshot."""
+        try:
+            with self.session.head(self.url, timeout=(self.connect_timeout, self.timeout)) as response:
+                self.last_used = time.monotonic()
+                if response.status_code == 401:
+                    logger.warning(f"[{self.name}] JPEG camera rejected the configured credentials")
+                return response.status_code < 400 or response.status_code == 405
+        except requests.RequestException as e:
+            logger.warning(f"[{self.name}] Could not reach the JPEG camera: {e}")
+            return False
+
+    def start(self):
+        if self.keep_warm > 0:
+            self._warm_thread = threading.Thread(target=self._keep_warm, name=f"snapshot-warm-{self.name}",
+                                                 daemon=True)
+            self._warm_thread.start()
+
+    def _keep_warm(self):
+        while self.running:
+            idle = time.monotonic() - self.last_used
+            if idle >= self.keep_warm:
+                self.warm()
+                idle = 0.0
+            time.sleep(max(0.5, self.keep_warm - idle))
+
+    def stop(self):
+        self.running = False
+        self.pool.shutdown(wait=False)
+        self.session.close()
@@ -0,0 +1,362 @@
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+# Record header: magic, metadata length, payload length, crc32(metadata + payload), created (epoch seconds)
+_HEADER = struct.Struct('<4sIIId')
+_MAGIC = b'SPL1'
+_SEGMENT_SUFFIX = '.seg'
+_CURSOR_FILE = 'cursor.json'
+
+
+# --------------------- Spooled Record ---------------------
+class SpoolRecord:
+    __slots__ = ('metadata', 'payload', 'created', 'segment', 'offset', 'next_offset')
+
+    def __init__(self, metadata, payload, created, segment, offset, next_offset):
+        self.metadata = metadata
+        self.payload = payload
+        self.created = created
+        self.segment = segment
+        self.offset = offset
+        self.next_offset = next_offset
+
+
+# --------------------- Upload Spool ---------------------
+class UploadSpool:
+    """Append-only on-disk store for encoded frames whose upload failed.
+
+    Records are appended to numbered segment files; a small cursor file records the
+    (segment, offset) of the next record to replay and is replaced atomically, so after
+    a crash at most the last in-flight record is sent twice. On startup any torn record
+    at the tail of a segment (power loss mid-write) is truncated away.
+
+    A background drainer replays records through `send(metadata, payload)` at no more
+    than `drain_rate` records/s, backing off while the upload target is unreachable. A
+    record whose failure `retryable(error)` reports as permanent (the target refused that
+    frame) is dropped and counted in `rejected`, so it cannot hold up the records behind it.
+    Oldest segments are evicted when the spool exceeds `max_bytes` or its records are
+    older than `max_age`.
+    """
+
+    def __init__(self, directory, send, max_bytes=512 * 1024 * 1024, max_age=24 * 3600,
+                 segment_bytes=32 * 1024 * 1024, drain_rate=2.0, fsync=True, retryable=None):
+        self.directory = directory
+        self.send = send
+        self.retryable = retryable
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.segment_bytes = segment_bytes
+        self.drain_interval = 1.0 / drain_rate if drain_rate > 0 else 0.0
+        self.fsync = fsync
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()  # new record appended
+        self.stopping = threading.Event()  # ends a backoff early on stop(); appends must not
+        self.running = False
+        self.thread = None
+
+        # Live state, rebuilt from disk by _recover()
+        # segment number -> {"size": file bytes, "bytes": pending bytes, "records": pending count, "newest": epoch}
+        self._segments = {}
+        self._cursor = (0, 0)
+        self._writer = None
+        self._write_segment = None
+
+        # Metrics
+        self.appended = 0
+        self.drained = 0
+        self.evicted = 0
+        self.rejected = 0
+        self.drain_failures = 0
+        self.outage = False
+        self._drain_window = []  # monotonic times of recent successful drains
+
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+
+    # --------------------- Recovery ---------------------
+    def _segment_path(self, number):
+        return os.path.join(self.directory, f"{number:08d}{_SEGMENT_SUFFIX}")
+
+    def _recover(self):
+        numbers = sorted(int(name[:-len(_SEGMENT_SUFFIX)]) for name in os.listdir(self.directory)
+                         if name.endswith(_SEGMENT_SUFFIX) and name[:-len(_SEGMENT_SUFFIX)].isdigit())
+        self._cursor = self._load_cursor(numbers)
+        for number in numbers:
+            if number < self._cursor[0]:
+                os.remove(self._segment_path(number))  # fully drained before the restart
+                continue
+            start = self._cursor[1] if number == self._cursor[0] else 0
+            records, valid_end, newest = self._scan_segment(number, start)
+            path = self._segment_path(number)
+            if valid_end < os.path.getsize(path):
+                logger.warning(f"Spool segment {number} has a torn tail - truncating to {valid_end} bytes")
+                with open(path, 'r+b') as f:
+                    f.truncate(valid_end)
+            self._segments[number] = {"size": valid_end, "bytes": valid_end - start, "records": records,
+                                      "newest": newest or os.path.getmtime(path)}
+        if self._segments and self._cursor[0] not in self._segments:
+            self._cursor = (min(self._segments), 0)
+        depth = self.depth()
+        if depth:
+            logger.info(f"Recovered upload spool with {depth} pending frames ({self.depth_bytes() / 1e6:.1f} MB)")
+
+    def _load_cursor(self, numbers):
+        try:
+            with open(os.path.join(self.directory, _CURSOR_FILE), 'r') as f:
+                data = json.load(f)
+            return int(data['segment']), int(data['offset'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return (numbers[0] if numbers else 0), 0
+
+    def _save_cursor(self):
+        path = os.path.join(self.directory, _CURSOR_FILE)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({"segment": self._cursor[0], "offset": self._cursor[1]}, f)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _scan_segment(self, number, start):
+        """Count valid records from `start`; returns (records, end of last valid record, newest timestamp)."""
+        records, offset, newest = 0, start, None
+        with open(self._segment_path(number), 'rb') as f:
+            f.seek(start)
+            while True:
+                record = self._read_record(f, number, offset)
+                if record is None:
+                    break
+                records += 1
+                offset = record.next_offset
+                newest = record.created
+        return records, offset, newest
+
+    @staticmethod
+    def _read_record(f, segment, offset):
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            return None
+        magic, meta_len, payload_len, crc, created = _HEADER.unpack(header)
+        if magic != _MAGIC:
+            return None
+        body = f.read(meta_len + payload_len)
+        if len(body) < meta_len + payload_len or zlib.crc32(body) != crc:
+            return None
+        try:
+            metadata = json.loads(body[:meta_len].decode('utf-8'))
+        except ValueError:
+            return None
+        next_offset = offset + _HEADER.size + meta_len + payload_len
+        return SpoolRecord(metadata, body[meta_len:], created, segment, offset, next_offset)
+
+    # --------------------- Writing ---------------------
+    def append(self, metadata, payload):
+        """Persist one encoded frame. `metadata` must be JSON serializable."""
+        meta = json.dumps(metadata).encode('utf-8')
+        payload = bytes(payload)
+        crc = zlib.crc32(payload, zlib.crc32(meta))
+        created = time.time()
+        record = _HEADER.pack(_MAGIC, len(meta), len(payload), crc, created) + meta + payload
+        with self.lock:
+            self._evict(len(record))
+            writer = self._open_writer(len(record))
+            writer.write(record)
+            writer.flush()
+            if self.fsync:
+                os.fsync(writer.fileno())
+            info = self._segments[self._write_segment]
+            info["size"] += len(record)
+            info["bytes"] += len(record)
+            info["records"] += 1
+            info["newest"] = created
+            self.appended += 1
+        self.wakeup.set()
+
+    def _open_writer(self, incoming):
+        info = self._segments.get(self._write_segment)
+        if self._writer is not None and info is not None and info["size"] + incoming <= self.segment_bytes:
+            return self._writer
+        if self._writer is not None:
+            self._writer.close()
+        number = max(self._segments) + 1 if self._segments else self._cursor[0]
+        self._writer = open(self._segment_path(number), 'ab')
+        self._write_segment = number
+        self._segments[number] = {"size": 0, "bytes": 0, "records": 0, "newest": time.time()}
+        if len(self._segments) == 1:
+            self._cursor = (number, 0)
+        return self._writer
+
+    # --------------------- Eviction ---------------------
+    def _evict(self, incoming=0):
+        """Drop the oldest segments while over the size cap or past the age cap. Caller holds the lock."""
+        now = time.time()
+        while self._segments:
+            oldest = min(self._segments)
+            info = self._segments[oldest]
+            over_size = self._depth_bytes() + incoming > self.max_bytes
+            too_old = self.max_age and info["records"] and now - info["newest"] > self.max_age
+            if not (over_size or too_old):
+                break
+            if oldest == self._write_segment:
+                if info["records"] == 0:
+                    break
+                # Never truncate the open segment in place - close it so it can be dropped whole
+                self._writer.close()
+                self._writer = None
+                self._write_segment = None
+            self._drop_segment(oldest)
+            if info["records"]:
+                self.evicted += info["records"]
+                logger.warning(f"Spool over {'size' if over_size else 'age'} cap - evicted {info['records']} "
+                               f"oldest frames")
+
+    def _drop_segment(self, number):
+        del self._segments[number]
+        try:
+            os.remove(self._segment_path(number))
+        except OSError:
+            pass
+        if self._cursor[0] == number:
+            self._cursor = (min(self._segments), 0) if self._segments else (number + 1, 0)
+            self._save_cursor()
+
+    # --------------------- Draining ---------------------
+    def start(self):
+        self.running = True
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._drain_loop, name="spool-drainer", daemon=True)
+        self.thread.start()
+        logger.info(f"Upload spool drainer started ({self.directory})")
+
+    def stop(self):
+        self.running = False
+        self.stopping.set()
+        self.wakeup.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+        with self.lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+                self._write_segment = None
+
+    def _next_record(self):
+        """Read the record at the cursor, moving past exhausted segments. Caller holds the lock."""
+        while self._segments:
+            number, offset = self._cursor
+            if number not in self._segments:
+                self._cursor = (min(self._segments), 0)
+                continue
+            with open(self._segment_path(number), 'rb') as f:
+                f.seek(offset)
+                record = self._read_record(f, number, offset)
+            if record is not None:
+                return record
+            if number == self._write_segment or number == max(self._segments):
+                return None  # caught up with the writer
+            self._drop_segment(number)
+        return None
+
+    def _advance(self, record):
+        info = self._segments.get(record.segment)
+        if info is not None:
+            info["bytes"] -= record.next_offset - record.offset
+            info["records"] -= 1
+        self._cursor = (record.segment, record.next_offset)
+        self._save_cursor()
+
+    def _drain_loop(self):
+        backoff = 1.0
+        last_report = time.monotonic()
+        while self.running:
+            with self.lock:
+                self._evict()
+                record = self._next_record()
+            if record is None:
+                self.wakeup.wait(timeout=5)
+                self.wakeup.clear()
+                continue
+
+            if self.max_age and time.time() - record.created > self.max_age:
+                with self.lock:
+                    self._advance(record)
+                    self.evicted += 1
+                continue
+
+            try:
+                self.send(record.metadata, record.payload)
+            except Exception as e:
+                if self.retryable is not None and not self.retryable(e):
+                    # The target is up and refused this frame - it would fail the same way forever
+                    backoff = 1.0
+                    self.outage = False
+                    with self.lock:
+                        self._advance(record)
+                        self.rejected += 1
+                    logger.error(f"Spooled frame {record.metadata.get('filename')} rejected ({e}) - dropping it")
+                    continue
+                self.drain_failures += 1
+                self.outage = True
+                logger.warning(f"Spool drain failed ({e}) - retrying in {backoff:.0f}s, {self.depth()} frames pending")
+                self.stopping.wait(timeout=backoff)
+                backoff = min(backoff * 2, 60.0)
+                continue
+
+            backoff = 1.0
+            self.outage = False
+            with self.lock:
+                self._advance(record)
+                self.drained += 1
+                self._drain_window.append(time.monotonic())
+            if time.monotonic() - last_report > 60:
+                last_report = time.monotonic()
+                logger.info(self.describe())
+            if self.drain_interval:
+                time.sleep(self.drain_interval)
+
+    # --------------------- Metrics ---------------------
+    def _depth(self):
+        return sum(info["records"] for info in self._segments.values())
+
+    def _depth_bytes(self):
+        return sum(info["bytes"] for info in self._segments.values())
+
+    def depth(self):
+        with self.lock:
+            return self._depth()
+
+    def depth_bytes(self):
+        with self.lock:
+            return self._depth_bytes()
+
+    def drain_throughput(self, window=60.0):
+        """Frames replayed per second over the last `window` seconds."""
+        cutoff = time.monotonic() - window
+        self._drain_window = [stamp for stamp in self._drain_window if stamp >= cutoff]
+        return len(self._drain_window) / window
+
+    def stats(self):
+        with self.lock:
+            return {
+                "depth": self._depth(),
+                "depth_bytes": self._depth_bytes(),
+                "appended": self.appended,
+                "drained": self.drained,
+                "evicted": self.evicted,
+                "rejected": self.rejected,
+                "drain_failures": self.drain_failures,
+                "drain_per_second": self.drain_throughput(),
+            }
+
+    def describe(self):
+        stats = self.stats()
+        return (f"Upload spool: {stats['depth']} pending ({stats['depth_bytes'] / 1e6:.1f} MB), "
+                f"{stats['drained']} drained ({stats['drain_per_second']:.2f}/s), {stats['evicted']} evicted")
@@ -0,0 +1,97 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+STARTUP_STATES = ('starting', 'ready', 'failed')
+
+
+# --------------------- Startup Tracker ---------------------
+class Startup:
+    """Runs independent start-up steps concurrently and records how long each took.
+
+    `submit(name, fn)` runs a step on a small thread pool and returns its Future;
+    `begin(name)`/`finish(name)` time steps that complete elsewhere (e.g. in an MQTT
+    callback) and `step(name)` times an inline block. The readiness state moves from
+    'starting' to 'ready' or 'failed' once the caller has waited on what it needs.
+    """
+
+    def __init__(self, max_workers=8):
+        self.started = time.monotonic()
+        self.state = 'starting'
+        self.ready = threading.Event()
+        self.finished = None  # monotonic time the state left 'starting'
+        self._lock = threading.Lock()
+        self._steps = {}  # name -> [start, end, error]
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="startup")
+
+    def begin(self, name):
+        with self._lock:
+            self._steps.setdefault(name, [time.monotonic(), None, None])
+
+    def finish(self, name, error=None):
+        with self._lock:
+            step = self._steps.setdefault(name, [self.started, None, None])
+            if step[1] is None:
+                step[1] = time.monotonic()
+                step[2] = error
+
+    def submit(self, name, fn, *args, **kwargs):
+        self.begin(name)
+
+        def run():
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                self.finish(name, error=e)
+                raise
+            self.finish(name)
+            return result
+
+        return self._executor.submit(run)
+
+    def step(self, name):
+        return _InlineStep(self, name)
+
+    def mark_ready(self):
+        self._set_state('ready')
+        self.ready.set()
+        self._executor.shutdown(wait=False)
+
+    def mark_failed(self):
+        self._set_state('failed')
+        self._executor.shutdown(wait=False)
+
+    def _set_state(self, state):
+        self.state = state
+        self.finished = time.monotonic()
+
+    def durations(self):
+        """{step: seconds} for finished steps, in start order."""
+        with self._lock:
+            steps = sorted(self._steps.items(), key=lambda item: item[1][0])
+        return {name: end - start for name, (start, end, _) in steps if end is not None}
+
+    def breakdown(self):
+        total = (self.finished or time.monotonic()) - self.started
+        parts = [f"{name} {seconds:.2f}s" for name, seconds in self.durations().items()]
+        with self._lock:
+            pending = [name for name, (_, end, _) in self._steps.items() if end is None]
+        parts += [f"{name} pending" for name in pending]
+        return f"{total:.2f}s total ({', '.join(parts)})"
+
+
+class _InlineStep:
+    def __init__(self, startup, name):
+        self.startup = startup
+        self.name = name
+
+    def __enter__(self):
+        self.startup.begin(self.name)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.startup.finish(self.name, error=exc)
+        return False
@@ -0,0 +1,130 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from spool import UploadSpool  # noqa: E402
+
+
+class Refused(Exception):
+    """Stands in for a 4xx response that will never succeed."""
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def segment_files(directory):
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.seg'))
+
+
+def test_refused_record_does_not_block_the_spool(tmp_path):
+    sent = []
+
+    def send(metadata, payload):
+        if metadata['filename'] == 'first':
+            raise Refused("404 Not Found")
+        sent.append(payload)
+
+    spool = UploadSpool(str(tmp_path), send, drain_rate=0, fsync=False,
+                        retryable=lambda error: not isinstance(error, Refused))
+    spool.append({"filename": "first"}, b'one')
+    spool.append({"filename": "second"}, b'two')
+    spool.start()
+    try:
+        assert wait_for(lambda: spool.depth() == 0)
+    finally:
+        spool.stop()
+    assert sent == [b'two']
+    assert spool.rejected == 1
+    assert spool.drained == 1
+    assert not spool.outage
+
+
+def test_retryable_failure_keeps_the_record(tmp_path):
+    attempts = []
+
+    def send(metadata, payload):
+        attempts.append(payload)
+        if len(attempts) == 1:
+            raise ConnectionError("MVI unreachable")
+
+    spool = UploadSpool(str(tmp_path), send, drain_rate=0, fsync=False,
+                        retryable=lambda error: not isinstance(error, Refused))
+    spool.append({"filename": "first"}, b'one')
+    spool.start()
+    try:
+        assert wait_for(lambda: spool.depth() == 0)
+    finally:
+        spool.stop()
+    assert attempts == [b'one', b'one']
+    assert spool.rejected == 0
+    assert spool.drain_failures == 1
+
+
+def test_appends_do_not_cut_the_backoff_short(tmp_path):
+    attempts = []
+
+    def send(metadata, payload):
+        attempts.append(payload)
+        raise ConnectionError("MVI unreachable")
+
+    spool = UploadSpool(str(tmp_path), send, drain_rate=0, fsync=False)
+    spool.append({"filename": "first"}, b'one')
+    spool.start()
+    try:
+        assert wait_for(lambda: spool.outage)
+        for i in range(5):  # frames spooled during the outage
+            spool.append({"filename": f"later-{i}"}, b'more')
+            time.sleep(0.05)
+        assert len(attempts) == 1  # still inside the first 1s backoff
+    finally:
+        spool.stop()
+
+
+def test_torn_tail_is_truncated_on_recovery(tmp_path):
+    spool = UploadSpool(str(tmp_path), lambda metadata, payload: None, fsync=False)
+    spool.append({"filename": "first"}, b'one')
+    spool.append({"filename": "second"}, b'two' * 100)
+    spool.stop()
+    segment, = segment_files(str(tmp_path))
+    with open(segment, 'r+b') as f:
+        f.truncate(os.path.getsize(segment) - 50)  # power lost in the middle of the second record
+
+    sent = []
+    recovered = UploadSpool(str(tmp_path), lambda metadata, payload: sent.append(payload),
+                            drain_rate=0, fsync=False)
+    assert recovered.depth() == 1
+    recovered.append({"filename": "third"}, b'three')  # lands after the truncated tail, not behind garbage
+    recovered.start()
+    try:
+        assert wait_for(lambda: recovered.depth() == 0)
+    finally:
+        recovered.stop()
+    assert sent == [b'one', b'three']
+
+
+def test_cursor_survives_a_restart(tmp_path):
+    sent = []
+    spool = UploadSpool(str(tmp_path), lambda metadata, payload: sent.append(payload), drain_rate=0, fsync=False)
+    spool.append({"filename": "first"}, b'one')
+    spool.start()
+    assert wait_for(lambda: spool.depth() == 0)
+    spool.stop()
+    spool.append({"filename": "second"}, b'two')
+    spool.stop()
+
+    recovered = UploadSpool(str(tmp_path), lambda metadata, payload: sent.append(payload),
+                            drain_rate=0, fsync=False)
+    assert recovered.depth() == 1
+    recovered.start()
+    try:
+        assert wait_for(lambda: recovered.depth() == 0)
+    finally:
+        recovered.stop()
+    assert sent == [b'one', b'two']  # the drained record is not replayed again
@@ -0,0 +1,89 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------- Token Manager ---------------------
+class TokenManager:
+    """Thread-safe owner of the MVI session token.
+
+    `get()` hands out the current token. Once it is older than `lifetime - refresh_margin`
+    a background refresh starts while callers keep using the old one; a token past
+    `lifetime` (or none at all) is refreshed before returning. `invalidate(token)` is
+    called with a token the server rejected (HTTP 401).
+
+    Refreshes are single-flight: callers that need a new token while one is being fetched
+    wait for it instead of authenticating again, and a caller holding a token that has
+    already been replaced gets the replacement without another round trip. A `lifetime`
+    of 0 disables age-based refreshes. `on_refresh(reason)` is called after every refresh
+    with 'initial', 'expiring', 'expired' or 'unauthorized'.
+    """
+
+    def __init__(self, authenticate, lifetime=3600.0, refresh_margin=300.0, on_refresh=None):
+        self._authenticate = authenticate
+        self.lifetime = lifetime
+        self.refresh_margin = min(refresh_margin, lifetime / 2) if lifetime else 0.0
+        self.on_refresh = on_refresh
+        self._lock = threading.Lock()  # guards the token state
+        self._refresh_lock = threading.Lock()  # held by the one caller that is authenticating
+        self._token = None
+        self._issued = None
+        self._background = False
+        self.refreshes = 0
+
+    @property
+    def age(self):
+        """Seconds since the current token was issued (None before the first one)."""
+        with self._lock:
+            return None if self._issued is None else time.monotonic() - self._issued
+
+    def get(self):
+        with self._lock:
+            token, issued = self._token, self._issued
+        if token is None:
+            return self._refresh(None, 'initial')
+        if self.lifetime:
+            age = time.monotonic() - issued
+            if age >= self.lifetime:
+                return self._refresh(token, 'expired')
+            if age >= self.lifetime - self.refresh_margin:
+                self._refresh_in_background(token)
+        return token
+
+    def invalidate(self, stale):
+        """`stale` was rejected by the server; return a token issued after it."""
+        return self._refresh(stale, 'unauthorized')
+
+    def _refresh(self, stale, reason):
+        with self._refresh_lock:
+            with self._lock:
+                if self._token is not None and self._token != stale:
+                    return self._token  # replaced while this caller waited
+            token = self._authenticate()
+            with self._lock:
+                self._token, self._issued = token, time.monotonic()
+                self.refreshes += 1
+        if reason != 'initial':
+            logger.info(f"MVI token refreshed ({reason})")
+        if self.on_refresh:
+            self.on_refresh(reason)
+        return token
+
+    def _refresh_in_background(self, stale):
+        with self._lock:
+            if self._background:
+                return
+            self._background = True
+
+        def run():
+            try:
+                self._refresh(stale, 'expiring')
+            except Exception as e:
+                logger.warning(f"Proactive token refresh failed ({e}) - keeping the current token")
+            finally:
+                with self._lock:
+                    self._background = False
+
+        threading.Thread(target=run, name="token-refresh", daemon=True).start()
@@ -0,0 +1,95 @@
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------- Connection Statistics ---------------------
+class ConnectionStats:
+    """Thread-safe counters for pooled connection reuse vs. new TCP/TLS handshakes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_new_connection(self):
+        with self._lock:
+            self.new_connections += 1
+
+    @property
+    def reused_connections(self):
+        with self._lock:
+            return max(0, self.requests - self.new_connections)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "reused_connections": max(0, self.requests - self.new_connections),
+            }
+
+
+class _CountingPoolMixin:
+    stats = None
+
+    def _new_conn(self):
+        conn = super()._new_conn()
+        if self.stats is not None:
+            self.stats.record_new_connection()
+        return conn
+
+
+# --------------------- Pooled Adapter ---------------------
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter with tuned pool sizes, default timeouts and handshake counters.
+
+    Connections are kept alive and reused across requests, so only the first request
+    to a host (or one after the server closes the connection) pays the TCP + TLS handshake.
+    """
+
+    def __init__(self, stats, pool_connections=4, pool_maxsize=8, timeout=(5, 30)):
+        self.stats = stats
+        self.timeout = timeout
+        super().__init__(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                         max_retries=0, pool_block=False)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        attrs = {"stats": self.stats}
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": type("CountingHTTPConnectionPool", (_CountingPoolMixin, HTTPConnectionPool), attrs),
+            "https": type("CountingHTTPSConnectionPool", (_CountingPoolMixin, HTTPSConnectionPool), attrs),
+        }
+
+    def send(self, request, timeout=None, **kwargs):
+        self.stats.record_request()
+        if timeout is None:
+            timeout = self.timeout
+        return super().send(request, timeout=timeout, **kwargs)
+
+
+def create_session(pool_connections=4, pool_maxsize=8, connect_timeout=5.0, read_timeout=30.0, stats=None):
+    """Build a requests.Session that shares one connection pool across all callers.
+
+    requests.Session is safe to share between threads for this usage (no per-request
+    mutation of session state), and pool_maxsize should be at least the number of
+    threads issuing requests concurrently so none of them fall back to throwaway connections.
+    """
+    stats = stats if stats is not None else ConnectionStats()
+    session = requests.Session()
+    adapter = PooledAdapter(stats, pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                            timeout=(connect_timeout, read_timeout))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.stats = stats
+    return session
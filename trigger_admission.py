@@ -0,0 +1,124 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+DEDUPE_MODES = ('off', 'payload', 'message-id')
+
+# Admission decisions; everything except 'admitted' means the trigger was not captured
+ADMITTED = 'admitted'
+COALESCED = 'coalesced'  # inside the debounce window of an admitted trigger
+DUPLICATE = 'duplicate'
+RATE_LIMITED = 'rate-limited'
+RETAINED = 'retained'
+
+
+# --------------------- Token Bucket ---------------------
+class TokenBucket:
+    """Allows `rate` events per second on average with bursts of up to `burst`."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def take(self, now=None):
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+
+# --------------------- Trigger Admission ---------------------
+class TriggerAdmission:
+    """Decides which MQTT trigger messages are turned into captures.
+
+    Checks run in order, each per MQTT topic:
+      - retained:     retained messages (replayed by the broker on every (re)subscribe)
+                      are ignored when `ignore_retained` is set
+      - duplicate:    the same payload, or the same `id_field` value in a JSON payload,
+                      seen within `dedupe_seconds` is dropped
+      - coalesced:    triggers within `debounce_ms` of the last admitted one fold into it
+      - rate-limited: a token bucket allows `rate` triggers per second with bursts of
+                      `burst`; 0 disables it
+    `admit()` returns one of the decision constants above.
+    """
+
+    def __init__(self, debounce_ms=0.0, rate=0.0, burst=1, dedupe='off', dedupe_seconds=5.0,
+                 id_field='id', ignore_retained=True):
+        if dedupe not in DEDUPE_MODES:
+            raise ValueError(f"trigger-dedupe must be one of {', '.join(DEDUPE_MODES)}, got '{dedupe}'")
+        if debounce_ms < 0 or rate < 0 or dedupe_seconds < 0:
+            raise ValueError("trigger debounce, rate and dedupe window must not be negative")
+        self.debounce = debounce_ms / 1000.0
+        self.rate = rate
+        self.burst = max(1, int(burst))
+        self.dedupe = dedupe
+        self.dedupe_seconds = dedupe_seconds
+        self.id_field = id_field
+        self.ignore_retained = ignore_retained
+        self._lock = threading.Lock()
+        self._last_admitted = {}  # topic -> monotonic time
+        self._buckets = {}  # topic -> TokenBucket
+        self._seen = OrderedDict()  # (topic, key) -> monotonic time, oldest first
+
+    def describe(self):
+        parts = []
+        if self.debounce:
+            parts.append(f"debounce {self.debounce * 1000:g}ms")
+        if self.rate:
+            parts.append(f"max {self.rate:g}/s (burst {self.burst})")
+        if self.dedupe != 'off':
+            parts.append(f"dedupe by {self.dedupe} over {self.dedupe_seconds:g}s")
+        if self.ignore_retained:
+            parts.append("retained ignored")
+        return ", ".join(parts) or "every trigger admitted"
+
+    def dedupe_key(self, payload):
+        if self.dedupe == 'payload':
+            return hashlib.blake2b(payload, digest_size=16).digest()
+        if self.dedupe == 'message-id':
+            try:
+                data = json.loads(payload.decode() or 'null')
+            except (ValueError, UnicodeDecodeError):
+                return None
+            if isinstance(data, dict) and data.get(self.id_field) is not None:
+                return str(data[self.id_field])
+        return None
+
+    def admit(self, topic, payload, retain=False, now=None):
+        now = time.monotonic() if now is None else now
+        if retain and self.ignore_retained:
+            return RETAINED
+        key = self.dedupe_key(payload) if self.dedupe != 'off' else None
+        with self._lock:
+            if key is not None:
+                self._expire_seen(now)
+                if (topic, key) in self._seen:
+                    return DUPLICATE
+            last = self._last_admitted.get(topic)
+            if last is not None and now - last < self.debounce:
+                return COALESCED
+            if self.rate:
+                bucket = self._buckets.get(topic)
+                if bucket is None:
+                    bucket = self._buckets[topic] = TokenBucket(self.rate, self.burst)
+                if not bucket.take(now):
+                    return RATE_LIMITED
+            self._last_admitted[topic] = now
+            if key is not None:
+                self._seen[(topic, key)] = now
+        return ADMITTED
+
+    def _expire_seen(self, now):
+        # Caller holds the lock
+        while self._seen:
+            seen_at = next(iter(self._seen.values()))
+            if now - seen_at < self.dedupe_seconds:
+                break
+            self._seen.popitem(last=False)
@@ -0,0 +1,171 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_MODES = ('single', 'pipelined', 'multipart')
+
+
+# --------------------- Upload Item ---------------------
+@dataclass
+class UploadItem:
+    """One encoded frame waiting to be sent to `destination`."""
+    image: Any  # EncodedImage
+    destination: str
+    filename: str
+    job: Any = None  # the CaptureJob it came from
+    queued: float = field(default_factory=time.monotonic)
+
+
+# --------------------- Upload Batcher ---------------------
+class UploadBatcher:
+    """Collects encoded frames and uploads them in batches.
+
+    A batch closes when it holds `max_batch` frames or `linger` seconds after its first
+    frame arrived, then it is sent as:
+      - pipelined: one request per frame, all in flight at once on pooled connections
+      - multipart: one request per destination carrying every frame for it as
+                   separate file parts; falls back to pipelined for good if the
+                   endpoint rejects multi-file requests
+    Batches do not wait for each other, but at most `max_batch` frames are on the wire
+    at a time. `send_one(item)` and `send_many(destination, items)` do the HTTP work and
+    raise on failure. `on_done(item, error, started)` runs once per frame with error None
+    on success, `on_batch(frames)` once per batch. `submit()` blocks while `queue_depth`
+    frames are already waiting, which pushes back on the encode workers instead of
+    buffering without limit.
+    """
+
+    def __init__(self, send_one: Callable[[UploadItem], None],
+                 send_many: Optional[Callable[[str, list], None]] = None,
+                 on_done: Optional[Callable[[UploadItem, Optional[BaseException], float], None]] = None,
+                 on_batch: Optional[Callable[[int], None]] = None,
+                 mode='pipelined', max_batch=8, linger=0.02, queue_depth=32, name='upload-batch'):
+        if mode not in UPLOAD_MODES[1:]:
+            raise ValueError(f"Invalid batch upload mode '{mode}' (must be one of {', '.join(UPLOAD_MODES[1:])})")
+        if mode == 'multipart' and send_many is None:
+            raise ValueError("multipart uploads need send_many")
+        self.send_one = send_one
+        self.send_many = send_many
+        self.on_done = on_done
+        self.on_batch = on_batch
+        self.mode = mode
+        self.max_batch = max(1, int(max_batch))
+        self.linger = max(0.0, linger)
+        self.name = name
+        self.queue = queue.Queue(maxsize=max(self.max_batch, int(queue_depth)))
+        self.pool = ThreadPoolExecutor(max_workers=self.max_batch, thread_name_prefix=name)
+        self._in_flight = threading.Semaphore(self.max_batch)
+        self.batches = 0
+        self.frames = 0
+        self.running = False
+        self._thread = None
+
+    def describe(self):
+        return f"{self.mode}, up to {self.max_batch} frames per batch, linger {self.linger * 1000:g}ms"
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        logger.info(f"Batched uploads started ({self.describe()})")
+
+    def submit(self, item: UploadItem):
+        self.queue.put(item)
+
+    def qsize(self):
+        return self.queue.qsize()
+
+    def _collect(self):
+        """Block for the first frame, then gather more until the batch is full or the linger ends."""
+        try:
+            batch = [self.queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.linger
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while self.running or not self.queue.empty():
+            batch = self._collect()
+            if not batch:
+                continue
+            for _ in batch:
+                self._in_flight.acquire()
+            self.batches += 1
+            self.frames += len(batch)
+            if self.on_batch:
+                self.on_batch(len(batch))
+            logger.debug(f"{self.name}: sending {len(batch)} frames ({self.mode})")
+            started = time.monotonic()
+            if self.mode == 'multipart':
+                groups = {}
+                for item in batch:
+                    groups.setdefault(item.destination, []).append(item)
+                for destination, items in groups.items():
+                    self.pool.submit(self._send_group, destination, items, started)
+            else:
+                for item in batch:
+                    self.pool.submit(self._send_item, item, started)
+
+    def _send_item(self, item, started):
+        try:
+            self.send_one(item)
+        except Exception as e:
+            self._done(item, e, started)
+            return
+        self._done(item, None, started)
+
+    def _send_group(self, destination, items, started):
+        try:
+            self.send_many(destination, items)
+        except Exception as e:
+            if len(items) > 1 and self._rejects_multipart(e):
+                logger.warning(f"{self.name}: endpoint rejected a multi-file upload ({e}) - "
+                               f"switching to pipelined uploads")
+                self.mode = 'pipelined'
+                for item in items:
+                    self.pool.submit(self._send_item, item, started)
+                return
+            for item in items:
+                self._done(item, e, started)
+            return
+        for item in items:
+            self._done(item, None, started)
+
+    @staticmethod
+    def _rejects_multipart(error):
+        response = getattr(error, 'response', None)
+        return response is not None and response.status_code in (400, 413, 415, 422)
+
+    def _done(self, item, error, started):
+        try:
+            if self.on_done is not None:
+                self.on_done(item, error, started)
+            elif error is not None:
+                logger.error(f"{self.name}: upload of {item.filename} failed: {error}")
+        except Exception as e:
+            logger.error(f"{self.name}: upload of {item.filename} failed: {e}")
+        finally:
+            self._in_flight.release()
+            self.queue.task_done()
+
+    def stop(self, timeout=5.0):
+        """Send what is queued and in flight (within `timeout`) and stop."""
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.running = False
+        if self._thread:
+            self._thread.join(timeout=max(0.0, deadline - time.monotonic()))
+        self.pool.shutdown(wait=False)
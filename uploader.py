@@ -16,14 +16,39 @@ from logging.handlers import RotatingFileHandler
 import signal
 import tenacity
 import platform
+import json
+import uuid
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Optional
+from pipeline import CapturePipeline, CaptureJob, DROP_POLICIES
+from transport import create_session
+from frame_buffer import FrameRing
+from capture_schedule import CaptureScheduler, IDLE_MODES
+from frame_quality import FrameQualityChecker, QUALITY_ISSUES, is_black
+from preprocess import Preprocessor
+from rtsp import RtspOptions, open_rtsp_capture, video_capture
+from file_source import FileCapture, FileOptions
+from snapshot import SnapshotClient, SnapshotTimeout
+from encoders import create_encoder, decode_jpeg, EncodedImage, IMAGE_FORMATS
+from encode_pool import EncodeExecutor
+from spool import UploadSpool
+from upload_batch import UploadBatcher, UploadItem, UPLOAD_MODES
+from metrics import MetricsRegistry, start_metrics_server
+from startup import Startup
+from token_manager import TokenManager
+from trigger_admission import TriggerAdmission, ADMITTED, COALESCED
+from motion import MotionDetector, MotionWatcher
 
 # Optional imports with graceful fallbacks
 try:
-    from picamera2 import Picamera2  # Raspberry Pi specific
+    from picamera2 import Picamera2, MappedArray  # Raspberry Pi specific
     PICAMERA_AVAILABLE = True
 except ImportError:
     PICAMERA_AVAILABLE = False
     Picamera2 = None
+    MappedArray = None
 
 try:
     from watchdog.observers import Observer
@@ -55,7 +80,7 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 # --------------------- Load Configuration ---------------------
 CONFIG_FILE = "camera_edge_config.yaml"
-CONFIG_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_DIR = os.environ.get('DRAGONFLY_CONFIG_DIR') or os.path.dirname(os.path.abspath(__file__))
 
 def load_config():
     config_path = os.path.join(CONFIG_DIR, CONFIG_FILE)
@@ -100,13 +125,9 @@ mvi_password = os.environ.get('MVI_PASSWORD', config.get('mvi-password', '').str
 
 # MVI Config
 mvi_endpoint_base = config.get('mvi-edge-endpoint', '').strip()
-mvi_device_uuid = config.get('mvi-device-uuid', '').strip()
 if not mvi_endpoint_base or not mvi_username or not mvi_password:
     logger.error("Missing MVI endpoint or credentials")
     sys.exit(1)
-if not mvi_device_uuid:
-    logger.error("Missing MVI device UUID")
-    sys.exit(1)
 
 # MQTT Config
 mqtt_broker = config.get('mqtt-broker', '').strip()
@@ -115,175 +136,638 @@ mqtt_username = os.environ.get('MQTT_USERNAME', config.get('mqtt-username', ''))
 mqtt_password = os.environ.get('MQTT_PASSWORD', config.get('mqtt-password', ''))
 mqtt_tls_required = config.get('mqtt-tls-required', True)
 mqtt_tls_file = config.get('mqtt-tls-file-name', '').strip()
-mqtt_topic = config.get('mqtt-trigger-topic', '').strip()
 
-if not mqtt_broker or not mqtt_topic:
-    logger.error("Missing MQTT broker or topic")
+if not mqtt_broker:
+    logger.error("Missing MQTT broker")
     sys.exit(1)
 
 if mqtt_tls_required and not mqtt_tls_file:
     logger.error("TLS required but no CA cert file specified")
     sys.exit(1)
 
-# Camera Config
-camera_type = config.get('camera-type', DEFAULT_CAMERA_TYPE).upper()
-camera_ip = config.get('camera-ip', '').strip() if camera_type == 'RTSP' else None
-camera_device = config.get('camera-device', None)
-camera_width = int(config.get('camera-width', 1920))
-camera_height = int(config.get('camera-height', 1080))
-gamma = float(config.get('gamma', 1.5))
+# Capture Config (shared by all cameras)
 warm_up_frames = int(config.get('warm-up-frames', 15))
 keep_alive_interval = int(config.get('keep-alive-interval', 300))
+frame_buffer_slots = max(2, int(config.get('frame-buffer-slots', 3)))
+trigger_max_offset_ms = float(config.get('trigger-max-offset-ms', 1000))
+burst_correlation_id = bool(config.get('burst-correlation-id', True))
+burst_max_spread_ms = float(config.get('burst-max-spread-ms', 50))
+
+# Frame Quality Config (checks run on a small thumbnail, not the full frame)
+frame_quality_black_threshold = float(config.get('frame-quality-black-threshold', 5))
+frame_quality_blur_threshold = float(config.get('frame-quality-blur-threshold', 0))  # 0 disables
+frame_quality_dark_fraction = float(config.get('frame-quality-dark-fraction', 0.6))
+frame_quality_bright_fraction = float(config.get('frame-quality-bright-fraction', 0.25))
+frame_quality_reject = [str(issue).lower() for issue in (config.get('frame-quality-reject', ['black', 'frozen']) or [])]
+for issue in frame_quality_reject:
+    if issue not in QUALITY_ISSUES:
+        logger.error(f"Invalid frame-quality-reject entry '{issue}' (must be one of {', '.join(QUALITY_ISSUES)})")
+        sys.exit(1)
+
+# Trigger Admission Config (protects capture and upload from MQTT trigger storms)
+try:
+    trigger_admission = TriggerAdmission(
+        debounce_ms=float(config.get('trigger-debounce-ms', 100)),
+        rate=float(config.get('trigger-rate-limit', 5)),  # per topic, 0 disables
+        burst=int(config.get('trigger-rate-burst', 10)),
+        dedupe=str(config.get('trigger-dedupe', 'off')).lower(),
+        dedupe_seconds=float(config.get('trigger-dedupe-seconds', 5)),
+        id_field=str(config.get('trigger-id-field', 'id')),
+        ignore_retained=bool(config.get('trigger-ignore-retained', True)))
+except ValueError as e:
+    logger.error(f"Invalid trigger admission settings: {e}")
+    sys.exit(1)
+
+# Upload Pipeline Config
+upload_queue_depth = int(config.get('upload-queue-depth', 8))
+upload_workers = int(config.get('upload-workers', 2))
+upload_drop_policy = str(config.get('upload-drop-policy', 'drop-oldest')).lower()
+if upload_drop_policy not in DROP_POLICIES:
+    logger.error(f"Invalid upload-drop-policy '{upload_drop_policy}' (must be one of {', '.join(DROP_POLICIES)})")
+    sys.exit(1)
+upload_mode = str(config.get('upload-mode', 'single')).lower()  # single, pipelined or multipart
+upload_batch_size = int(config.get('upload-batch-size', 8))
+upload_batch_linger_ms = float(config.get('upload-batch-linger-ms', 20))
+if upload_mode not in UPLOAD_MODES:
+    logger.error(f"Invalid upload-mode '{upload_mode}' (must be one of {', '.join(UPLOAD_MODES)})")
+    sys.exit(1)
+
+# Image Encoding Config
+image_format = str(config.get('image-format', 'png')).lower()
+png_compression = config.get('png-compression', None)  # None keeps OpenCV's fast default
+jpeg_quality = int(config.get('jpeg-quality', 95))
+webp_quality = int(config.get('webp-quality', 90))
+encode_workers = int(config.get('encode-workers', 0))  # 0 = one per CPU core
+encode_tiles = int(config.get('encode-tiles', 0))  # PNG bands compressed in parallel, 0 = one per encode worker
+if image_format not in IMAGE_FORMATS:
+    logger.error(f"Invalid image-format '{image_format}' (must be one of {', '.join(IMAGE_FORMATS)})")
+    sys.exit(1)
+
+# Upload Spool Config (store-and-forward when MVI is unreachable)
+spool_enabled = bool(config.get('spool-enabled', True))
+spool_dir = os.path.join(CONFIG_DIR, config.get('spool-dir', 'spool'))
+spool_max_mb = float(config.get('spool-max-mb', 512))
+spool_max_age_hours = float(config.get('spool-max-age-hours', 24))
+spool_drain_rate = float(config.get('spool-drain-rate', 2))
+
+# HTTP Transport Config (shared keep-alive connection pool)
+# Batched modes keep up to upload-batch-size requests in flight on top of the workers' own
+http_pool_size = int(config.get('http-pool-size', max(4, upload_workers + 2 + (upload_batch_size if upload_mode != 'single' else 0))))
+http_connect_timeout = float(config.get('http-connect-timeout', 5))
+http_read_timeout = float(config.get('http-read-timeout', 30))
+
+# MVI Token Config (refreshed in the background this long before it would expire)
+mvi_token_lifetime = float(config.get('mvi-token-lifetime', 3600))  # 0 = only refresh after a 401
+mvi_token_refresh_margin = float(config.get('mvi-token-refresh-margin', 300))
 
 # SSL Verification
 mvi_ca_cert = config.get('mvi-ca-cert', None)
 verify_ssl = mvi_ca_cert if mvi_ca_cert else False
 
-# Camera Config for JPEG (on-demand single snapshot)
-if camera_type == 'JPEG':
-    camera_jpeg_endpoint = config.get('camera-jpeg-endpoint', '').strip()
-    camera_jpeg_username = os.environ.get('JPEG_USERNAME', config.get('camera-jpeg-username', '').strip())
-    camera_jpeg_password = os.environ.get('JPEG_PASSWORD', config.get('camera-jpeg-password', '').strip())
-    camera_jpeg_protocol = config.get('camera-jpeg-protocol', 'http').lower()
-    if camera_jpeg_protocol not in ['http', 'https']:
-        logger.error("Invalid camera-jpeg-protocol (must be 'http' or 'https')")
-        sys.exit(1)
-else:
-    camera_jpeg_endpoint = None
-    camera_jpeg_username = None
-    camera_jpeg_password = None
-    camera_jpeg_protocol = None
+# Metrics Config (Prometheus-style /metrics endpoint)
+metrics_enabled = bool(config.get('metrics-enabled', True))
+metrics_host = config.get('metrics-host', '0.0.0.0')
+metrics_port = int(config.get('metrics-port', 9108))
+
+# --------------------- Metrics ---------------------
+metrics = MetricsRegistry(prefix='dragonfly_')
+frames_captured = metrics.counter('frames_captured_total', 'Frames read from the camera', ['camera'])
+frame_read_failures = metrics.counter('frame_read_failures_total', 'Failed camera frame reads', ['camera'])
+camera_reopens = metrics.counter('camera_reopens_total', 'Camera reopen attempts by the grabber thread', ['camera'])
+camera_recoveries = metrics.counter('camera_recoveries_total', 'Grabber restarts after missing frames',
+                                    ['camera', 'result'])
+triggers_received = metrics.counter('triggers_total', 'Capture triggers per camera', ['camera'])
+trigger_capture_seconds = metrics.histogram('trigger_capture_seconds', 'Trigger arrival to frame captured',
+                                            ['camera'])
+trigger_upload_seconds = metrics.histogram('trigger_to_upload_seconds', 'Trigger arrival to upload finished',
+                                           ['camera'])
+encode_seconds = metrics.histogram('encode_seconds', 'Frame encode time', ['format'])
+upload_seconds = metrics.histogram('upload_seconds', 'Upload request time including retries')
+upload_batch_frames = metrics.histogram('upload_batch_frames', 'Frames sent per upload batch',
+                                        buckets=(1, 2, 4, 8, 16, 32))
+upload_retries = metrics.counter('upload_retries_total', 'Upload attempts that were retried')
+uploads_total = metrics.counter('uploads_total', 'Finished uploads by outcome', ['result'])
+burst_spread_seconds = metrics.histogram('burst_spread_seconds', 'Capture timestamp spread across a burst',
+                                         buckets=(0.001, 0.005, 0.01, 0.02, 0.033, 0.05, 0.1, 0.25))
+keep_alives = metrics.counter('keepalive_total', 'MVI keep-alive calls by outcome', ['result'])
+reauthentications = metrics.counter('reauthentications_total', 'MVI re-authentications after 401')
+token_refreshes = metrics.counter('token_refreshes_total', 'MVI token refreshes by reason', ['reason'])
+frame_quality_issues = metrics.counter('frame_quality_issues_total', 'Frames failing a quality check',
+                                       ['camera', 'issue', 'action'])
+preprocess_seconds = metrics.histogram('preprocess_seconds', 'Frame preprocessing time per stage', ['stage'])
+mqtt_messages = metrics.counter('mqtt_messages_total', 'MQTT trigger messages received', ['topic'])
+mqtt_connects = metrics.counter('mqtt_connects_total', 'MQTT connection attempts by outcome', ['result'])
+mqtt_disconnects = metrics.counter('mqtt_disconnects_total', 'MQTT disconnections')
+triggers_coalesced = metrics.counter('triggers_coalesced_total', 'MQTT triggers folded into an earlier one by the debounce',
+                                     ['topic'])
+jpeg_snapshot_seconds = metrics.histogram('jpeg_snapshot_seconds', 'JPEG snapshot fetch time from the trigger',
+                                          ['camera'])
+jpeg_snapshot_failures = metrics.counter('jpeg_snapshot_failures_total', 'JPEG snapshots not obtained by reason',
+                                         ['camera', 'reason'])
+motion_triggers = metrics.counter('motion_triggers_total', 'Captures fired by the motion trigger', ['camera'])
+motion_check_seconds = metrics.histogram('motion_check_seconds', 'Motion check time per frame', ['camera'],
+                                         buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05))
+triggers_dropped = metrics.counter('triggers_dropped_total', 'MQTT triggers not captured (duplicate, rate-limited, retained)',
+                                   ['topic', 'reason'])
+
+# --------------------- Startup (authentication, MQTT and cameras start concurrently) ---------------------
+startup = Startup()
+mqtt_connected = threading.Event()
+
+def readiness():
+    """(ready, detail) for the /ready endpoint: started up and connected to the MQTT broker."""
+    if startup.state == 'ready' and not mqtt_connected.is_set():
+        return False, "degraded: MQTT disconnected"
+    return startup.state == 'ready', f"{startup.state}: startup {startup.breakdown()}"
+
+metrics.callback('ready', 'Started up and connected to MQTT (1) or not (0)', lambda: int(readiness()[0]))
+metrics.callback('startup_step_seconds', 'Time each start-up step took',
+                 lambda: {(name,): seconds for name, seconds in startup.durations().items()}, labelnames=['step'])
+
+# Served from the start so supervisors can watch /ready while cameras warm up
+metrics_server = None
+if metrics_enabled:
+    try:
+        metrics_server = start_metrics_server(metrics, metrics_host, metrics_port, readiness=readiness)
+    except OSError as e:
+        logger.error(f"Failed to start metrics endpoint on {metrics_host}:{metrics_port}: {e}")
 
-# Validate camera type
-allowed_types = ['USB', 'RTSP', 'JPEG']
+# --------------------- Camera Definitions ---------------------
+allowed_types = ['USB', 'RTSP', 'JPEG', 'FILE']
 if host_platform == 'RPI' and PICAMERA_AVAILABLE:
     allowed_types.append('PICAM')
 
-if camera_type not in allowed_types:
-    logger.error(f"Invalid camera-type '{camera_type}' for platform {host_platform}")
-    sys.exit(1)
+@dataclass
+class CameraDefinition:
+    name: str
+    camera_type: str
+    width: int
+    height: int
+    topic: str
+    device_uuid: str
+    camera_ip: Optional[str] = None
+    camera_device: Any = None
+    jpeg_endpoint: Optional[str] = None
+    jpeg_username: Optional[str] = None
+    jpeg_password: Optional[str] = None
+    jpeg_protocol: Optional[str] = None
+    jpeg_timeout_ms: float = 5000.0  # hard deadline per snapshot, from the trigger
+    jpeg_concurrency: int = 2  # snapshots in flight at once
+    jpeg_keep_warm_seconds: float = 0.0  # 0 = only warm the connection at start-up
+    preprocess: dict = field(default_factory=dict)  # Preprocessor keyword arguments
+    rtsp: Optional[RtspOptions] = None
+    camera_file: Optional[str] = None  # FILE: video file or image directory to replay
+    file: Optional[FileOptions] = None
+    idle_mode: str = 'full'  # what the grabber does between triggers (see CaptureScheduler)
+    armed_seconds: float = 30.0
+    idle_fps: float = 1.0
+    arm_topic: str = ''  # optional MQTT topic that arms the camera ahead of a trigger
+    motion: dict = field(default_factory=dict)  # MotionDetector keyword arguments, empty when off
+    motion_delay_ms: float = 0.0  # capture this long after the frame that showed motion
 
-if camera_type == 'RTSP':
-    if not camera_ip:
-        logger.error("RTSP selected but no camera-ip provided")
-        sys.exit(1)
-    if not camera_ip.startswith('rtsp://'):
-        camera_ip = f'rtsp://{camera_ip}'
+def camera_name(entry, index):
+    return str(entry.get('name', f"camera{index}" if index else "camera"))
+
+def preprocess_settings(entry):
+    """Preprocessing keys for one `cameras:` entry, falling back to the top-level config."""
+    def setting(key, default=None):
+        return entry.get(key, config.get(key, default))
+
+    return {
+        "crop": setting('crop'),
+        "resize": setting('resize'),
+        "rotate": setting('rotate', 0),
+        "gamma": setting('gamma', 1.0),
+        "white_balance": setting('white-balance'),
+    }
+
+def motion_settings(entry):
+    """MotionDetector keyword arguments for one `cameras:` entry, or {} when motion triggers are off."""
+    def setting(key, default=None):
+        return entry.get(key, config.get(key, default))
+
+    if not bool(setting('motion-trigger', False)):
+        return {}
+    return {
+        "method": str(setting('motion-method', 'diff')).lower(),
+        "roi": setting('motion-roi'),
+        "threshold": setting('motion-threshold'),
+        "min_area": float(setting('motion-min-area', 0.01)),
+        "cooldown": float(setting('motion-cooldown-seconds', 2)),
+        "background_rate": float(setting('motion-background-rate', 0.05)),
+        "max_width": int(setting('motion-max-width', 160)),
+    }
 
-if camera_type == 'JPEG':
-    if not camera_jpeg_endpoint:
-        logger.error("JPEG selected but no camera-jpeg-endpoint provided")
+def parse_camera_definition(entry, index):
+    """Validate one `cameras:` entry. Keys missing from the entry fall back to the top-level config."""
+    def setting(key, default=None):
+        value = entry.get(key, config.get(key, default))
+        return value.strip() if isinstance(value, str) else value
+
+    name = camera_name(entry, index)
+    camera_type = str(setting('camera-type', DEFAULT_CAMERA_TYPE)).upper()
+    definition = CameraDefinition(
+        name=name,
+        camera_type=camera_type,
+        width=int(setting('camera-width', 1920)),
+        height=int(setting('camera-height', 1080)),
+        topic=setting('mqtt-trigger-topic', '') or '',
+        device_uuid=setting('mvi-device-uuid', '') or '',
+        camera_device=setting('camera-device', None),
+        preprocess=preprocess_settings(entry),
+        idle_mode=str(setting('capture-idle-mode', 'full')).lower(),
+        armed_seconds=float(setting('capture-armed-seconds', 30)),
+        idle_fps=float(setting('capture-idle-fps', 1)),
+        arm_topic=setting('mqtt-arm-topic', '') or '',
+        motion=motion_settings(entry),
+        motion_delay_ms=float(setting('motion-capture-delay-ms', 0)),
+    )
+
+    if camera_type == 'FILE':
+        camera_file = setting('camera-file', '')
+        if not camera_file:
+            logger.error(f"[{name}] FILE selected but no camera-file provided")
+            sys.exit(1)
+        definition.camera_file = os.path.join(CONFIG_DIR, os.path.expanduser(camera_file))
+        every_frame = bool(setting('file-upload-every-frame', False))
+        loop = bool(setting('file-loop', True))
+        if every_frame and loop:
+            # Looping would upload the whole archive again and again
+            logger.warning(f"[{name}] file-upload-every-frame replays the source once - ignoring file-loop")
+            loop = False
+        try:
+            definition.file = FileOptions(
+                pacing=str(setting('file-pacing', 'realtime')).lower(),
+                fps=float(setting('file-fps', 0)),
+                loop=loop,
+                prefetch=int(setting('file-prefetch', 4)),
+                every_frame=every_frame,
+            ).validate()
+        except ValueError as e:
+            logger.error(f"[{name}] {e}")
+            sys.exit(1)
+        if definition.idle_mode != 'full':
+            # Idling skips frames, which a replay must not lose; pacing already sets its rate
+            logger.info(f"[{name}] FILE cameras always capture at full rate - ignoring "
+                        f"capture-idle-mode '{definition.idle_mode}'")
+            definition.idle_mode = 'full'
+
+    self_triggered = definition.motion or (definition.file is not None and definition.file.every_frame)
+    if not definition.topic and not self_triggered:
+        logger.error(f"[{name}] Missing MQTT trigger topic (or motion-trigger)")
+        sys.exit(1)
+    if not definition.device_uuid:
+        logger.error(f"[{name}] Missing MVI device UUID")
         sys.exit(1)
+    if camera_type not in allowed_types:
+        logger.error(f"[{name}] Invalid camera-type '{camera_type}' for platform {host_platform}")
+        sys.exit(1)
+    if definition.idle_mode not in IDLE_MODES:
+        logger.error(f"[{name}] Invalid capture-idle-mode '{definition.idle_mode}' "
+                     f"(must be one of {', '.join(IDLE_MODES)})")
+        sys.exit(1)
+    try:
+        Preprocessor(**definition.preprocess)
+    except (ValueError, TypeError) as e:
+        logger.error(f"[{name}] Invalid preprocessing settings: {e}")
+        sys.exit(1)
+    if definition.motion:
+        try:
+            MotionDetector(**definition.motion)
+        except (ValueError, TypeError) as e:
+            logger.error(f"[{name}] Invalid motion trigger settings: {e}")
+            sys.exit(1)
+        if camera_type == 'JPEG' or definition.idle_mode == 'grab':
+            logger.error(f"[{name}] motion-trigger needs decoded frames between triggers "
+                         f"(not camera-type JPEG or capture-idle-mode grab)")
+            sys.exit(1)
+
+    if camera_type == 'RTSP':
+        camera_ip = setting('camera-ip', '')
+        if not camera_ip:
+            logger.error(f"[{name}] RTSP selected but no camera-ip provided")
+            sys.exit(1)
+        if not camera_ip.startswith('rtsp://'):
+            camera_ip = f'rtsp://{camera_ip}'
+        definition.camera_ip = camera_ip
+        try:
+            definition.rtsp = RtspOptions(
+                backend=str(setting('rtsp-backend', 'opencv')).lower(),
+                transport=str(setting('rtsp-transport', 'tcp')).lower(),
+                low_latency=bool(setting('rtsp-low-latency', True)),
+                decode=str(setting('rtsp-decode', 'all')).lower(),
+                hw_decode=bool(setting('rtsp-hw-decode', False)),
+            ).validate()
+        except ValueError as e:
+            logger.error(f"[{name}] {e}")
+            sys.exit(1)
+        if definition.motion and definition.rtsp.decode == 'on-demand':
+            logger.error(f"[{name}] motion-trigger needs decoded frames (not rtsp-decode on-demand)")
+            sys.exit(1)
+
+    # Camera Config for JPEG (on-demand single snapshot)
+    if camera_type == 'JPEG':
+        definition.jpeg_endpoint = setting('camera-jpeg-endpoint', '')
+        definition.jpeg_username = entry.get('camera-jpeg-username') or os.environ.get(
+            'JPEG_USERNAME', config.get('camera-jpeg-username', '').strip())
+        definition.jpeg_password = entry.get('camera-jpeg-password') or os.environ.get(
+            'JPEG_PASSWORD', config.get('camera-jpeg-password', '').strip())
+        definition.jpeg_protocol = str(setting('camera-jpeg-protocol', 'http')).lower()
+        if definition.jpeg_protocol not in ['http', 'https']:
+            logger.error(f"[{name}] Invalid camera-jpeg-protocol (must be 'http' or 'https')")
+            sys.exit(1)
+        if not definition.jpeg_endpoint:
+            logger.error(f"[{name}] JPEG selected but no camera-jpeg-endpoint provided")
+            sys.exit(1)
+        definition.jpeg_timeout_ms = float(setting('camera-jpeg-timeout-ms', 5000))
+        definition.jpeg_concurrency = int(setting('camera-jpeg-concurrency', 2))
+        definition.jpeg_keep_warm_seconds = float(setting('camera-jpeg-keep-warm-seconds', 0))
+        if definition.jpeg_timeout_ms <= 0 or definition.jpeg_concurrency < 1:
+            logger.error(f"[{name}] camera-jpeg-timeout-ms and camera-jpeg-concurrency must be positive")
+            sys.exit(1)
+    return definition
+
+# A `cameras:` list runs several cameras in one process; without it the top-level keys describe a single camera
+camera_entries = config.get('cameras') or [{}]
+camera_definitions = [parse_camera_definition(entry or {}, i) for i, entry in enumerate(camera_entries)]
+if len({definition.name for definition in camera_definitions}) != len(camera_definitions):
+    logger.error("Camera names must be unique")
+    sys.exit(1)
 
 # --------------------- Authentication ---------------------
 session_url = f"https://{mvi_endpoint_base}/users/sessions"
-device_endpoint = f"https://{mvi_endpoint_base}/devices/images?uuid={mvi_device_uuid}"
+device_endpoint_template = f"https://{mvi_endpoint_base}/devices/images?uuid={{uuid}}"
 keep_alive_url = f"https://{mvi_endpoint_base}/users/sessions/keepalive"
 
+# One pooled session for every MVI and camera request so uploads reuse open TLS connections
+http_session = create_session(pool_maxsize=http_pool_size, connect_timeout=http_connect_timeout,
+                              read_timeout=http_read_timeout)
+
 @tenacity.retry(stop=tenacity.stop_after_attempt(5), wait=tenacity.wait_exponential(multiplier=1, min=4, max=10))
 def authenticate():
     data = {"grant_type": "password", "password": mvi_password, "user": mvi_username}
-    response = requests.post(session_url, json=data, verify=verify_ssl)
+    response = http_session.post(session_url, json=data, verify=verify_ssl)
     response.raise_for_status()
     return response.json()['token']
 
-try:
-    token = authenticate()
-    logger.info("Authenticated successfully with MVI")
-except Exception as e:
-    logger.error(f"Authentication failed after retries: {e}")
-    sys.exit(1)
+def record_token_refresh(reason):
+    token_refreshes.inc(reason=reason)
+    if reason == 'unauthorized':
+        reauthentications.inc()
+
+# Shared by uploads, the spool drainer and keep-alive; only one of them re-authenticates at a time
+mvi_tokens = TokenManager(authenticate, lifetime=mvi_token_lifetime, refresh_margin=mvi_token_refresh_margin,
+                          on_refresh=record_token_refresh)
+metrics.callback('token_age_seconds', 'Age of the current MVI token', lambda: mvi_tokens.age or 0)
+
+# Runs in the background while MQTT connects and the cameras open; awaited before triggers are served
+auth_future = startup.submit('authenticate', mvi_tokens.get)
 
 # --------------------- USB Camera Discovery ---------------------
-def find_working_camera(max_index=10, timeout_sec=2.0):
-    logger.info("Searching for a working USB camera...")
-    for index in range(max_index):
-        cap = cv2.VideoCapture(index, OPENCV_BACKEND)
+CAMERA_CACHE_FILE = os.path.join(CONFIG_DIR, '.camera_cache.json')  # last good auto-discovered index per camera
+
+def candidate_camera_indexes(max_index=10):
+    """Indexes worth probing: the existing /dev/video* nodes on Linux, 0..max_index-1 elsewhere."""
+    if system == 'Linux' and os.path.isdir('/dev'):
+        return sorted(int(name[5:]) for name in os.listdir('/dev') if name.startswith('video') and name[5:].isdigit())
+    return list(range(max_index))
+
+def probe_camera(index, timeout_sec=2.0):
+    cap = video_capture(index, OPENCV_BACKEND)
+    try:
         if not cap.isOpened():
-            continue
+            return False
         start = time.time()
         while time.time() - start < timeout_sec:
             ret, frame = cap.read()
             if ret and frame is not None:
-                cap.release()
-                logger.info(f"Found working camera at index {index}")
-                return index
+                return True
             time.sleep(0.05)
+        return False
+    finally:
         cap.release()
-    logger.error("No working USB camera found")
-    return None
 
-# Determine source (only for streaming types)
-if camera_type == 'USB':
-    video_src = camera_device if camera_device is not None else find_working_camera()
-    if video_src is None:
-        sys.exit(1)
-elif camera_type == 'RTSP':
-    video_src = camera_ip
-elif camera_type == 'JPEG':
-    video_src = None  # No streaming source needed
-else:  # PICAM
-    video_src = None
-
-# --------------------- Upload (Lossless PNG) ---------------------
-@tenacity.retry(stop=tenacity.stop_after_attempt(3), wait=tenacity.wait_fixed(2))
-def upload_frame_in_memory(frame, destination):
-    success, buffer = cv2.imencode('.png', frame)
-    if not success:
-        raise ValueError("PNG encoding failed")
-    img_io = BytesIO(buffer)
+def find_working_cameras(max_index=10, timeout_sec=2.0, exclude=()):
+    """All USB camera indexes that deliver a frame, probed in parallel, lowest first."""
+    candidates = [index for index in candidate_camera_indexes(max_index) if index not in exclude]
+    if not candidates:
+        return []
+    logger.info(f"Searching for working USB cameras (probing {len(candidates)} devices)...")
+    with ThreadPoolExecutor(max_workers=len(candidates), thread_name_prefix="probe") as pool:
+        results = list(pool.map(lambda index: probe_camera(index, timeout_sec), candidates))
+    return [index for index, ok in zip(candidates, results) if ok]
+
+def load_camera_cache():
+    try:
+        with open(CAMERA_CACHE_FILE, 'r') as f:
+            return {str(name): int(index) for name, index in json.load(f).items()}
+    except (OSError, ValueError, TypeError, AttributeError):
+        return {}
+
+def save_camera_cache(cache):
+    try:
+        with open(CAMERA_CACHE_FILE, 'w') as f:
+            json.dump(cache, f)
+    except OSError as e:
+        logger.warning(f"Could not save camera cache {CAMERA_CACHE_FILE}: {e}")
+
+def resolve_video_sources(definitions):
+    """Streaming source per camera name (None for JPEG/PICAM).
+
+    USB cameras without camera-device first try the index that worked last time; the
+    rest share one parallel probe. An auto-discovered index is never given to two cameras.
+    """
+    sources = {}
+    claimed = {d.camera_device for d in definitions if d.camera_type == 'USB' and d.camera_device is not None}
+    cache = load_camera_cache()
+    pending = []
+    for definition in definitions:
+        if definition.camera_type == 'USB' and definition.camera_device is not None:
+            sources[definition.name] = definition.camera_device
+        elif definition.camera_type == 'USB':
+            cached = cache.get(definition.name)
+            if cached is not None and cached not in claimed and probe_camera(cached):
+                logger.info(f"[{definition.name}] Using cached USB camera index {cached}")
+                sources[definition.name] = cached
+                claimed.add(cached)
+            else:
+                pending.append(definition)
+        elif definition.camera_type == 'RTSP':
+            sources[definition.name] = definition.camera_ip
+        elif definition.camera_type == 'FILE':
+            sources[definition.name] = definition.camera_file
+        else:
+            sources[definition.name] = None  # JPEG needs no streaming source, PICAM opens the CSI camera directly
+
+    if pending:
+        working = find_working_cameras(exclude=claimed)
+        for definition, index in zip(pending, working):
+            logger.info(f"[{definition.name}] Found working USB camera at index {index}")
+            sources[definition.name] = index
+            cache[definition.name] = index
+        for definition in pending[len(working):]:
+            raise IOError(f"[{definition.name}] No working USB camera found")
+        save_camera_cache(cache)
+    return sources
+
+# --------------------- Upload ---------------------
+encoder = create_encoder(image_format, png_compression=png_compression, jpeg_quality=jpeg_quality,
+                         webp_quality=webp_quality)
+encode_executor = EncodeExecutor(encoder, workers=encode_workers or None, tiles=encode_tiles or None)
+logger.info(f"Uploading frames as {image_format} ({encoder.content_type}, {encode_executor.describe()})")
+
+def encode_frame(frame):
+    return encode_executor.encode(frame)
+
+def frame_filename(job, extension):
+    """Name the upload after the frame's capture time and age so MVI keeps that metadata."""
+    if job.frame_time is None:
+        return f"captured_frame.{extension}"
+    captured = datetime.fromtimestamp(monotonic_to_wall(job.frame_time))
+    name = f"frame_{captured.strftime('%Y%m%dT%H%M%S_%f')[:-3]}_age{job.frame_age_ms:.0f}ms"
+    if job.correlation_id:
+        name += f"_{job.correlation_id}"
+    if job.quality_flags:
+        name += "_q-" + "-".join(job.quality_flags)
+    return f"{name}.{extension}"
+
+def is_retryable_upload_error(error):
+    """Client errors (bad request, a token rejected even after refreshing) fail the same way again."""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return not 400 <= status < 500 or status in (408, 429)
+    return True
+
+def post_image(image, destination, filename, token):
     headers = {"mvie-controller": token, "accept": "application/json"}
-    files = {"file": ("captured_frame.png", img_io, "image/png")}
-    response = requests.post(destination, headers=headers, files=files, verify=verify_ssl)
-    response.raise_for_status() 
+    files = {"file": (filename, BytesIO(image.data), image.content_type)}
+    return http_session.post(destination, headers=headers, files=files, verify=verify_ssl)
+
+@tenacity.retry(stop=tenacity.stop_after_attempt(3), wait=tenacity.wait_fixed(2),
+                retry=tenacity.retry_if_exception(is_retryable_upload_error),
+                before_sleep=lambda retry_state: upload_retries.inc())
+def upload_encoded_frame(image, destination, filename=None):
+    filename = filename or f"captured_frame.{image.extension}"
+    token = mvi_tokens.get()
+    response = post_image(image, destination, filename, token)
+    if response.status_code == 401:
+        # Expired session: retry at once with a fresh token (shared with any concurrent upload)
+        logger.warning("Upload rejected with 401 - retrying with a fresh token")
+        response = post_image(image, destination, filename, mvi_tokens.invalidate(token))
+    response.raise_for_status()
     logger.info("Frame uploaded successfully")
 
+def post_images(items, destination, token):
+    headers = {"mvie-controller": token, "accept": "application/json"}
+    files = [("file", (item.filename, BytesIO(item.image.data), item.image.content_type)) for item in items]
+    return http_session.post(destination, headers=headers, files=files, verify=verify_ssl)
+
+@tenacity.retry(stop=tenacity.stop_after_attempt(3), wait=tenacity.wait_fixed(2),
+                retry=tenacity.retry_if_exception(is_retryable_upload_error),
+                before_sleep=lambda retry_state: upload_retries.inc())
+def upload_encoded_frames(destination, items):
+    """Several frames for one device in a single multipart request."""
+    token = mvi_tokens.get()
+    response = post_images(items, destination, token)
+    if response.status_code == 401:
+        logger.warning("Upload rejected with 401 - retrying with a fresh token")
+        response = post_images(items, destination, mvi_tokens.invalidate(token))
+    response.raise_for_status()
+    logger.info(f"{len(items)} frames uploaded successfully in one request")
+
+def upload_frame_in_memory(frame, destination):
+    upload_encoded_frame(encode_frame(frame), destination)
+
+# --------------------- Store-and-Forward Spool ---------------------
+def send_spooled_frame(metadata, payload):
+    """Replay one spooled frame with a single attempt - the spool drainer does its own backoff."""
+    image = EncodedImage(payload, metadata['extension'], metadata['content_type'])
+    upload_once = upload_encoded_frame.retry_with(stop=tenacity.stop_after_attempt(1), reraise=True)
+    upload_once(image, metadata['destination'], metadata['filename'])
+
+def spool_frame(image, destination, filename):
+    metadata = {"destination": destination, "filename": filename,
+                "extension": image.extension, "content_type": image.content_type}
+    upload_spool.append(metadata, image.data)
+
+# Scanning a large spool takes a moment, so it is recovered alongside the other start-up steps
+upload_spool = None
+spool_future = None
+if spool_enabled:
+    spool_future = startup.submit('spool-recovery', UploadSpool, spool_dir, send_spooled_frame,
+                                  max_bytes=int(spool_max_mb * 1024 * 1024),
+                                  max_age=spool_max_age_hours * 3600, drain_rate=spool_drain_rate,
+                                  retryable=is_retryable_upload_error)
+
 # --------------------- On-demand JPEG fetch ---------------------
-def fetch_jpeg_frame():
-    """Fetch a single JPEG snapshot from the configured endpoint."""
-    url = f"{camera_jpeg_protocol}://{camera_jpeg_endpoint}"
-    auth = HTTPDigestAuth = requests.auth.HTTPDigestAuth(camera_jpeg_username, camera_jpeg_password)
-    logger.info(f"Fetching single JPEG snapshot from {url}")
-    try:
+def fetch_jpeg_frame(camera, request=None, decode=True):
+    """Wait for a JPEG snapshot from the camera's configured endpoint.
 
-        response = requests.get(url, timeout=15, auth=auth)
-        response.raise_for_status()
-        
-        img_array = np.frombuffer(response.content, dtype=np.uint8)
-        frame = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-        
-        if frame is None:
-            logger.warning("Failed to decode JPEG image from response")
-            return None
-            
-        logger.info(f"JPEG frame fetched successfully - shape: {frame.shape}")
-        return frame
-        
+    `request` is a snapshot already started at trigger time (a new one is started if
+    None). With decode=False the raw JPEG bytes are returned for pass-through upload.
+    """
+    request = request or camera.snapshots.submit()
+    try:
+        data = request.result()
+    except SnapshotTimeout as e:
+        jpeg_snapshot_failures.inc(camera=camera.name, reason='timeout')
+        logger.error(f"[{camera.name}] JPEG snapshot timed out after {camera.definition.jpeg_timeout_ms:.0f}ms ({e})")
+        return None
     except Exception as e:
-        logger.error(f"Failed to fetch or decode JPEG frame: {e}")
+        jpeg_snapshot_failures.inc(camera=camera.name,
+                                   reason='http' if isinstance(e, requests.HTTPError) else 'error')
+        logger.error(f"[{camera.name}] Failed to fetch JPEG snapshot: {e}")
         return None
+    elapsed = time.monotonic() - request.started
+    jpeg_snapshot_seconds.observe(elapsed, camera=camera.name)
+
+    if not decode:
+        logger.info(f"[{camera.name}] JPEG snapshot fetched in {elapsed * 1000:.1f}ms - {len(data)} bytes")
+        return data
+
+    frame = decode_jpeg(data)
+    if frame is None:
+        jpeg_snapshot_failures.inc(camera=camera.name, reason='decode')
+        logger.warning(f"[{camera.name}] Failed to decode JPEG image from response")
+        return None
+    logger.info(f"[{camera.name}] JPEG frame fetched in {elapsed * 1000:.1f}ms - shape: {frame.shape}")
+    return frame
 
 # --------------------- FrameGrabber Class (only for streaming types) ---------------------
 class FrameGrabber:
-    def __init__(self, src, width, height, camera_type):
+    def __init__(self, src, width, height, camera_type, name="camera", rtsp_options=None, scheduler=None,
+                 file_options=None, on_frame=None):
+        self.name = name
+        self.src = src
+        self.width = width
+        self.height = height
         self.camera_type = camera_type
-        self.latest_frame = None
-        self.lock = threading.Lock()
+        self.rtsp_options = rtsp_options
+        self.file_options = file_options
+        self.on_frame = on_frame  # called with the capture timestamp of every committed frame
+        # On-demand RTSP: the thread only demuxes, frames are decoded when a reader asks
+        self.on_demand = rtsp_options is not None and rtsp_options.decode == 'on-demand'
+        self.decode_lock = threading.Lock()
+        self.scheduler = scheduler or CaptureScheduler(name=name)
+        self.ring = FrameRing(frame_buffer_slots)
         self.running = True
         self.consecutive_failures = 0
         self.failure_threshold = 10
         
         self._initialize_camera(src, width, height)
         
-        # Warm-up
-        logger.info("Warming up camera...")
-        for _ in range(warm_up_frames):
-            self._read_frame()
-            time.sleep(0.1)
+        # Warm-up (exposure settling; keyframe-only and on-demand streams would just stall here,
+        # and a replayed file would lose its first frames)
+        if camera_type != 'FILE' and (rtsp_options is None or rtsp_options.decode == 'all'):
+            logger.info(f"[{self.name}] Warming up camera...")
+            for _ in range(warm_up_frames):
+                _, slot = self.ring.writable_slot()
+                self._read_frame(slot)
+                time.sleep(0.1)
 
-        self.thread = threading.Thread(target=self._update, daemon=True)
+        self.thread = threading.Thread(target=self._update, name=f"grabber-{name}", daemon=True)
         self.thread.start()
-        logger.info("FrameGrabber thread started")
+        logger.info(f"[{self.name}] FrameGrabber thread started")
 
     def _initialize_camera(self, src, width, height):
         if self.camera_type == 'PICAM':
@@ -293,13 +777,21 @@ class FrameGrabber:
             config = self.picam.create_video_configuration(main={"size": (width, height)})
             self.picam.configure(config)
             self.picam.start()
-            logger.info(f"PiCamera initialized at {width}x{height}")
+            logger.info(f"[{self.name}] PiCamera initialized at {width}x{height}")
+        elif self.camera_type == 'FILE':
+            self.cap = FileCapture(src, self.file_options)
+            logger.info(f"[{self.name}] Replaying {self.cap.describe()}")
+        elif self.rtsp_options is not None:
+            self.cap = open_rtsp_capture(src, self.rtsp_options)
+            if not self.cap.isOpened():
+                raise IOError(f"Failed to open video source: {src}")
+            logger.info(f"[{self.name}] RTSP stream opened ({self.rtsp_options.describe()})")
         else:
             if self.camera_type == 'RTSP':
                 backend = cv2.CAP_FFMPEG
             else:
                 backend = OPENCV_BACKEND
-            self.cap = cv2.VideoCapture(src, backend)
+            self.cap = video_capture(src, backend)
             if not self.cap.isOpened():
                 raise IOError(f"Failed to open video source: {src}")
             self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc('M', 'J', 'P', 'G'))
@@ -308,24 +800,44 @@ class FrameGrabber:
             self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
             actual_w = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
             actual_h = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            logger.info(f"Requested {width}x{height} | Actual {actual_w}x{actual_h}")
+            logger.info(f"[{self.name}] Requested {width}x{height} | Actual {actual_w}x{actual_h}")
 
-    def _read_frame(self):
+    def _read_frame(self, out=None):
+        """Read the next frame, decoding into `out` when its shape matches."""
         if self.camera_type == 'PICAM':
-            return self.picam.capture_array()
+            request = self.picam.capture_request()
+            try:
+                # Copy straight out of the camera's DMA buffer into our slot instead of
+                # letting capture_array() allocate a new array every frame
+                with MappedArray(request, 'main') as mapped:
+                    if out is not None and out.shape == mapped.array.shape:
+                        np.copyto(out, mapped.array)
+                        return out
+                    return mapped.array.copy()
+            finally:
+                request.release()
         else:
-            ret, frame = self.cap.read()
+            ret, frame = self.cap.read(image=out) if out is not None else self.cap.read()
             return frame if ret else None
 
+    def _discard_frame(self):
+        if self.camera_type == 'PICAM':
+            self.picam.capture_request().release()
+        else:
+            self.cap.grab()
+
     def _reopen_camera(self, src, width, height):
-        logger.info("Attempting to reopen camera...")
+        logger.info(f"[{self.name}] Attempting to reopen camera...")
+        camera_reopens.inc(camera=self.name)
         if self.camera_type == 'PICAM':
             self.picam.stop()
             self.picam.close()
         else:
-            self.cap.release()
+            with self.decode_lock:
+                self.cap.release()
         time.sleep(1)
-        self._initialize_camera(src, width, height)
+        with self.decode_lock:
+            self._initialize_camera(src, width, height)
         self.consecutive_failures = 0
 
     def _update(self):
@@ -333,34 +845,100 @@ class FrameGrabber:
             try:
                 if self.camera_type != 'PICAM' and not self.cap.isOpened():
                     raise IOError("Camera capture is not opened")
+                if self.camera_type == 'FILE' and self.cap.finished:
+                    time.sleep(0.1)  # replay done without file-loop - the last frame stays buffered
+                    continue
                 
-                frame = self._read_frame()
+                if self.on_demand:
+                    if not self.cap.grab():
+                        raise ValueError("Stream read failed")
+                    self.consecutive_failures = 0
+                    continue
+                if not self.scheduler.poll():
+                    if self.scheduler.idle_mode == 'grab' and self.camera_type != 'PICAM':
+                        # Dequeue without decoding so the next decoded frame is a current one
+                        if not self.cap.grab():
+                            raise ValueError("Frame grab failed")
+                        self.consecutive_failures = 0
+                        continue
+                    self.scheduler.idle_wait()  # cut short when a trigger arms the grabber
+                    # Drop whatever the camera queued while we slept, woken early or not - it was
+                    # captured before the trigger and would otherwise be stamped as a current frame
+                    self._discard_frame()
+
+                index, slot = self.ring.writable_slot()
+                frame = self._read_frame(slot)
                 if frame is not None:
-                    with self.lock:
-                        self.latest_frame = frame.copy()
+                    stamp = time.monotonic()
+                    self.ring.commit(index, frame, stamp)
+                    frames_captured.inc(camera=self.name)
                     self.consecutive_failures = 0
+                    if self.on_frame:
+                        self.on_frame(stamp)
+                elif self.camera_type == 'FILE' and self.cap.finished:
+                    continue
                 else:
                     raise ValueError("Frame read returned None")
             except Exception as e:
                 self.consecutive_failures += 1
-                logger.warning(f"Frame read failed ({self.consecutive_failures}/{self.failure_threshold}): {e}")
+                frame_read_failures.inc(camera=self.name)
+                logger.warning(f"[{self.name}] Frame read failed "
+                               f"({self.consecutive_failures}/{self.failure_threshold}): {e}")
                 if self.consecutive_failures >= self.failure_threshold:
                     try:
-                        self._reopen_camera(video_src, camera_width, camera_height)
+                        self._reopen_camera(self.src, self.width, self.height)
                     except Exception as reopen_e:
-                        logger.error(f"Reopen failed: {reopen_e} - retrying after delay")
+                        logger.error(f"[{self.name}] Reopen failed: {reopen_e} - retrying after delay")
                         time.sleep(5)
                 else:
                     time.sleep(0.1)
     
+    def _decode_on_demand(self):
+        """On-demand RTSP: decode the newest demuxed frame into the ring if it isn't there yet."""
+        with self.decode_lock:
+            if self.cap.packet_time is None or self.cap.packet_time == self.cap.frame_time:
+                return
+            index, slot = self.ring.writable_slot()
+            ret, frame = self.cap.retrieve(image=slot)
+            if ret:
+                self.ring.commit(index, frame, self.cap.frame_time)
+                frames_captured.inc(camera=self.name)
+
     def get_latest_frame(self):
-        with self.lock:
-            frame = self.latest_frame.copy() if self.latest_frame is not None else None
-        if frame is not None:
-            if np.mean(frame) < 5:
-                logger.warning("Detected potential black frame - treating as invalid")
+        """Return a copy of the newest frame, or None if there is none or it looks black."""
+        if self.on_demand:
+            self._decode_on_demand()
+        with self.ring.latest() as view:
+            if view is None:
                 return None
-        return frame
+            if is_black(view, frame_quality_black_threshold):
+                logger.warning(f"[{self.name}] Detected potential black frame - treating as invalid")
+                return None
+            return view.copy()
+
+    def get_frame_at(self, event_time, timeout=0.0):
+        """Return (frame copy, capture timestamp) for the frame closest to `event_time`.
+
+        `event_time` is a time.monotonic() value and may lie slightly in the past (pre-trigger
+        window) or future; for future events wait up to `timeout` seconds for that frame.
+        Returns (None, None) if nothing usable is buffered.
+        """
+        if self.on_demand:
+            # Only frames decoded for earlier requests are buffered, so wait for the event
+            # to be demuxed and decode up to it
+            deadline = time.monotonic() + timeout
+            while (self.cap.packet_time or 0) < event_time and time.monotonic() < deadline:
+                time.sleep(0.005)
+            self._decode_on_demand()
+        elif timeout > 0:
+            self.ring.wait_for_frame_after(event_time, timeout)
+        with self.ring.closest(event_time) as (view, stamp):
+            if view is None:
+                return None, None
+            if is_black(view, frame_quality_black_threshold):
+                logger.warning(f"[{self.name}] Detected potential black frame - treating as invalid")
+                return None, None
+            return view.copy(), stamp
 
     def stop(self):
         self.running = False
@@ -372,87 +950,462 @@ class FrameGrabber:
             if hasattr(self, 'cap'):
                 self.cap.release()
 
-# Initialize grabber only if needed (not for JPEG on-demand)
-if camera_type != 'JPEG':
-    grabber = FrameGrabber(video_src, camera_width, camera_height, camera_type)
-    logger.info(f"Using {camera_type} streaming camera at {camera_width}x{camera_height}")
-else:
-    grabber = None
-    logger.info("Using JPEG on-demand mode (single snapshot on trigger)")
-
-# --------------------- Image Processing ---------------------
-def brighten_frame(frame, gamma):
-    inv_gamma = 1.0 / gamma
-    table = np.array([((i / 255.0) ** inv_gamma) * 255 for i in np.arange(256)]).astype("uint8")
-    return cv2.LUT(frame, table)
-
-# --------------------- Recovery Function (for streaming types only) ---------------------
-@tenacity.retry(stop=tenacity.stop_after_attempt(5), wait=tenacity.wait_exponential(multiplier=1, min=2, max=10), reraise=True)
-def recover_camera_connection():
-    global grabber
-    logger.info("Recovering camera connection by restarting grabber...")
-    grabber.stop()
-    time.sleep(1)
-    grabber = FrameGrabber(video_src, camera_width, camera_height, camera_type)
-    logger.info("Camera connection recovered successfully")
-
-# --------------------- Clean Frame Capture (for streaming types) ---------------------
-def capture_frame():
-    frame = grabber.get_latest_frame()
-    if frame is not None:
-        return frame
-    
-    logger.warning("No fresh frame available - attempting recovery...")
-    try:
-        recover_camera_connection()
-        time.sleep(0.5)
-        frame = grabber.get_latest_frame()
-        if frame is None:
-            logger.error("Recovery succeeded but no valid frame yet")
+# --------------------- Camera (definition + grabber + recovery) ---------------------
+class Camera:
+    """Runtime state for one configured camera. Streaming types own a FrameGrabber;
+    JPEG cameras fetch a snapshot per trigger instead."""
+
+    def __init__(self, definition, video_src):
+        self.definition = definition
+        self.name = definition.name
+        self.camera_type = definition.camera_type
+        self.video_src = video_src
+        self.device_endpoint = device_endpoint_template.format(uuid=definition.device_uuid)
+        self.recovery_lock = threading.Lock()
+        self.quality = FrameQualityChecker(black_threshold=frame_quality_black_threshold,
+                                           blur_threshold=frame_quality_blur_threshold,
+                                           dark_fraction=frame_quality_dark_fraction,
+                                           bright_fraction=frame_quality_bright_fraction)
+        self.preprocessor = Preprocessor(**definition.preprocess)
+        if self.preprocessor.enabled:
+            logger.info(f"[{self.name}] Preprocessing: {self.preprocessor.describe()}")
+        self.grabber = None
+        self.motion = None
+        self.replay_started = threading.Event()  # FILE with file-upload-every-frame: set once start-up completes
+        self.snapshots = None
+        if self.camera_type != 'JPEG':
+            self.grabber = self._create_grabber()
+            buffer_mb = frame_buffer_slots * definition.width * definition.height * 3 / 1e6
+            logger.info(f"[{self.name}] Using {self.camera_type} streaming camera at "
+                        f"{definition.width}x{definition.height} (frame buffer ~{buffer_mb:.0f} MB)")
+        else:
+            self.snapshots = SnapshotClient(f"{definition.jpeg_protocol}://{definition.jpeg_endpoint}",
+                                            definition.jpeg_username, definition.jpeg_password,
+                                            timeout=definition.jpeg_timeout_ms / 1000,
+                                            concurrency=definition.jpeg_concurrency,
+                                            keep_warm=definition.jpeg_keep_warm_seconds,
+                                            connect_timeout=http_connect_timeout, name=self.name)
+            self.snapshots.warm()  # connect and answer the digest challenge before the first trigger
+            self.snapshots.start()
+            logger.info(f"[{self.name}] Using JPEG on-demand mode (single snapshot on trigger, "
+                        f"{self.snapshots.describe()})")
+
+    def _create_grabber(self):
+        scheduler = CaptureScheduler(self.definition.idle_mode, self.definition.armed_seconds,
+                                     self.definition.idle_fps, name=self.name)
+        every_frame = self.definition.file is not None and self.definition.file.every_frame
+        return FrameGrabber(self.video_src, self.definition.width, self.definition.height,
+                            self.camera_type, name=self.name, rtsp_options=self.definition.rtsp,
+                            scheduler=scheduler, file_options=self.definition.file,
+                            on_frame=self._on_replayed_frame if every_frame else None)
+
+    @property
+    def streaming(self):
+        return self.camera_type != 'JPEG'
+
+    def _on_replayed_frame(self, stamp):
+        # Runs on the grabber thread: waiting for room in the upload queue paces the replay
+        self.replay_started.wait()
+        upload_pipeline.submit(capture_job(self, time.monotonic(), stamp), wait=True)
+
+    def start_motion_trigger(self):
+        """Capture whenever the grabber's frames show motion, alongside any MQTT trigger."""
+        self.motion = MotionWatcher(MotionDetector(**self.definition.motion), lambda: self.grabber.ring,
+                                    self._on_motion, name=self.name,
+                                    on_check=lambda seconds: motion_check_seconds.observe(seconds, camera=self.name))
+        self.motion.start()
+
+    def _on_motion(self, stamp, score):
+        motion_triggers.inc(camera=self.name)
+        logger.info(f"[{self.name}] Motion detected ({score:.1%} of the region changed) - capturing")
+        capture_and_upload(self, event_time=stamp + self.definition.motion_delay_ms / 1000)
+
+    def arm(self, seconds=None):
+        """Switch the grabber to full frame rate. Returns whether it already was (always True for JPEG)."""
+        if self.grabber is None:
+            return True
+        return self.grabber.scheduler.arm(seconds)
+
+    @tenacity.retry(stop=tenacity.stop_after_attempt(5), wait=tenacity.wait_exponential(multiplier=1, min=2, max=10), reraise=True)
+    def recover_camera_connection(self):
+        logger.info(f"[{self.name}] Recovering camera connection by restarting grabber...")
+        self.grabber.stop()
+        time.sleep(1)
+        self.grabber = self._create_grabber()
+        self.quality.reset()
+        logger.info(f"[{self.name}] Camera connection recovered successfully")
+
+    def capture_frame(self):
+        frame = self.grabber.get_latest_frame()
+        if frame is not None:
+            return frame
+
+        with self.recovery_lock:
+            # Another upload worker may have already recovered the camera while we waited
+            frame = self.grabber.get_latest_frame()
+            if frame is not None:
+                return frame
+            return self._recover_and_capture()
+
+    def _recover_and_capture(self):
+        logger.warning(f"[{self.name}] No fresh frame available - attempting recovery...")
+        try:
+            self.recover_camera_connection()
+            camera_recoveries.inc(camera=self.name, result='success')
+            time.sleep(0.5)
+            frame = self.grabber.get_latest_frame()
+            if frame is None:
+                logger.error(f"[{self.name}] Recovery succeeded but no valid frame yet")
+                return None
+            return frame
+        except Exception as e:
+            camera_recoveries.inc(camera=self.name, result='failed')
+            logger.error(f"[{self.name}] Camera recovery failed after retries: {e}")
             return None
-        return frame
-    except Exception as e:
-        logger.error(f"Camera recovery failed after retries: {e}")
-        return None
 
-# --------------------- Capture and Upload (handles both modes) ---------------------
-def capture_and_upload():
-    if camera_type == 'JPEG':
-        frame = fetch_jpeg_frame()
-        if frame is None:
-            logger.error("Failed to fetch valid JPEG snapshot - skipping upload")
-            return
-    else:
-        frame = capture_frame()
-        if frame is None:
-            logger.error("Failed to obtain a valid frame - skipping upload")
+    def check_quality(self, job):
+        """Run the frame quality checks; raise to reject the frame, otherwise flag the job."""
+        # Repeated frames are part of a recording, and snapshot cameras often serve a cached
+        # image between triggers - only a live stream repeating itself means a stuck camera
+        report = self.quality.check(job.frame, job.frame_time, frozen=self.streaming and self.camera_type != 'FILE')
+        if report.ok:
             return
-    
-    # Optional gamma correction
-    # frame = brighten_frame(frame, gamma)
-    
-    logger.info(f"Frame ready for upload - shape: {frame.shape}")
+        rejected = [issue for issue in report.issues if issue in frame_quality_reject]
+        for issue in report.issues:
+            frame_quality_issues.inc(camera=self.name, issue=issue,
+                                     action='reject' if issue in rejected else 'flag')
+        if rejected:
+            raise ValueError(f"Frame rejected as {', '.join(rejected)} ({report.describe()}) - skipping upload")
+        logger.warning(f"[{self.name}] Frame flagged as {', '.join(report.issues)} ({report.describe()})")
+        job.quality_flags = report.issues
+
+    def health_check(self):
+        if not self.streaming or self.camera_type == 'FILE':
+            return  # nothing to reconnect; read errors already reopen the file
+        if not self.arm(seconds=1.0):
+            # An idle grabber's newest frame is old by design - capture a current one to check
+            self.grabber.ring.wait_for_frame_after(time.monotonic(), timeout=2.0)
+        frame, stamp = self.grabber.get_frame_at(time.monotonic())
+        if frame is not None:
+            if 'frozen' not in self.quality.check(frame, stamp).issues:
+                return
+            logger.warning(f"[{self.name}] Camera is returning identical frames")
+        logger.info(f"[{self.name}] Periodic health check failed - recovering camera (no upload)")
+        try:
+            with self.recovery_lock:
+                self.recover_camera_connection()
+            camera_recoveries.inc(camera=self.name, result='success')
+        except Exception as e:
+            camera_recoveries.inc(camera=self.name, result='failed')
+            logger.error(f"[{self.name}] Health check recovery failed: {e}")
+
+    def stop(self):
+        if self.motion:
+            self.motion.stop()
+        if self.snapshots:
+            self.snapshots.stop()
+        if self.grabber:
+            self.grabber.stop()
+
+cameras = []
+
+def open_camera(definition, video_src):
+    camera = Camera(definition, video_src)
+    cameras.append(camera)  # so a failed start-up can still stop the cameras that did open
+    return camera
+
+def open_cameras():
+    """Resolve every camera's source, then open and warm up all cameras in parallel."""
+    with startup.step('discover-cameras'):
+        sources = resolve_video_sources(camera_definitions)
+    futures = [startup.submit(f"camera[{definition.name}]", open_camera, definition, sources[definition.name])
+               for definition in camera_definitions]
+    return [future.result() for future in futures]
+
+cameras_future = startup.submit('cameras', open_cameras)
+
+# Cameras grouped by trigger topic (a topic may fire several cameras), filled in once they are open
+trigger_topics = {}
+arm_topics = {}
+
+metrics.callback('capture_armed', 'Whether the grabber runs at full frame rate (1) or idles (0)',
+                 lambda: {(c.name,): int(c.grabber.scheduler.armed) for c in cameras if c.grabber},
+                 labelnames=['camera'])
+metrics.callback('motion_score', 'Changed fraction of the motion region in the last checked frame',
+                 lambda: {(c.name,): c.motion.detector.last_score for c in cameras if c.motion},
+                 labelnames=['camera'])
+metrics.callback('capture_wakeups_total', 'Idle to armed transitions of the grabber',
+                 lambda: {(c.name,): c.grabber.scheduler.wakeups for c in cameras if c.grabber},
+                 type_name='counter', labelnames=['camera'])
+metrics.callback('jpeg_snapshot_connections_total', 'New connections opened to JPEG cameras',
+                 lambda: {(c.name,): c.snapshots.stats.new_connections for c in cameras if c.snapshots},
+                 type_name='counter', labelnames=['camera'])
+metrics.callback('jpeg_digest_challenges_total', 'Digest 401 challenges answered for JPEG cameras',
+                 lambda: {(c.name,): c.snapshots.auth.challenges for c in cameras if c.snapshots and c.snapshots.auth},
+                 type_name='counter', labelnames=['camera'])
+
+# --------------------- Upload Pipeline (encode + upload off the MQTT thread) ---------------------
+def process_capture_job(job):
+    """Worker stage: finish the capture if needed, then encode and upload."""
+    camera = job.camera
+    if job.frame is None:
+        # JPEG snapshots, future event times and camera recovery can take a while, so they
+        # run here instead of in on_message
+        if not camera.streaming:
+            job.frame = fetch_jpeg_frame(camera, job.snapshot, decode=image_format != 'passthrough')
+            job.frame_time = time.monotonic()
+        else:
+            wait = max(0.0, job.event_time - time.monotonic()) + 0.5
+            job.frame, job.frame_time = camera.grabber.get_frame_at(job.event_time, timeout=wait)
+            if job.frame is None:
+                job.frame = camera.capture_frame()
+                job.frame_time = time.monotonic()
+        job.mark('capture')
+        if job.frame is None:
+            uploads_total.inc(result='no_frame')
+            raise ValueError("Failed to obtain a valid frame - skipping upload")
+        trigger_capture_seconds.observe(time.monotonic() - job.trigger_time, camera=camera.name)
+    if isinstance(job.frame, np.ndarray):
+        try:
+            camera.check_quality(job)
+        except ValueError:
+            uploads_total.inc(result='rejected')
+            raise
+    logger.info(f"[{camera.name}] Selected frame captured {job.event_skew_ms:+.1f}ms from event time "
+                f"(age at trigger {job.frame_age_ms:.1f}ms)")
+
+    if isinstance(job.frame, np.ndarray) and camera.preprocessor.enabled:
+        def record_stage(stage, seconds):
+            job.mark(stage)
+            preprocess_seconds.observe(seconds, stage=stage)
+        job.frame = camera.preprocessor.process(job.frame, on_stage=record_stage)
+
+    started = time.monotonic()
+    image = encode_frame(job.frame)
+    job.mark('encode')
+    encode_seconds.observe(time.monotonic() - started, format=image_format)
+    filename = frame_filename(job, image.extension)
+    if upload_spool and upload_spool.outage:
+        # MVI is known to be down - don't burn retries, queue behind the spooled backlog
+        spool_frame(image, camera.device_endpoint, filename)
+        job.mark('spool')
+        uploads_total.inc(result='spooled')
+        return
+    item = UploadItem(image, camera.device_endpoint, filename, job)
+    if upload_batcher:
+        # Sent with whatever else is ready; the result and stage latency are recorded by finish_upload
+        job.deferred = True
+        upload_batcher.submit(item)
+        job.mark('batched')
+        return
+    started = time.monotonic()
     try:
-        upload_frame_in_memory(frame, device_endpoint)
+        upload_encoded_frame(image, camera.device_endpoint, filename)
     except Exception as e:
-        logger.error(f"Upload failed: {e}")
+        finish_upload(item, e, started)
+        return
+    finish_upload(item, None, started)
+
+def finish_upload(item, error, started):
+    """Record an upload outcome; failed frames go to the spool (or the error is raised without one)."""
+    job, camera = item.job, item.job.camera
+    upload_seconds.observe(time.monotonic() - started)
+    try:
+        if error is not None:
+            if not upload_spool or not is_retryable_upload_error(error):
+                # MVI refused this frame; replaying it from the spool would fail the same way
+                uploads_total.inc(result='failed')
+                raise error
+            logger.warning(f"[{camera.name}] Upload failed ({error}) - spooling frame to disk")
+            spool_frame(item.image, item.destination, item.filename)
+            job.mark('spool')
+            uploads_total.inc(result='spooled')
+            return
+        job.mark('upload')
+        uploads_total.inc(result='success')
+        trigger_upload_seconds.observe(time.monotonic() - job.trigger_time, camera=camera.name)
+    finally:
+        if job.deferred:
+            # The pipeline worker moved on when it handed the frame to the batcher
+            logger.info(f"{upload_pipeline.name} stage latency: {job.stage_summary()}")
+
+upload_batcher = None
+if upload_mode != 'single':
+    upload_batcher = UploadBatcher(
+        send_one=lambda item: upload_encoded_frame(item.image, item.destination, item.filename),
+        send_many=upload_encoded_frames, on_done=finish_upload,
+        on_batch=upload_batch_frames.observe, mode=upload_mode,
+        max_batch=upload_batch_size, linger=upload_batch_linger_ms / 1000,
+        queue_depth=max(upload_queue_depth, upload_batch_size * 2))
+    upload_batcher.start()
+    metrics.callback('upload_batch_queue_depth', 'Encoded frames waiting for an upload batch', upload_batcher.qsize)
+
+upload_pipeline = CapturePipeline(process_capture_job, queue_depth=upload_queue_depth,
+                                  workers=upload_workers, drop_policy=upload_drop_policy)
+upload_pipeline.start()
+metrics.callback('upload_queue_depth', 'Jobs waiting for an upload worker', upload_pipeline.qsize)
+metrics.callback('upload_dropped_total', 'Triggers dropped because the upload queue was full',
+                 lambda: upload_pipeline.dropped, type_name='counter')
+
+# --------------------- Trigger Timing ---------------------
+def parse_trigger_event_time(payload, received):
+    """Work out the monotonic event time a trigger refers to.
+
+    A JSON payload may carry either "timestamp" (epoch seconds or milliseconds, as stamped
+    by the publisher) or "offset_ms" (relative to when the message arrived, negative for
+    pre-trigger frames). Anything else means "now". Offsets are clamped to
+    +/- trigger-max-offset-ms since the frame history only covers a short window.
+    """
+    try:
+        data = json.loads(payload)
+    except (ValueError, UnicodeDecodeError):
+        return received
+    if not isinstance(data, dict):
+        return received
+
+    offset_ms = None
+    try:
+        if data.get('offset_ms') is not None:
+            offset_ms = float(data['offset_ms'])
+        elif data.get('timestamp') is not None:
+            stamp = float(data['timestamp'])
+            if stamp > 1e12:  # milliseconds
+                stamp /= 1000.0
+            offset_ms = (stamp - time.time()) * 1000
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring invalid trigger timing in payload: {data}")
+        return received
+
+    if offset_ms is None:
+        return received
+    if abs(offset_ms) > trigger_max_offset_ms:
+        logger.warning(f"Trigger offset {offset_ms:.0f}ms exceeds trigger-max-offset-ms - clamping")
+        offset_ms = max(-trigger_max_offset_ms, min(trigger_max_offset_ms, offset_ms))
+    return received + offset_ms / 1000.0
+
+def monotonic_to_wall(stamp):
+    return time.time() - (time.monotonic() - stamp)
+
+# --------------------- Capture and Upload (handles both modes) ---------------------
+def capture_job(camera, trigger_time, event_time=None, correlation_id=None):
+    """Build a job holding the camera's frame closest to the event time."""
+    job = CaptureJob(frame=None, trigger_time=trigger_time, event_time=event_time, camera=camera,
+                     correlation_id=correlation_id)
+    if event_time is None:
+        job.event_time = job.trigger_time
+    triggers_received.inc(camera=camera.name)
+    if not camera.streaming:
+        # Start the fetch now so a burst of JPEG cameras is fetched at once, not one per free worker
+        job.snapshot = camera.snapshots.submit()
+    was_armed = camera.arm()
+    if camera.streaming and was_armed and not camera.grabber.on_demand and job.event_time <= job.trigger_time:
+        job.frame, job.frame_time = camera.grabber.get_frame_at(job.event_time)
+        if job.frame is not None:
+            job.capture_time = time.monotonic()
+            trigger_capture_seconds.observe(job.capture_time - trigger_time, camera=camera.name)
+    # Future events (positive offsets) and idle grabbers ramping up wait for their frame in the
+    # worker, never in the MQTT thread
+    return job
+
+def capture_and_upload(camera, event_time=None):
+    """Grab the camera's frame closest to the event time and hand it to the upload pipeline."""
+    upload_pipeline.submit(capture_job(camera, time.monotonic(), event_time))
+
+# --------------------- Burst Capture (several cameras, one trigger) ---------------------
+def capture_burst(burst_cameras, event_time=None):
+    """Capture one frame per camera for the same event and upload the set in parallel.
+
+    Every camera picks the buffered frame closest to the shared event time, so the order
+    the rings are read in does not add skew. The spread between the chosen frames'
+    capture timestamps is logged, and the set can share a correlation ID in its filenames.
+    """
+    trigger_time = time.monotonic()
+    correlation_id = uuid.uuid4().hex[:12] if burst_correlation_id else None
+    jobs = [capture_job(camera, trigger_time, event_time, correlation_id) for camera in burst_cameras]
+
+    stamps = [job.frame_time for job in jobs if job.frame_time is not None]
+    label = f"Burst {correlation_id}" if correlation_id else "Burst"
+    if len(stamps) > 1:
+        spread_ms = (max(stamps) - min(stamps)) * 1000
+        burst_spread_seconds.observe(spread_ms / 1000)
+        message = (f"{label}: {len(jobs)} cameras, inter-camera spread {spread_ms:.1f}ms, "
+                   f"captured in {(time.monotonic() - trigger_time) * 1000:.1f}ms")
+        if spread_ms > burst_max_spread_ms:
+            logger.warning(f"{message} (exceeds burst-max-spread-ms {burst_max_spread_ms:.0f}ms)")
+        else:
+            logger.info(message)
+    else:
+        logger.info(f"{label}: {len(jobs)} cameras (frames captured by upload workers)")
+
+    # Queued back-to-back so idle workers upload the set concurrently over pooled connections
+    for job in jobs:
+        upload_pipeline.submit(job)
 
 # --------------------- MQTT Listener ---------------------
+def subscribe_triggers(client):
+    for topic in list(trigger_topics) + list(arm_topics):
+        client.subscribe(topic)
+
 def on_connect(client, userdata, flags, reason_code, properties):
+    mqtt_connects.inc(result='success' if reason_code == 0 else 'failed')
     if reason_code == 0:
         logger.info("MQTT connected successfully")
-        client.subscribe(mqtt_topic)
+        startup.finish('mqtt-connect')
+        mqtt_connected.set()
+        # Until start-up completes there are no cameras to serve; subscribing then is done below
+        if startup.ready.is_set():
+            subscribe_triggers(client)
     else:
         logger.warning(f"MQTT connect failed: {reason_code}")
 
 def on_disconnect(client, userdata, flags, reason_code, properties):
+    mqtt_connected.clear()
+    mqtt_disconnects.inc()
     logger.warning(f"MQTT disconnected ({reason_code}) - will reconnect automatically")
 
 def on_message(client, userdata, message):
+    received = time.monotonic()
+    mqtt_messages.inc(topic=message.topic)
     logger.info(f"MQTT message on {message.topic}: {message.payload.decode()}")
-    capture_and_upload()
+    armed = [camera for topic, topic_cameras in arm_topics.items()
+             if mqtt.topic_matches_sub(topic, message.topic) for camera in topic_cameras]
+    if armed:
+        arm_cameras(armed, message.payload)
+        return
+    decision = trigger_admission.admit(message.topic, message.payload, retain=message.retain, now=received)
+    if decision == COALESCED:
+        triggers_coalesced.inc(topic=message.topic)
+    elif decision != ADMITTED:
+        triggers_dropped.inc(topic=message.topic, reason=decision)
+    if decision != ADMITTED:
+        logger.debug(f"Trigger on {message.topic} not captured ({decision})")
+        return
+    event_time = parse_trigger_event_time(message.payload, received)
+    matched = []
+    for topic, topic_cameras in trigger_topics.items():
+        if mqtt.topic_matches_sub(topic, message.topic):
+            matched.extend(camera for camera in topic_cameras if camera not in matched)
+    if len(matched) > 1:
+        capture_burst(matched, event_time)
+    elif matched:
+        capture_and_upload(matched[0], event_time)
+
+def arm_cameras(targets, payload):
+    """Pre-arm message: run the cameras at full rate now, optionally for {"seconds": N}."""
+    seconds = None
+    try:
+        data = json.loads(payload.decode() or 'null')
+        if isinstance(data, dict) and data.get('seconds') is not None:
+            seconds = float(data['seconds'])
+    except (ValueError, UnicodeDecodeError):
+        pass
+    for camera in targets:
+        camera.arm(seconds)
+
+mqtt_client = None
 
 def mqtt_listener():
+    global mqtt_client
     client = mqtt.Client(callback_api_version=CallbackAPIVersion.VERSION2)
     client.on_connect = on_connect
     client.on_disconnect = on_disconnect
@@ -468,8 +1421,10 @@ def mqtt_listener():
             sys.exit(1)
         client.tls_set(ca_certs=tls_path, cert_reqs=ssl.CERT_REQUIRED, tls_version=ssl.PROTOCOL_TLS)
 
+    startup.begin('mqtt-connect')
     client.connect_async(mqtt_broker, port=mqtt_port, keepalive=60)
     client.loop_start()
+    mqtt_client = client
     logger.info(f"MQTT client started for {mqtt_broker}:{mqtt_port}")
 
 mqtt_thread = threading.Thread(target=mqtt_listener, daemon=True)
@@ -477,39 +1432,58 @@ mqtt_thread.start()
 
 # --------------------- Keep-Alive ---------------------
 def keep_alive():
-    global token
-    headers = {"mvie-controller": token, "accept": "application/json"}
     while True:
         try:
-            response = requests.get(keep_alive_url, headers=headers, verify=verify_ssl, timeout=10)
+            token = mvi_tokens.get()
+            headers = {"mvie-controller": token, "accept": "application/json"}
+            response = http_session.get(keep_alive_url, headers=headers, verify=verify_ssl, timeout=10)
             if response.status_code == 401:
                 logger.warning("Session expired - re-authenticating...")
-                token = authenticate()
-                headers["mvie-controller"] = token
+                mvi_tokens.invalidate(token)
             else:
                 response.raise_for_status()
+            keep_alives.inc(result='success')
             logger.info(f"Keep-alive successful ({response.status_code})")
+            stats = http_session.stats.snapshot()
+            logger.info(f"HTTP connections: {stats['requests']} requests, {stats['new_connections']} new handshakes, "
+                        f"{stats['reused_connections']} reused")
         except Exception as e:
+            keep_alives.inc(result='failed')
             logger.error(f"Keep-alive failed: {e}")
         time.sleep(keep_alive_interval)
 
-keep_alive_thread = threading.Thread(target=keep_alive, daemon=True)
-keep_alive_thread.start()
-logger.info(f"Keep-alive thread started (interval: {keep_alive_interval}s)")
+# --------------------- Metrics Endpoint ---------------------
+metrics.callback('http_requests_total', 'HTTP requests sent through the pooled session',
+                 lambda: http_session.stats.requests, type_name='counter')
+metrics.callback('http_new_connections_total', 'New TCP/TLS connections opened by the pooled session',
+                 lambda: http_session.stats.new_connections, type_name='counter')
 
 # --------------------- Config Reload (Optional) ---------------------
 observer = None
 if WATCHDOG_AVAILABLE:
+    def reload_preprocessing():
+        """Push changed crop/resize/rotate/gamma/white-balance settings to the running cameras."""
+        for index, entry in enumerate(config.get('cameras') or [{}]):
+            entry = entry or {}
+            camera = next((c for c in cameras if c.name == camera_name(entry, index)), None)
+            if camera is None:
+                continue
+            try:
+                if camera.preprocessor.configure(**preprocess_settings(entry)):
+                    logger.info(f"[{camera.name}] Preprocessing updated: {camera.preprocessor.describe()}")
+            except (ValueError, TypeError) as e:
+                logger.error(f"[{camera.name}] Ignoring invalid preprocessing settings: {e}")
+
     class ConfigHandler(FileSystemEventHandler):
         def on_modified(self, event):
             if event.src_path.endswith(CONFIG_FILE):
                 logger.info("Config file changed - reloading settings...")
-                global config, gamma, warm_up_frames, keep_alive_interval
+                global config, warm_up_frames, keep_alive_interval
                 try:
                     config = load_config()
-                    gamma = float(config.get('gamma', 1.5))
                     warm_up_frames = int(config.get('warm-up-frames', 15))
                     keep_alive_interval = int(config.get('keep-alive-interval', 300))
+                    reload_preprocessing()
                     logger.info("Config reloaded successfully")
                 except Exception as e:
                     logger.error(f"Failed to reload config: {e}")
@@ -526,28 +1500,89 @@ def shutdown_handler(signum, frame):
     logger.info("Shutdown signal received - stopping gracefully...")
     if observer:
         observer.stop()
-    if grabber:
-        grabber.stop()
+    upload_pipeline.stop()
+    if upload_batcher:
+        upload_batcher.stop()
+    encode_executor.shutdown()
+    if metrics_server:
+        metrics_server.shutdown()
+    if upload_spool:
+        upload_spool.stop()
+    for camera in cameras:
+        camera.stop()
     logger.info("Shutdown complete")
     sys.exit(0)
 
 signal.signal(signal.SIGINT, shutdown_handler)
 signal.signal(signal.SIGTERM, shutdown_handler)
 
+# --------------------- Startup Completion ---------------------
+def abort_startup(message):
+    logger.error(message)
+    startup.mark_failed()
+    logger.error(f"Startup failed after {startup.breakdown()}")
+    upload_pipeline.stop()
+    for camera in list(cameras):
+        camera.stop()
+    sys.exit(1)
+
+try:
+    auth_future.result()
+    logger.info("Authenticated successfully with MVI")
+except Exception as e:
+    abort_startup(f"Authentication failed after retries: {e}")
+
+try:
+    cameras[:] = cameras_future.result()  # definition order
+except Exception as e:
+    abort_startup(f"Camera startup failed: {e}")
+
+for camera in cameras:
+    if camera.definition.topic:
+        trigger_topics.setdefault(camera.definition.topic, []).append(camera)
+    if camera.definition.arm_topic:
+        arm_topics.setdefault(camera.definition.arm_topic, []).append(camera)
+
+if spool_future:
+    try:
+        upload_spool = spool_future.result()
+        upload_spool.start()
+        metrics.callback('spool_depth_frames', 'Frames waiting in the upload spool', upload_spool.depth)
+        metrics.callback('spool_depth_bytes', 'Bytes waiting in the upload spool', upload_spool.depth_bytes)
+        metrics.callback('spool_drained_total', 'Spooled frames replayed to MVI',
+                         lambda: upload_spool.drained, type_name='counter')
+        metrics.callback('spool_evicted_total', 'Spooled frames dropped by the size/age caps',
+                         lambda: upload_spool.evicted, type_name='counter')
+        metrics.callback('spool_rejected_total', 'Spooled frames MVI refused permanently (dropped)',
+                         lambda: upload_spool.rejected, type_name='counter')
+    except Exception as e:
+        logger.error(f"Upload spool unavailable ({e}) - failed uploads will be dropped")
+
+keep_alive_thread = threading.Thread(target=keep_alive, daemon=True)
+keep_alive_thread.start()
+logger.info(f"Keep-alive thread started (interval: {keep_alive_interval}s)")
+
+for camera in cameras:
+    if camera.definition.motion:
+        camera.start_motion_trigger()
+    camera.replay_started.set()
+
+startup.mark_ready()
+if mqtt_client is not None and mqtt_connected.is_set():
+    subscribe_triggers(mqtt_client)
+logger.info(f"Trigger admission: {trigger_admission.describe()}")
+logger.info(f"All components initialized ({len(cameras)} cameras) in {startup.breakdown()}. "
+            f"Waiting for MQTT triggers...")
+
 # --------------------- Main Loop (Health Check - only for streaming types) ---------------------
-logger.info("All components initialized. Waiting for MQTT triggers...")
 last_health_check = time.time()
 health_check_interval = 30  # seconds
 
 while True:
     time.sleep(1)
     if time.time() - last_health_check > health_check_interval:
-        if camera_type != 'JPEG' and grabber:
-            frame = grabber.get_latest_frame()
-            if frame is None:
-                logger.info("Periodic health check failed - recovering camera (no upload)")
-                try:
-                    recover_camera_connection()
-                except Exception as e:
-                    logger.error(f"Health check recovery failed: {e}")
-        last_health_check = time.time()
\ No newline at end of file
+        for camera in cameras:
+            camera.health_check()
+        if upload_spool and upload_spool.depth():
+            logger.info(upload_spool.describe())
+        last_health_check = time.time()